@@ -0,0 +1,112 @@
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Refresh synchronously when the token has less than this many seconds left.
+EXPIRY_MARGIN_SECONDS = 30
+# Start a background refresh when the token has less than this many seconds left.
+REFRESH_AHEAD_SECONDS = 300
+
+
+class AccessToken(BaseModel):
+    access_token: str
+    expires_at: float
+
+    def seconds_left(self, now: float) -> float:
+        return self.expires_at - now
+
+
+class AccessTokenCache:
+    """Thread-safe cache for web-player access tokens.
+
+    Tokens are keyed by the ``(sp_dc, sp_key)`` cookie pair and reused until
+    shortly before they expire. When a token enters the refresh-ahead window a
+    single background refresh is started, while callers keep receiving the
+    still-valid token. Concurrent callers share one in-flight fetch.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Optional[str], Optional[str]], AccessToken],
+        expiry_margin: float = EXPIRY_MARGIN_SECONDS,
+        refresh_ahead: float = REFRESH_AHEAD_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._fetch = fetch
+        self._expiry_margin = expiry_margin
+        self._refresh_ahead = refresh_ahead
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens: Dict[Tuple, AccessToken] = {}
+        self._in_flight: Dict[Tuple, threading.Event] = {}
+        self._errors: Dict[Tuple, Exception] = {}
+
+    def get(self, dc: Optional[str] = None, key: Optional[str] = None) -> str:
+        cache_key = (dc, key)
+
+        # Only repeats when the token is invalidated while it is being fetched.
+        while True:
+            with self._lock:
+                now = self._clock()
+                token = self._tokens.get(cache_key)
+                if token and token.seconds_left(now) > self._expiry_margin:
+                    if (
+                        token.seconds_left(now) <= self._refresh_ahead
+                        and cache_key not in self._in_flight
+                    ):
+                        self._start_refresh(cache_key, background=True)
+                    return token.access_token
+
+                event = self._in_flight.get(cache_key)
+                if event is None:
+                    event = self._start_refresh(cache_key, background=False)
+                    owner = True
+                else:
+                    owner = False
+
+            if owner:
+                self._refresh(cache_key, event)
+            else:
+                event.wait()
+
+            with self._lock:
+                error = self._errors.get(cache_key)
+                token = self._tokens.get(cache_key)
+            if error is not None:
+                if token is not None and token.seconds_left(self._clock()) > 0:
+                    return token.access_token
+                raise error
+            if token is not None:
+                # Freshly fetched, even if it is already within the expiry
+                # margin: fetching again would not return a longer-lived one.
+                return token.access_token
+
+    def invalidate(self, dc: Optional[str] = None, key: Optional[str] = None):
+        with self._lock:
+            self._tokens.pop((dc, key), None)
+
+    def _start_refresh(self, cache_key: Tuple, background: bool) -> threading.Event:
+        # Must be called with self._lock held.
+        event = threading.Event()
+        self._in_flight[cache_key] = event
+        if background:
+            threading.Thread(
+                target=self._refresh, args=(cache_key, event), daemon=True
+            ).start()
+        return event
+
+    def _refresh(self, cache_key: Tuple, event: threading.Event):
+        try:
+            token = self._fetch(*cache_key)
+            with self._lock:
+                self._tokens[cache_key] = token
+                self._errors.pop(cache_key, None)
+        except Exception as ex:
+            with self._lock:
+                self._errors[cache_key] = ex
+        finally:
+            with self._lock:
+                self._in_flight.pop(cache_key, None)
+            event.set()
@@ -94,3 +94,99 @@ class ConvertedSpotifySearchResult(BaseModel):
             album_image=item.album.images[0].url if item.album.images else "",
             id=item.id,
         )
+
+    @classmethod
+    def from_raw_item(cls, item: Dict) -> "ConvertedSpotifySearchResult":
+        """Reads only the needed fields of a raw search item, skipping the
+        validation of the rest of it (markets, external ids, ...)."""
+        images = item["album"]["images"]
+        return cls(
+            track_name=item["name"],
+            artist=", ".join(artist["name"] for artist in item["artists"]),
+            album_image=images[0]["url"] if images else "",
+            id=item["id"],
+        )
+
+
+class ConvertedSpotifySearchPage(BaseModel):
+    """One page of track search results; ``next_offset`` is None on the last page."""
+
+    results: List[ConvertedSpotifySearchResult]
+    offset: int
+    total: int
+    next_offset: Optional[int] = None
+
+    @classmethod
+    def from_spotify_search_result(
+        cls, result: SpotifySearchResult
+    ) -> "ConvertedSpotifySearchPage":
+        tracks = result.tracks
+        items = tracks.items or []
+        return cls(
+            results=[
+                ConvertedSpotifySearchResult.from_spotify_search_result(item)
+                for item in items
+            ],
+            offset=tracks.offset,
+            total=tracks.total,
+            next_offset=tracks.offset + len(items) if tracks.next and items else None,
+        )
+
+    @classmethod
+    def from_dict(
+        cls, data: Dict, validate: bool = False
+    ) -> "ConvertedSpotifySearchPage":
+        """Converts a raw search response.
+
+        By default only the fields that are kept are read; ``validate=True``
+        validates the whole response against ``SpotifySearchResult`` first.
+        """
+        if validate:
+            return cls.from_spotify_search_result(SpotifySearchResult.from_dict(data))
+
+        tracks = data["tracks"]
+        items = tracks.get("items") or []
+        return cls(
+            results=[
+                ConvertedSpotifySearchResult.from_raw_item(item) for item in items
+            ],
+            offset=tracks["offset"],
+            total=tracks["total"],
+            next_offset=(
+                tracks["offset"] + len(items) if tracks.get("next") and items else None
+            ),
+        )
+
+
+class ConvertedSpotifyCollection(BaseModel):
+    """An album or artist offered for discography analysis."""
+
+    id: str
+    name: str
+    description: str
+    image: str
+
+    @classmethod
+    def from_album(cls, item: Dict) -> "ConvertedSpotifyCollection":
+        artist_names = [artist["name"] for artist in item.get("artists", [])]
+        return cls(
+            id=item["id"],
+            name=item["name"],
+            description=f"Album by {', '.join(artist_names)}",
+            image=item["images"][0]["url"] if item.get("images") else "",
+        )
+
+    @classmethod
+    def from_artist(cls, item: Dict) -> "ConvertedSpotifyCollection":
+        return cls(
+            id=item["id"],
+            name=item["name"],
+            description="Artist",
+            image=item["images"][0]["url"] if item.get("images") else "",
+        )
+
+
+class SpotifyTrackRef(BaseModel):
+    id: str
+    track_name: str
+    album: str = ""
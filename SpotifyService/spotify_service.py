@@ -1,23 +1,26 @@
+import contextvars
 import json
 import logging
 import os
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
-import requests
-import spotipy
-import streamlit as st
 from dotenv import load_dotenv
-from spotipy.oauth2 import SpotifyClientCredentials
-from streamlit.logger import get_logger
 
+import metrics
+from caching import Cache
+from scheduler import SCHEDULER, RequestScheduler
+from SpotifyService.access_token import AccessToken, AccessTokenCache
 from SpotifyService.schemas import (
     ConstructQueryInput,
+    ConvertedSpotifyCollection,
+    ConvertedSpotifySearchPage,
     ConvertedSpotifySearchResult,
-    SpotifySearchResult,
+    SpotifyTrackRef,
 )
 
-LOGGER = get_logger(__file__)
-LOGGER.setLevel(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -26,15 +29,34 @@ SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 ACCESS_TOKEN_URL = os.getenv("ACCESS_TOKEN_URL")
 
+SEARCH_PAGE_SIZE = 10
+# The search API rejects offsets beyond this.
+MAX_SEARCH_OFFSET = 1000
+
 
 class SpotifyService:
-    def __init__(self, client_id, client_secret):
+    def __init__(
+        self,
+        client_id,
+        client_secret,
+        cache: Optional[Cache] = None,
+        validate_responses: bool = False,
+        scheduler: RequestScheduler = SCHEDULER,
+    ):
+        # spotipy is imported here rather than at module level, so importing
+        # this module stays cheap for callers that never search.
+        import spotipy
+        from spotipy.oauth2 import SpotifyClientCredentials
+
         self.sp = spotipy.Spotify(
             auth_manager=SpotifyClientCredentials(
                 client_id=client_id,
                 client_secret=client_secret,
             )
         )
+        self.cache = cache
+        self.validate_responses = validate_responses
+        self.scheduler = scheduler
 
     def _construct_query(self, input_query: ConstructQueryInput) -> str:
         query_list = []
@@ -50,41 +72,224 @@ class SpotifyService:
 
         return query_string
 
-    def _convert_search_result(
-        self, result: SpotifySearchResult
-    ) -> List[ConvertedSpotifySearchResult]:
-        return [
-            ConvertedSpotifySearchResult.from_spotify_search_result(item)
-            for item in result.tracks.items
-        ]
+    def _normalize_query(self, input_query: ConstructQueryInput) -> str:
+        # Search is case-insensitive, so only the words matter for caching.
+        return self._construct_query(
+            ConstructQueryInput(
+                **{
+                    field: " ".join(value.lower().split()) if value else value
+                    for field, value in input_query.model_dump().items()
+                }
+            )
+        )
 
-    @st.cache_data
     def search(
-        _self, track: str = None, artist: str = None, album: str = None, limit: int = 10
+        self, track: str = None, artist: str = None, album: str = None, limit: int = 10
     ) -> List[ConvertedSpotifySearchResult]:
+        return self.search_page(track, artist, album, limit=limit).results
+
+    @metrics.timed("spotify.search")
+    def search_page(
+        self,
+        track: str = None,
+        artist: str = None,
+        album: str = None,
+        offset: int = 0,
+        limit: int = SEARCH_PAGE_SIZE,
+    ) -> ConvertedSpotifySearchPage:
         query_input = ConstructQueryInput(track=track, artist=artist, album=album)
-        query_string = _self._construct_query(query_input)
+        query_string = self._construct_query(query_input)
+        key = ("search", self._normalize_query(query_input), offset, limit)
+
+        def fetch():
+            raw_results = self.scheduler.run(
+                "search",
+                lambda: self._search(q=query_string, limit=limit, offset=offset),
+                key=key,
+            )
+            return ConvertedSpotifySearchPage.from_dict(
+                raw_results, validate=self.validate_responses
+            )
+
+        if self.cache is None:
+            return fetch()
+        return self.cache.get_or_compute(key, fetch)
+
+    def iter_search_pages(
+        self,
+        track: str = None,
+        artist: str = None,
+        album: str = None,
+        page_size: int = SEARCH_PAGE_SIZE,
+        max_results: int = 50,
+    ) -> Iterator[ConvertedSpotifySearchPage]:
+        """Yields search result pages, following the API's next offsets.
+
+        The next page is fetched in the background while the caller handles
+        the current one, in a copy of the caller's context so its request
+        priority and metrics trace still apply.
+        """
+        # Pages are fetched one at a time, so they can share the context.
+        fetch = partial(
+            contextvars.copy_context().run, self.search_page, track, artist, album
+        )
+        fetched = 0
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch, offset=0, limit=min(page_size, max_results))
+            try:
+                while future:
+                    page = future.result()
+                    fetched += len(page.results)
+                    future = None
+                    if (
+                        page.next_offset is not None
+                        and page.next_offset < MAX_SEARCH_OFFSET
+                        and fetched < max_results
+                    ):
+                        future = executor.submit(
+                            fetch,
+                            offset=page.next_offset,
+                            limit=min(page_size, max_results - fetched),
+                        )
+                    yield page
+            finally:
+                if future:
+                    future.cancel()
+
+    @metrics.timed("spotify.search_albums")
+    def search_albums(
+        self, album: str, artist: str = None, limit: int = 5
+    ) -> List[ConvertedSpotifyCollection]:
+        query_input = ConstructQueryInput(artist=artist, album=album)
+        raw_results = self.scheduler.run(
+            "search",
+            lambda: self._search(
+                q=self._construct_query(query_input), limit=limit, type="album"
+            ),
+        )
+        return [
+            ConvertedSpotifyCollection.from_album(item)
+            for item in raw_results["albums"]["items"]
+            if item
+        ]
+
+    @metrics.timed("spotify.search_artists")
+    def search_artists(
+        self, artist: str, limit: int = 5
+    ) -> List[ConvertedSpotifyCollection]:
+        query_input = ConstructQueryInput(artist=artist)
+        raw_results = self.scheduler.run(
+            "search",
+            lambda: self._search(
+                q=self._construct_query(query_input), limit=limit, type="artist"
+            ),
+        )
+        return [
+            ConvertedSpotifyCollection.from_artist(item)
+            for item in raw_results["artists"]["items"]
+            if item
+        ]
+
+    def _search(self, **kwargs) -> Dict:
+        try:
+            return self.sp.search(**kwargs)
+        except Exception as ex:
+            # spotipy's SpotifyException carries the response status.
+            metrics.upstream_error("search", getattr(ex, "http_status", None))
+            raise
+
+    def _catalog(self, key: Tuple, request: Callable[[], Dict]) -> Dict:
+        """Sends an album or track listing request through the scheduler."""
+
+        def send():
+            try:
+                return request()
+            except Exception as ex:
+                metrics.upstream_error("spotify", getattr(ex, "http_status", None))
+                raise
+
+        return self.scheduler.run("spotify", send, key=key)
+
+    def _paginate(self, page: Dict) -> Iterator[Dict]:
+        while page:
+            yield from page["items"]
+            next_url = page.get("next")
+            page = (
+                self._catalog(("next", next_url), partial(self.sp.next, page))
+                if next_url
+                else None
+            )
+
+    def iter_album_tracks(
+        self, album_id: str, album_name: str = ""
+    ) -> Iterator[SpotifyTrackRef]:
+        """Yields every track of an album, following pagination."""
+        first_page = self._catalog(
+            ("album_tracks", album_id),
+            lambda: self.sp.album_tracks(album_id, limit=50),
+        )
+        for item in self._paginate(first_page):
+            yield SpotifyTrackRef(
+                id=item["id"], track_name=item["name"], album=album_name
+            )
 
-        raw_results = _self.sp.search(q=query_string, limit=limit)
-        results = SpotifySearchResult.from_dict(raw_results)
+    def iter_artist_tracks(self, artist_id: str) -> Iterator[SpotifyTrackRef]:
+        """Yields the tracks of an artist's albums and singles.
 
-        return _self._convert_search_result(results)
+        The same song often appears on several releases (single, album,
+        deluxe edition), so tracks are deduplicated by name.
+        """
+        seen = set()
+        albums = self._catalog(
+            ("artist_albums", artist_id),
+            lambda: self.sp.artist_albums(
+                artist_id, include_groups="album,single", limit=50
+            ),
+        )
+        for album in self._paginate(albums):
+            for track in self.iter_album_tracks(album["id"], album["name"]):
+                name = track.track_name.lower()
+                if name not in seen:
+                    seen.add(name)
+                    yield track
 
+    @metrics.timed("spotify.access_token")
     def get_access(dc=None, key=None):
-        """Starts session to get access token."""
-        session = requests.Session()
+        """Returns a cached access token, fetching a new one only near expiry."""
+        return ACCESS_TOKEN_CACHE.get(dc, key)
+
+    def invalidate_access(dc=None, key=None):
+        """Drops the cached access token, e.g. after the API rejected it."""
+        ACCESS_TOKEN_CACHE.invalidate(dc, key)
+
 
+def fetch_access_token(dc=None, key=None) -> AccessToken:
+    """Starts session to get access token."""
+    import requests
+
+    with requests.Session() as session:
         cookies = {"sp_dc": dc, "sp_key": key}
         response = session.get(ACCESS_TOKEN_URL, cookies=cookies)
+        if response.status_code >= 400:
+            metrics.upstream_error("access_token", response.status_code)
         response.raise_for_status()
         data = response.content.decode("utf-8")
         config = json.loads(data)
 
-        access_token = config["accessToken"]
-        expires_timestamp = config["accessTokenExpirationTimestampMs"]
-        expiration_date = int(expires_timestamp) // 1000
+    access_token = config["accessToken"]
+    expires_timestamp = config["accessTokenExpirationTimestampMs"]
+    expiration_date = int(expires_timestamp) / 1000
+
+    return AccessToken(access_token=access_token, expires_at=expiration_date)
+
+
+def scheduled_fetch_access_token(dc=None, key=None) -> AccessToken:
+    return SCHEDULER.run(
+        "access_token", lambda: fetch_access_token(dc, key), key=(dc, key)
+    )
+
 
-        return access_token
+ACCESS_TOKEN_CACHE = AccessTokenCache(scheduled_fetch_access_token)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from SpotifyService.access_token import AccessToken, AccessTokenCache
+
+
+def test_token_is_reused_until_expiry(clock):
+    fetch = Mock(
+        return_value=AccessToken(access_token="abc", expires_at=clock.now + 3600)
+    )
+    cache = AccessTokenCache(fetch, clock=clock)
+
+    assert cache.get("dc", "key") == "abc"
+    assert cache.get("dc", "key") == "abc"
+    fetch.assert_called_once_with("dc", "key")
+
+
+def test_expired_token_is_refetched(clock):
+    fetch = Mock(
+        side_effect=[
+            AccessToken(access_token="old", expires_at=clock.now + 60),
+            AccessToken(access_token="new", expires_at=clock.now + 3600),
+        ]
+    )
+    cache = AccessTokenCache(fetch, expiry_margin=30, refresh_ahead=30, clock=clock)
+
+    assert cache.get() == "old"
+    clock.now += 45
+    assert cache.get() == "new"
+    assert fetch.call_count == 2
+
+
+def test_token_fetched_close_to_expiry_is_returned_once(clock):
+    fetch = Mock(return_value=AccessToken(access_token="abc", expires_at=clock.now))
+    cache = AccessTokenCache(fetch, clock=clock)
+
+    assert cache.get() == "abc"
+    fetch.assert_called_once_with(None, None)
+
+
+def test_invalidated_token_is_refetched(clock):
+    fetch = Mock(
+        side_effect=[
+            AccessToken(access_token="revoked", expires_at=clock.now + 3600),
+            AccessToken(access_token="fresh", expires_at=clock.now + 3600),
+        ]
+    )
+    cache = AccessTokenCache(fetch, clock=clock)
+
+    assert cache.get("dc", "key") == "revoked"
+    cache.invalidate("dc", "key")
+    assert cache.get("dc", "key") == "fresh"
+
+
+def test_refresh_ahead_runs_in_background(clock):
+    refreshed = threading.Event()
+
+    def fetch(dc, key):
+        if fetch.calls:
+            refreshed.set()
+            return AccessToken(access_token="new", expires_at=clock.now + 3600)
+        fetch.calls += 1
+        return AccessToken(access_token="old", expires_at=clock.now + 600)
+
+    fetch.calls = 0
+    cache = AccessTokenCache(fetch, expiry_margin=30, refresh_ahead=300, clock=clock)
+
+    assert cache.get() == "old"
+    clock.now += 400
+    # Still valid, so the stale token is served while the refresh runs.
+    assert cache.get() == "old"
+    assert refreshed.wait(timeout=2)
+    time.sleep(0.05)
+    assert cache.get() == "new"
+
+
+def test_concurrent_callers_share_one_fetch():
+    release = threading.Event()
+    calls = []
+
+    def fetch(dc, key):
+        calls.append((dc, key))
+        release.wait(timeout=2)
+        return AccessToken(access_token="shared", expires_at=time.time() + 3600)
+
+    cache = AccessTokenCache(fetch)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("dc", "key")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["shared"] * 8
+    assert len(calls) == 1
+
+
+def test_fetch_error_is_raised_without_valid_token():
+    fetch = Mock(side_effect=RuntimeError("boom"))
+    cache = AccessTokenCache(fetch)
+
+    with pytest.raises(RuntimeError):
+        cache.get()
@@ -15,3 +15,69 @@ CONSTRUCT_QUERY_TEST_CASES = [
     ({"track": "Yesterday"}, "track:Yesterday"),
     ({}, ""),
 ]
+
+
+def make_artist(index):
+    return {
+        "external_urls": {"spotify": f"https://open.spotify.com/artist/{index}"},
+        "href": f"https://api.spotify.com/v1/artists/{index}",
+        "id": f"artist{index}",
+        "name": f"Artist {index}",
+        "type": "artist",
+        "uri": f"spotify:artist:{index}",
+    }
+
+
+def make_track(track_id):
+    return {
+        "album": {
+            "album_type": "album",
+            "artists": [make_artist(0)],
+            "available_markets": ["US", "GB", "KR"],
+            "external_urls": {"spotify": f"https://open.spotify.com/album/{track_id}"},
+            "href": f"https://api.spotify.com/v1/albums/{track_id}",
+            "id": f"album-{track_id}",
+            "images": [
+                {"height": 640, "width": 640, "url": f"https://i.scdn.co/{track_id}"}
+            ],
+            "name": f"Album {track_id}",
+            "release_date": "2015-10-23",
+            "release_date_precision": "day",
+            "total_tracks": 11,
+            "type": "album",
+            "uri": f"spotify:album:{track_id}",
+        },
+        "artists": [make_artist(0), make_artist(1)],
+        "available_markets": ["US", "GB", "KR"],
+        "disc_number": 1,
+        "duration_ms": 295502,
+        "explicit": False,
+        "external_ids": {"isrc": "GBBKS1500214"},
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+        "href": f"https://api.spotify.com/v1/tracks/{track_id}",
+        "id": track_id,
+        "is_local": False,
+        "name": f"Track {track_id}",
+        "popularity": 80,
+        "preview_url": None,
+        "track_number": 1,
+        "type": "track",
+        "uri": f"spotify:track:{track_id}",
+    }
+
+
+def make_search_response(track_ids, offset=0, total=None):
+    """A raw track search response, as returned by the Web API."""
+    total = offset + len(track_ids) if total is None else total
+    has_next = offset + len(track_ids) < total
+    return {
+        "tracks": {
+            "href": f"https://api.spotify.com/v1/search?offset={offset}",
+            "items": [make_track(track_id) for track_id in track_ids],
+            "limit": len(track_ids),
+            "next": "https://api.spotify.com/v1/search?next" if has_next else None,
+            "offset": offset,
+            "previous": None,
+            "total": total,
+        }
+    }
@@ -1,10 +1,16 @@
+import threading
+
 import pytest
 from unittest.mock import Mock, patch
-from SpotifyService.schemas import ConstructQueryInput
+from pydantic import ValidationError
+import metrics
+from caching import LRUCache
+from scheduler import RequestScheduler
+from SpotifyService.schemas import ConstructQueryInput, ConvertedSpotifySearchPage
 from SpotifyService.spotify_service import (
     SpotifyService,
 )
-from SpotifyService.test_data import CONSTRUCT_QUERY_TEST_CASES
+from SpotifyService.test_data import CONSTRUCT_QUERY_TEST_CASES, make_search_response
 
 
 @pytest.fixture
@@ -12,8 +18,8 @@ def spotify_service():
     return SpotifyService("dummy_client_id", "dummy_client_secret")
 
 
-@patch("SpotifyService.spotify_service.spotipy.Spotify")
-@patch("SpotifyService.spotify_service.SpotifyClientCredentials")
+@patch("spotipy.Spotify")
+@patch("spotipy.oauth2.SpotifyClientCredentials")
 def test_spotify_service_initialization(mock_credentials, mock_spotify):
     client_id = "test_client_id"
     client_secret = "test_client_secret"
@@ -49,3 +55,163 @@ def test_construct_query_extra_spaces(spotify_service):
     input_query = ConstructQueryInput(track="  Shape of You  ", artist="  Ed Sheeran  ")
     query = spotify_service._construct_query(input_query)
     assert query == "track:  Shape of You   artist:  Ed Sheeran  "
+
+
+def test_iter_album_tracks_follows_pagination(spotify_service):
+    first_page = {"items": [{"id": "1", "name": "One"}], "next": "page-2"}
+    second_page = {"items": [{"id": "2", "name": "Two"}], "next": None}
+    spotify_service.sp = Mock()
+    spotify_service.sp.album_tracks.return_value = first_page
+    spotify_service.sp.next.return_value = second_page
+
+    tracks = list(spotify_service.iter_album_tracks("album", "Album"))
+
+    assert [track.id for track in tracks] == ["1", "2"]
+    assert tracks[0].album == "Album"
+    spotify_service.sp.next.assert_called_once_with(first_page)
+
+
+def test_iter_artist_tracks_deduplicates_by_name(spotify_service):
+    spotify_service.sp = Mock()
+    spotify_service.sp.artist_albums.return_value = {
+        "items": [{"id": "single", "name": "Hit"}, {"id": "album", "name": "LP"}],
+        "next": None,
+    }
+    spotify_service.sp.album_tracks.side_effect = [
+        {"items": [{"id": "1", "name": "Hit"}], "next": None},
+        {"items": [{"id": "2", "name": "hit"}, {"id": "3", "name": "B-side"}]},
+    ]
+
+    tracks = list(spotify_service.iter_artist_tracks("artist"))
+
+    assert [track.id for track in tracks] == ["1", "3"]
+
+
+def test_catalog_requests_go_through_the_scheduler():
+    scheduler = RequestScheduler()
+    spotify_service = SpotifyService("id", "secret", scheduler=scheduler)
+    spotify_service.sp = Mock()
+    spotify_service.sp.artist_albums.return_value = {
+        "items": [{"id": "album", "name": "LP"}],
+        "next": "albums-2",
+    }
+    spotify_service.sp.next.return_value = {"items": [], "next": None}
+    spotify_service.sp.album_tracks.return_value = {
+        "items": [{"id": "1", "name": "One"}],
+        "next": None,
+    }
+
+    list(spotify_service.iter_artist_tracks("artist"))
+
+    assert scheduler.counters["spotify", "requests"] == 3
+
+
+def test_search_uses_pluggable_cache():
+    spotify_service = SpotifyService("id", "secret", cache=LRUCache(maxsize=4))
+    spotify_service.sp = Mock()
+    spotify_service.sp.search.return_value = make_search_response([])
+
+    spotify_service.search(track="Hello")
+    spotify_service.search(track="Hello")
+    spotify_service.search(track="Hello", artist="Adele")
+
+    assert spotify_service.sp.search.call_count == 2
+
+
+def test_search_cache_key_is_the_normalized_query():
+    spotify_service = SpotifyService("id", "secret", cache=LRUCache(maxsize=4))
+    spotify_service.sp = Mock()
+    spotify_service.sp.search.return_value = make_search_response(["a"])
+
+    spotify_service.search(track="Hello", artist="Adele")
+    spotify_service.search(track="  hello ", artist="ADELE")
+
+    assert spotify_service.sp.search.call_count == 1
+
+
+def test_iter_search_pages_follows_next_offsets():
+    pages = {
+        0: make_search_response(["a", "b"], offset=0, total=5),
+        2: make_search_response(["c", "d"], offset=2, total=5),
+        4: make_search_response(["e"], offset=4, total=5),
+    }
+    spotify_service = SpotifyService("id", "secret", cache=LRUCache(maxsize=8))
+    spotify_service.sp = Mock()
+    spotify_service.sp.search.side_effect = lambda q, limit, offset: pages[offset]
+
+    result_pages = list(spotify_service.iter_search_pages(track="x", page_size=2))
+
+    assert [[r.id for r in page.results] for page in result_pages] == [
+        ["a", "b"],
+        ["c", "d"],
+        ["e"],
+    ]
+    assert result_pages[-1].next_offset is None
+    # Pages are cached, so walking the results again makes no requests.
+    list(spotify_service.iter_search_pages(track="x", page_size=2))
+    assert spotify_service.sp.search.call_count == 3
+
+
+def test_iter_search_pages_prefetches_the_next_page():
+    requested = threading.Event()
+
+    def search(q, limit, offset):
+        if offset:
+            requested.set()
+            return make_search_response(["b"], offset=offset, total=2)
+        return make_search_response(["a"], total=2)
+
+    spotify_service = SpotifyService("id", "secret")
+    spotify_service.sp = Mock()
+    spotify_service.sp.search.side_effect = search
+
+    pages = spotify_service.iter_search_pages(track="x", page_size=1)
+    next(pages)
+    # The second page is requested before the caller asks for it.
+    assert requested.wait(timeout=2)
+    assert [result.id for result in next(pages).results] == ["b"]
+
+
+def test_iter_search_pages_stops_at_max_results():
+    spotify_service = SpotifyService("id", "secret")
+    spotify_service.sp = Mock()
+    spotify_service.sp.search.side_effect = lambda q, limit, offset: (
+        make_search_response([f"{offset + i}" for i in range(limit)], offset, 100)
+    )
+
+    pages = list(spotify_service.iter_search_pages(page_size=10, max_results=25))
+
+    assert sum(len(page.results) for page in pages) == 25
+    assert spotify_service.sp.search.call_args.kwargs["limit"] == 5
+
+
+def test_fast_search_parsing_matches_full_validation():
+    raw = make_search_response(["a", "b"], offset=10, total=30)
+
+    fast = ConvertedSpotifySearchPage.from_dict(raw)
+
+    assert fast == ConvertedSpotifySearchPage.from_dict(raw, validate=True)
+    assert fast.results[0].artist == "Artist 0, Artist 1"
+    assert fast.next_offset == 12
+
+
+def test_full_validation_on_demand():
+    raw = make_search_response(["a"])
+    del raw["tracks"]["items"][0]["album"]["release_date"]
+
+    assert ConvertedSpotifySearchPage.from_dict(raw).results[0].id == "a"
+    with pytest.raises(ValidationError):
+        ConvertedSpotifySearchPage.from_dict(raw, validate=True)
+
+
+def test_background_search_pages_are_traced():
+    spotify_service = SpotifyService("id", "secret")
+    spotify_service.sp = Mock()
+    spotify_service.sp.search.side_effect = lambda q, limit, offset: (
+        make_search_response(["a", "b"], offset=offset, total=4)
+    )
+
+    with metrics.trace() as stages:
+        list(spotify_service.iter_search_pages(track="x", page_size=2))
+
+    assert [stage for stage, _ in stages] == ["spotify.search", "spotify.search"]
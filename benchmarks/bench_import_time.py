@@ -0,0 +1,53 @@
+"""Reports cumulative import time of the app modules and their heavy dependencies.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``.
+Run with ``python -m benchmarks.bench_import_time``.
+"""
+
+import subprocess
+import sys
+from typing import Tuple
+
+APP_MODULES = [
+    "text_analysis",
+    "lyrics_analysis",
+    "SpotifyService.spotify_service",
+    "lyrics_service",
+    "cli",
+]
+HEAVY_MODULES = ["streamlit", "lingua", "matplotlib.pyplot", "wordcloud", "spotipy"]
+
+# Modules that importing the analysis core must not pull in.
+LAZY_DEPENDENCIES = ("streamlit", "lingua", "matplotlib", "wordcloud", "spotipy")
+
+
+def import_time(module: str) -> Tuple[float, set]:
+    """Returns the cumulative import time in seconds and the heavy modules loaded."""
+    code = (
+        f"import {module}, sys;"
+        f"print(','.join(m for m in {LAZY_DEPENDENCIES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = 0
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1])
+    loaded = set(filter(None, result.stdout.strip().split(",")))
+    return cumulative / 1e6, loaded
+
+
+def main():
+    print(f"{'module':<34}{'import (ms)':>12}  heavy modules loaded")
+    for module in APP_MODULES + HEAVY_MODULES:
+        seconds, loaded = import_time(module)
+        print(f"{module:<34}{seconds * 1000:>12.0f}  {', '.join(sorted(loaded))}")
+
+
+if __name__ == "__main__":
+    main()
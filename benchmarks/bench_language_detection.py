@@ -0,0 +1,57 @@
+"""Measures build latency, memory and per-song detection time of lingua detectors.
+
+Each configuration runs in a fresh interpreter so resident memory is not
+shared between measurements. Run with
+``python -m benchmarks.bench_language_detection``.
+"""
+
+import json
+import subprocess
+import sys
+
+CONFIGURATIONS = ["en,ko,ja,zh,de,es,fr,pt,it", "all"]
+
+SCRIPT = """
+import json, resource, sys, time
+from benchmarks.corpus import make_lyrics
+from language_detection import build_detector, language_percentages
+
+def rss_mb():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+
+languages = sys.argv[1]
+lines = make_lyrics(lines=60, multilingual=True).split("\\n")
+before = rss_mb()
+start = time.perf_counter()
+detector = build_detector(languages, preload=True)
+build = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(5):
+    language_percentages(lines, detector)
+detect = (time.perf_counter() - start) / 5
+memory = rss_mb() - before
+print(json.dumps({"build_s": build, "detect_ms": detect * 1000, "rss_mb": memory}))
+"""
+
+
+def main():
+    print(
+        f"{'languages':<30}{'build (s)':>12}{'detect/song (ms)':>18}{'memory (MB)':>14}"
+    )
+    for languages in CONFIGURATIONS:
+        output = subprocess.run(
+            [sys.executable, "-c", SCRIPT, languages],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output)
+        print(
+            f"{languages:<30}{result['build_s']:>12.2f}"
+            f"{result['detect_ms']:>18.1f}{result['rss_mb']:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
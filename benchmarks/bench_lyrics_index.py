@@ -0,0 +1,75 @@
+"""Query latency of the persistent inverted lyrics index.
+
+Indexes synthetic songs into a temporary SQLite file, then times word and
+phrase queries. The shared synthetic vocabulary is tiny, so every common
+word is in nearly every song: "common" queries are the worst case. Each
+song also gets a few words from a long-tail vocabulary, like real lyrics.
+Run with ``python -m benchmarks.bench_lyrics_index [songs]``.
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import make_lyrics
+from lyrics_index import LyricsIndex
+from phrases import tokenize
+
+LONG_TAIL_WORDS = 200_000
+
+
+def make_song(seed: int) -> str:
+    rng = random.Random(seed)
+    rare = " ".join(f"w{rng.randrange(LONG_TAIL_WORDS)}" for _ in range(8))
+    return make_lyrics(lines=40, seed=seed) + "\n" + rare
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return (
+        statistics.median(timings) * 1000,
+        timings[int(len(timings) * 0.95)] * 1000,
+    )
+
+
+def main(songs: int = 20_000, queries: int = 200):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        index = LyricsIndex(os.path.join(directory, "index.sqlite3"))
+
+        start = time.perf_counter()
+        for seed in range(songs):
+            index.add_text(f"track{seed}", make_song(seed))
+        index.flush()
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(index.path) / 2**20
+        print(f"indexed {songs} songs in {elapsed:.1f} s ({songs / elapsed:.0f}/s)")
+
+        index.compact()
+        compacted = os.path.getsize(index.path) / 2**20
+        print(f"file size {size:.1f} MB, {compacted:.1f} MB after compaction")
+
+        samples = [tokenize(make_song(rng.randrange(songs))) for _ in range(queries)]
+        cases = {
+            "common word": lambda words: index.songs_repeating(words[0]),
+            "rare word": lambda words: index.songs_repeating(words[-1]),
+            "common phrase": lambda words: index.songs_sharing(" ".join(words[:3])),
+            "rare phrase": lambda words: index.songs_sharing(" ".join(words[-3:])),
+        }
+        print(f"{'query':<16}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+        for name, query in cases.items():
+            timings = []
+            for words in samples:
+                start = time.perf_counter()
+                query(words)
+                timings.append(time.perf_counter() - start)
+            p50, p95 = percentiles(timings)
+            print(f"{name:<16}{p50:>10.2f}{p95:>10.2f}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,57 @@
+"""Compares the suffix-array phrase engine with a naive all-n-grams Counter.
+
+Run with ``python -m benchmarks.bench_phrases``.
+"""
+
+import timeit
+from collections import Counter
+
+from benchmarks.corpus import make_lyrics
+from phrases import MAX_PHRASE_LENGTH, MIN_PHRASE_LENGTH, find_repeated_ngrams, tokenize
+
+
+def naive_repeated_ngrams(
+    words, min_length=MIN_PHRASE_LENGTH, max_length=MAX_PHRASE_LENGTH
+):
+    """Counts every n-gram, then drops those contained in an equally frequent longer one."""
+    counts = Counter(
+        tuple(words[start : start + size])
+        for size in range(min_length, max_length + 1)
+        for start in range(len(words) - size + 1)
+    )
+    repeated = sorted(
+        ((phrase, count) for phrase, count in counts.items() if count > 1),
+        key=lambda item: -len(item[0]),
+    )
+    kept = []
+    for phrase, count in repeated:
+        joined = f" {' '.join(phrase)} "
+        if not any(count <= c and joined in f" {' '.join(p)} " for p, c in kept):
+            kept.append((phrase, count))
+    return kept
+
+
+CASES = {
+    "short": tokenize(make_lyrics(lines=40)),
+    "long": tokenize(make_lyrics(lines=400)),
+    "very long": tokenize(make_lyrics(lines=1500)),
+}
+
+
+def main(number: int = 3):
+    print(f"{'case':<12}{'words':>8}{'naive (ms)':>14}{'suffix array (ms)':>20}")
+    for name, words in CASES.items():
+        naive = min(
+            timeit.repeat(lambda: naive_repeated_ngrams(words), number=number, repeat=3)
+        )
+        current = min(
+            timeit.repeat(lambda: find_repeated_ngrams(words), number=number, repeat=3)
+        )
+        print(
+            f"{name:<12}{len(words):>8}{naive / number * 1000:>14.1f}"
+            f"{current / number * 1000:>20.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""End-to-end benchmark of the fetch-analyze-render pipeline on recorded fixtures.
+
+``fixtures/search.json`` is a recorded track search response and
+``fixtures/lyrics/<track id>.json`` are lyrics responses for a short pop
+song, a long rap song, a CJK-mixed song and an instrumental (``♪``) track.
+Search is replayed in process and lyrics are served by the local stub
+server, so every stage runs the real code without network access.
+
+Reports per-stage latency percentiles, peak memory and throughput::
+
+    python -m benchmarks.bench_pipeline --save-baseline baseline.json
+    python -m benchmarks.bench_pipeline --compare baseline.json
+
+A comparison run exits with status 1 when a stage got slower, throughput
+dropped or peak memory grew by more than ``--tolerance``.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+from benchmarks.stub_server import RateLimitedServer
+from http_client import HttpClient
+from lyrics_service import LyricsService
+from scheduler import RequestScheduler
+from SpotifyService.spotify_service import SpotifyService
+from word_cloud import render_png
+
+FIXTURES = Path(__file__).parent / "fixtures"
+STAGES = [
+    "search",
+    "get_lyrics",
+    "combined_lyrics",
+    "find_repeated_phrases",
+    "count_most_common",
+    "create_word_cloud",
+]
+# Stages this much faster than a millisecond are too noisy to compare.
+MIN_DELTA_MS = 0.2
+UNLIMITED = {"lyrics": (1e9, 10**9), "search": (1e9, 10**9)}
+
+
+def load_fixtures():
+    search = json.loads((FIXTURES / "search.json").read_text(encoding="utf-8"))
+    lyrics = {
+        path.stem: json.loads(path.read_text(encoding="utf-8"))
+        for path in sorted((FIXTURES / "lyrics").glob("*.json"))
+    }
+    return search, lyrics
+
+
+class RecordedSpotify:
+    """Stands in for the spotipy client, replaying a recorded search."""
+
+    def __init__(self, search_response: dict):
+        self.search_response = search_response
+
+    def search(self, q, limit=10, offset=0, type="track"):
+        return self.search_response
+
+
+@contextmanager
+def replay(search_response: dict, lyrics: Dict[str, dict]):
+    """Yields a SpotifyService and a LyricsService wired to the fixtures."""
+    server = RateLimitedServer(rate=1e9, burst=10**9, latency=0, responses=lyrics)
+    access = patch.object(SpotifyService, "get_access", return_value="replayed-token")
+    with server, access, patch("lyrics_service.LYRICS_URL", server.url):
+        scheduler = RequestScheduler(rates=UNLIMITED)
+        spotify = SpotifyService("replay", "replay", scheduler=scheduler)
+        spotify.sp = RecordedSpotify(search_response)
+        lyrics_service = LyricsService(http_client=HttpClient(), scheduler=scheduler)
+        try:
+            yield spotify, lyrics_service
+        finally:
+            lyrics_service.http_client.close()
+
+
+def run_once(spotify: SpotifyService, lyrics_service: LyricsService, timings=None):
+    def timed(stage, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        if timings is not None:
+            timings[stage].append(time.perf_counter() - start)
+        return result
+
+    results = timed("search", spotify.search, track="recorded")
+    for result in results:
+        response = timed("get_lyrics", lyrics_service.get_lyrics, result.id)
+        lyrics = timed("combined_lyrics", lyrics_service.combined_lyrics, response)
+        timed("find_repeated_phrases", lyrics_service.find_repeated_phrases, lyrics)
+        _, most_common, _, _, _ = timed(
+            "count_most_common",
+            lyrics_service.count_most_common,
+            "\n".join(lyrics.values()),
+        )
+        timed("create_word_cloud", render_png, dict(most_common))
+    return len(results)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[
+        min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    ]
+
+
+def run(iterations: int = 20) -> dict:
+    search_response, lyrics = load_fixtures()
+    with replay(search_response, lyrics) as (spotify, lyrics_service):
+        # Warm up: font loading, connection pool, first imports.
+        run_once(spotify, lyrics_service)
+
+        timings = defaultdict(list)
+        tracks = 0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            tracks += run_once(spotify, lyrics_service, timings)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        run_once(spotify, lyrics_service)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    stages = {}
+    for stage in STAGES:
+        values = sorted(timings[stage])
+        stages[stage] = {
+            "count": len(values),
+            "p50_ms": round(statistics.median(values) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+    return {
+        "iterations": iterations,
+        "tracks": tracks,
+        "tracks_per_second": round(tracks / elapsed, 2),
+        "peak_memory_mb": round(peak / 2**20, 2),
+        "stages": stages,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.25) -> List[str]:
+    """Describes every metric that regressed by more than ``tolerance``."""
+    regressions = []
+    for stage, metrics in baseline["stages"].items():
+        for name in ("p50_ms", "p95_ms"):
+            before = metrics[name]
+            after = current["stages"][stage][name]
+            if after > before * (1 + tolerance) and after - before > MIN_DELTA_MS:
+                regressions.append(f"{stage} {name}: {before} -> {after}")
+
+    before, after = baseline["tracks_per_second"], current["tracks_per_second"]
+    if after < before * (1 - tolerance):
+        regressions.append(f"tracks_per_second: {before} -> {after}")
+    before, after = baseline["peak_memory_mb"], current["peak_memory_mb"]
+    if after > before * (1 + tolerance):
+        regressions.append(f"peak_memory_mb: {before} -> {after}")
+    return regressions
+
+
+def print_report(report: dict):
+    print(
+        f"{report['tracks']} tracks, {report['tracks_per_second']} tracks/s, "
+        f"peak memory {report['peak_memory_mb']} MB"
+    )
+    print(f"{'stage':<24}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}")
+    for stage, metrics in report["stages"].items():
+        print(
+            f"{stage:<24}{metrics['p50_ms']:>10.3f}"
+            f"{metrics['p95_ms']:>10.3f}{metrics['p99_ms']:>10.3f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--save-baseline", help="write the report to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    report = run(args.iterations)
+    print_report(report)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2) + "\n")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(baseline, report, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
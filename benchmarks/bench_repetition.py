@@ -0,0 +1,29 @@
+"""Measures the per-song cost of the repetition metrics.
+
+Run with ``python -m benchmarks.bench_repetition``.
+"""
+
+import timeit
+
+from benchmarks.corpus import make_lyrics
+from repetition import repetition_stats
+
+CASES = {
+    "short": make_lyrics(lines=40).split("\n"),
+    "long": make_lyrics(lines=400).split("\n"),
+    "multilingual": make_lyrics(lines=120, multilingual=True).split("\n"),
+}
+
+
+def main(number: int = 200):
+    print(f"{'case':<16}{'lines':>8}{'ms / song':>12}{'songs / s':>12}")
+    for name, lines in CASES.items():
+        seconds = min(
+            timeit.repeat(lambda: repetition_stats(lines), number=number, repeat=3)
+        )
+        per_song = seconds / number
+        print(f"{name:<16}{len(lines):>8}{per_song * 1000:>12.3f}{1 / per_song:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Throughput and tail latency against a rate-limited stub of the lyrics API.
+
+Compares uncoordinated requests (each retrying on 429 with ``Retry-After``)
+with requests going through the shared scheduler, whose rate is set just
+below the server's. Run with ``python -m benchmarks.bench_scheduler``.
+"""
+
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_server import RateLimitedServer
+from http_client import HttpClient
+from scheduler import RequestScheduler
+
+SERVER_RATE = 50.0
+SERVER_BURST = 10
+
+
+def run(scheduler, requests: int, workers: int):
+    with RateLimitedServer(rate=SERVER_RATE, burst=SERVER_BURST) as server:
+        client = HttpClient(max_per_host=workers, max_retries=8, max_backoff=2.0)
+        latencies = []
+
+        def fetch(index):
+            start = time.perf_counter()
+            get = lambda: client.get(f"{server.url}{index}").status_code
+            status = scheduler.run("lyrics", get) if scheduler else get()
+            latencies.append(time.perf_counter() - start)
+            return status
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            statuses = list(executor.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - start
+        client.close()
+        counts = dict(server.counts)
+
+    latencies.sort()
+    return {
+        "ok": statuses.count(200),
+        "429s": counts.get(429, 0),
+        "per_second": requests / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+def main(requests: int = 300, workers: int = 16):
+    print(f"{requests} requests, {workers} workers, server limit {SERVER_RATE:.0f}/s")
+    print(f"{'':<14}{'ok':>6}{'429s':>7}{'req/s':>8}{'p50 (ms)':>10}{'p99 (ms)':>10}")
+    for name, scheduler in [
+        ("uncoordinated", None),
+        ("scheduler", RequestScheduler(rates={"lyrics": (SERVER_RATE * 0.95, 5)})),
+    ]:
+        result = run(scheduler, requests, workers)
+        print(
+            f"{name:<14}{result['ok']:>6}{result['429s']:>7}"
+            f"{result['per_second']:>8.1f}{result['p50']:>10.0f}{result['p99']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
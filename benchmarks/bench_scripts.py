@@ -0,0 +1,69 @@
+"""Compares script counting: the three regex scans over the lyrics, the
+per-character range scan over the vocabulary, and the lookup table.
+
+Run with ``python -m benchmarks.bench_scripts``.
+"""
+
+import random
+import re
+import timeit
+
+from benchmarks import legacy
+from benchmarks.corpus import make_lyrics
+from text_analysis import count_scripts, count_words
+
+PATTERNS = (
+    re.compile(r"[\uac00-\ud7af]"),
+    re.compile(r"[\u4e00-\u9fff]"),
+    re.compile(r"[\u3040-\u309f\u30a0-\u30ff]"),
+)
+
+
+def regex_scans(lyrics: str):
+    return [len(pattern.findall(lyrics)) for pattern in PATTERNS]
+
+
+def wide_vocabulary(words: int = 5000, seed: int = 0) -> str:
+    """Lyrics where almost every word is new, in several scripts."""
+    rng = random.Random(seed)
+    ranges = [(0xAC00, 0xD7A3), (0x4E00, 0x9FFF), (0x3041, 0x3096), (0x0430, 0x044F)]
+    tokens = []
+    for _ in range(words):
+        start, end = rng.choice(ranges)
+        tokens.append(
+            "".join(chr(rng.randint(start, end)) for _ in range(rng.randint(2, 6)))
+        )
+    return " ".join(tokens)
+
+
+CASES = {
+    "multilingual": make_lyrics(lines=120, multilingual=True),
+    "long multilingual": make_lyrics(lines=1200, multilingual=True),
+    "wide vocabulary": wide_vocabulary(),
+}
+
+
+def main(number: int = 50):
+    print(
+        f"{'case':<20}{'regex (ms)':>12}{'per char (ms)':>15}"
+        f"{'table (ms)':>12}{'vs regex':>10}{'vs per char':>13}"
+    )
+    for name, lyrics in CASES.items():
+        counter = count_words(lyrics)
+        timings = [
+            min(timeit.repeat(run, number=number, repeat=3)) / number * 1000
+            for run in (
+                lambda: regex_scans(lyrics),
+                lambda: legacy.count_scripts(counter),
+                lambda: count_scripts(counter),
+            )
+        ]
+        regex, per_char, table = timings
+        print(
+            f"{name:<20}{regex:>12.3f}{per_char:>15.3f}{table:>12.3f}"
+            f"{regex / table:>9.1f}x{per_char / table:>12.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
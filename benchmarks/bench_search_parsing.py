@@ -0,0 +1,77 @@
+"""Compares full pydantic validation of search responses with the fast path.
+
+Responses are built like recorded Web API responses, with ~180 available
+markets per track and album. Run with
+``python -m benchmarks.bench_search_parsing``.
+"""
+
+import timeit
+import tracemalloc
+
+from SpotifyService.schemas import ConvertedSpotifySearchPage
+from SpotifyService.test_data import make_search_response
+
+MARKETS = [
+    f"{first}{second}" for first in "ABCDEFGHIJKLMN" for second in "ABCDEFGHIJKLM"
+][:180]
+
+
+def make_page(offset: int, size: int, total: int) -> dict:
+    response = make_search_response(
+        [f"track{offset + index}" for index in range(size)], offset, total
+    )
+    for item in response["tracks"]["items"]:
+        item["available_markets"] = list(MARKETS)
+        item["album"]["available_markets"] = list(MARKETS)
+    return response
+
+
+CASES = {
+    "10 items": [make_page(0, 10, 10)],
+    "50 items": [make_page(0, 50, 50)],
+    "1000 items (20 pages)": [
+        make_page(offset, 50, 1000) for offset in range(0, 1000, 50)
+    ],
+}
+
+
+def parse(pages, validate):
+    return [
+        ConvertedSpotifySearchPage.from_dict(page, validate=validate) for page in pages
+    ]
+
+
+def peak_allocations(pages, validate) -> float:
+    tracemalloc.start()
+    parse(pages, validate)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main(repeat: int = 5):
+    print(
+        f"{'case':<24}{'full (ms)':>11}{'fast (ms)':>11}"
+        f"{'full peak (KiB)':>17}{'fast peak (KiB)':>17}"
+    )
+    for name, pages in CASES.items():
+        number = max(1, 200 // len(pages))
+        timings = [
+            min(
+                timeit.repeat(
+                    lambda: parse(pages, validate), number=number, repeat=repeat
+                )
+            )
+            / number
+            * 1000
+            for validate in (True, False)
+        ]
+        peaks = [peak_allocations(pages, validate) for validate in (True, False)]
+        print(
+            f"{name:<24}{timings[0]:>11.3f}{timings[1]:>11.3f}"
+            f"{peaks[0]:>17.1f}{peaks[1]:>17.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Compares text_analysis.analyze_text with the previous multi-pass counter.
+
+Run with ``python -m benchmarks.bench_text_analysis``.
+"""
+
+import timeit
+
+from benchmarks.corpus import make_lyrics
+from benchmarks.legacy import count_most_common
+from text_analysis import analyze_text
+
+CASES = {
+    "short": make_lyrics(lines=40),
+    "long": make_lyrics(lines=400),
+    "multilingual": make_lyrics(lines=120, multilingual=True),
+    "long multilingual": make_lyrics(lines=1200, multilingual=True),
+}
+
+
+def main(number: int = 200):
+    print(f"{'case':<20}{'legacy (ms)':>14}{'single pass (ms)':>20}{'speedup':>10}")
+    for name, lyrics in CASES.items():
+        legacy = min(
+            timeit.repeat(lambda: count_most_common(lyrics), number=number, repeat=3)
+        )
+        current = min(
+            timeit.repeat(lambda: analyze_text(lyrics), number=number, repeat=3)
+        )
+        print(
+            f"{name:<20}{legacy / number * 1000:>14.3f}"
+            f"{current / number * 1000:>20.3f}{legacy / current:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Compares dict-of-strings lyrics storage with the array-backed token corpus.
+
+Builds a corpus of synthetic songs both ways, then counts words per song,
+unique words per song and corpus-wide word counts. Then aggregates a
+discography track by track, summarizing after each one as the Discography
+page does, with ``discography.DiscographyAggregator`` and the Counter-based
+aggregator it replaced. Run with
+``python -m benchmarks.bench_token_arrays [songs] [tracks]``.
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+from benchmarks.corpus import make_lyrics
+from benchmarks.legacy import CounterAggregator
+from discography import DiscographyAggregator
+from lyrics_analysis import combined_lyrics
+from SpotifyService.schemas import SpotifyTrackRef
+from text_analysis import count_words
+from token_arrays import TokenCorpus, unique_word_ids, word_counts
+
+
+def make_responses(songs: int):
+    for seed in range(songs):
+        lines = make_lyrics(lines=60, multilingual=seed % 5 == 0, seed=seed)
+        yield {"lyrics": {"lines": [{"words": line} for line in lines.split("\n")]}}
+
+
+def dict_of_strings(responses):
+    corpus = [combined_lyrics(response) for response in responses]
+    totals = Counter()
+    for lyrics in corpus:
+        counts = count_words("\n".join(lyrics.values()))
+        [word for word, count in counts.items() if count == 1]
+        totals.update(counts)
+    return corpus, totals
+
+
+def token_arrays(responses):
+    corpus = TokenCorpus()
+    songs = [corpus.add(combined_lyrics(response).values()) for response in responses]
+    size = len(corpus.vocabulary)
+    for song in songs:
+        word_counts(song, size)
+        unique_word_ids(song)
+    # The corpus keeps one concatenated token array; per-song arrays are dropped.
+    return corpus, corpus.word_counts()
+
+
+def make_discography(tracks: int, vocabulary: int = 30_000, seed: int = 0):
+    """Songs drawing words from a Zipf-distributed vocabulary, so that the
+    combined vocabulary keeps growing like a real artist's."""
+    rng = random.Random(seed)
+    words = [f"word{index}" for index in range(vocabulary)]
+    weights = [1 / rank for rank in range(1, vocabulary + 1)]
+    return [
+        [" ".join(rng.choices(words, weights, k=8)) for _ in range(50)]
+        for _ in range(tracks)
+    ]
+
+
+def aggregate_counters(songs):
+    aggregator = CounterAggregator()
+    for lines in songs:
+        aggregator.add(lines)
+        aggregator.summary()
+
+
+def aggregate_token_arrays(songs):
+    aggregator = DiscographyAggregator()
+    track = SpotifyTrackRef(id="track", track_name="")
+    for lines in songs:
+        aggregator.add(track, lines)
+        aggregator.summary()
+
+
+def measure(build, responses):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(responses)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained / 2**20, peak / 2**20
+
+
+def main(songs: int = 10_000, tracks: int = 2_000):
+    responses = list(make_responses(songs))
+    print(f"{songs} songs")
+    print(f"{'':<18}{'seconds':>10}{'retained (MB)':>16}{'peak (MB)':>12}")
+    for name, build in [
+        ("dict of strings", dict_of_strings),
+        ("token arrays", token_arrays),
+    ]:
+        elapsed, retained, peak = measure(build, responses)
+        print(f"{name:<18}{elapsed:>10.2f}{retained:>16.1f}{peak:>12.1f}")
+
+    discography = make_discography(tracks)
+    print(f"\ndiscography of {tracks} tracks, summarized after each")
+    for name, aggregate in [
+        ("counters", aggregate_counters),
+        ("token arrays", aggregate_token_arrays),
+    ]:
+        start = time.perf_counter()
+        aggregate(discography)
+        print(f"{name:<18}{time.perf_counter() - start:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
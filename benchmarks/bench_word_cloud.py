@@ -0,0 +1,61 @@
+"""Compares memory growth and latency of word cloud rendering across reruns.
+
+Each rerun renders the two clouds of one song (the top words and, since the
+synthetic songs have few unique words, the top words with equal weight). ``legacy`` is the previous
+matplotlib path, ``renderer`` the cached WordCloudRenderer. Run with
+``python -m benchmarks.bench_word_cloud``.
+"""
+
+import resource
+import time
+
+from benchmarks.corpus import make_lyrics
+from benchmarks.legacy import create_word_cloud
+from text_analysis import analyze_text
+from word_cloud import WordCloudRenderer
+
+SONGS = [analyze_text(make_lyrics(lines=60, seed=seed)) for seed in range(10)]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * resource.getpagesize() / 2**20
+
+
+def run(name, render_song, reruns: int):
+    before = rss_mb()
+    start = time.perf_counter()
+    for rerun in range(reruns):
+        render_song(SONGS[rerun % len(SONGS)])
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<12}{elapsed / reruns * 1000:>14.1f}{rss_mb() - before:>18.1f}"
+    )
+
+
+def main(reruns: int = 50):
+    print(f"{'':<12}{'ms / rerun':>14}{'RSS growth (MB)':>18}")
+    run(
+        "legacy",
+        lambda song: (
+            create_word_cloud(song.most_common),
+            create_word_cloud({word: 1 for word, _ in song.most_common}),
+        ),
+        reruns,
+    )
+
+    renderer = WordCloudRenderer(processes=2)
+    try:
+        run(
+            "renderer",
+            lambda song: renderer.render_many(
+                [song.most_common, {word: 1 for word, _ in song.most_common}]
+            ),
+            reruns,
+        )
+    finally:
+        renderer.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Synthetic lyrics used by the benchmarks."""
+
+import random
+
+LATIN_WORDS = (
+    "love baby oh yeah you me I the night heart never gonna give up let down "
+    "run around desert tonight dance feel alive forever dream fire light"
+).split()
+HANGUL_WORDS = "사랑해 너를 우리 함께 영원히 빛나는 밤 마음 꿈".split()
+HAN_WORDS = "我爱你 永远 夜晚 星星 心 梦想".split()
+KANA_WORDS = "あなた こころ ゆめ ひかり カタカナ ダンス".split()
+
+
+def make_lyrics(lines: int = 60, multilingual: bool = False, seed: int = 0) -> str:
+    """Builds lyrics with a repeated chorus, like most pop songs."""
+    rng = random.Random(seed)
+    vocabulary = list(LATIN_WORDS)
+    if multilingual:
+        vocabulary += HANGUL_WORDS + HAN_WORDS + KANA_WORDS
+
+    chorus = [
+        " ".join(rng.choice(vocabulary) for _ in range(rng.randint(4, 9)))
+        for _ in range(4)
+    ]
+    result = []
+    for index in range(lines):
+        if index % 8 < 4:
+            result.append(chorus[index % 4])
+        else:
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(4, 10))]
+            result.append(", ".join(words) + rng.choice(["", "!", "?", " (oh)"]))
+
+    return "\n".join(result)
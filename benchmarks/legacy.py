@@ -0,0 +1,117 @@
+"""Reference copies of earlier implementations, kept for benchmark comparisons."""
+
+import re
+from collections import Counter
+
+
+def count_most_common(formatted_lyrics):
+    words_list = re.split(r'[,"\s()\?!]+', formatted_lyrics)
+
+    count = len(words_list)
+
+    words_list = [word.lower() for word in words_list if word]
+    counter = Counter(words_list).most_common(10)
+    unique_words = [word for word, count in Counter(words_list).items() if count == 1]
+    unique_words_count = len(unique_words)
+
+    korean_pattern = re.compile(r"[\uac00-\ud7af]")
+    chinese_pattern = re.compile(r"[\u4e00-\u9fff]")
+    japanese_pattern = re.compile(r"[\u3040-\u309f\u30a0-\u30ff]")
+
+    korean_chars = korean_pattern.findall(" ".join(words_list))
+    chinese_chars = chinese_pattern.findall(formatted_lyrics)
+    japanese_chars = japanese_pattern.findall(formatted_lyrics)
+
+    char_counts = {
+        "Korean": len(korean_chars),
+        "Chinese": len(chinese_chars),
+        "Japanese": len(japanese_chars),
+    }
+    char_counts = {k: v for k, v in char_counts.items() if v > 0}
+
+    return count, counter, char_counts, unique_words, unique_words_count
+
+
+LEGACY_SCRIPT_RANGES = {
+    "Korean": ((0xAC00, 0xD7AF),),
+    "Chinese": ((0x4E00, 0x9FFF),),
+    "Japanese": ((0x3040, 0x309F), (0x30A0, 0x30FF)),
+}
+
+
+def count_scripts(counter):
+    """The per-character range scan over the vocabulary, CJK only."""
+    char_counts = dict.fromkeys(LEGACY_SCRIPT_RANGES, 0)
+    for token, count in counter.items():
+        if token.isascii():
+            continue
+        for char in token:
+            code = ord(char)
+            for script, ranges in LEGACY_SCRIPT_RANGES.items():
+                if any(start <= code <= end for start, end in ranges):
+                    char_counts[script] += count
+                    break
+
+    return {k: v for k, v in char_counts.items() if v > 0}
+
+
+def create_word_cloud(word_count, font_path=None):
+    """The matplotlib-based renderer; the figure is never closed."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud(
+        font_path=font_path,
+        stopwords=None,
+        width=800,
+        height=400,
+        background_color="white",
+        regexp=r"[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff\uac00-\ud7af]+",
+    ).generate_from_frequencies(dict(word_count))
+
+    fig, ax = plt.subplots()
+    ax.imshow(wordcloud)
+    ax.axis("off")
+
+    return fig
+
+
+class CounterAggregator:
+    """Discography aggregation over Counters of strings, before token arrays."""
+
+    def __init__(self):
+        from text_analysis import count_words
+
+        self._count_words = count_words
+        self.word_counts = Counter()
+        self.document_frequency = Counter()
+        self.shared_vocabulary_size = 0
+        self._exclusive_owner = {}
+        self._exclusive_words = []
+
+    def add(self, lines):
+        counter = self._count_words("\n".join(lines))
+        index = len(self._exclusive_words)
+        exclusive = 0
+        for word in counter:
+            frequency = self.document_frequency[word]
+            if frequency == 0:
+                self._exclusive_owner[word] = index
+                exclusive += 1
+            elif frequency == 1:
+                self._exclusive_words[self._exclusive_owner.pop(word)] -= 1
+                self.shared_vocabulary_size += 1
+            self.document_frequency[word] = frequency + 1
+        self.word_counts.update(counter)
+        self._exclusive_words.append(exclusive)
+
+    def summary(self, top_n=20):
+        return (
+            sum(self.word_counts.values()),
+            len(self.word_counts),
+            self.word_counts.most_common(top_n),
+            list(self._exclusive_words),
+        )
@@ -0,0 +1,99 @@
+"""Local stand-in for the lyrics endpoint that enforces a rate limit.
+
+Requests above ``rate`` per second (after a burst of ``burst``) get a 429
+with a ``Retry-After`` header, like the real endpoint under load. It can
+also serve recorded lyrics responses by track id. Used by the scheduler
+tests, ``benchmarks.bench_scheduler`` and ``benchmarks.bench_pipeline``.
+"""
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "RateLimitedServer"
+
+    def do_GET(self):
+        status, retry_after = self.server.admit()
+        if status == 429:
+            self.send_response(429)
+            self.send_header("Retry-After", f"{retry_after:.3f}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(self.server.latency)
+        if self.server.responses is None:
+            response = {"lyrics": {"lines": [{"startTimeMs": "0", "words": self.path}]}}
+        else:
+            track_id = urlsplit(self.path).path.rsplit("/", 1)[-1]
+            response = self.server.responses.get(track_id)
+            if response is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RateLimitedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        rate: float = 20.0,
+        burst: int = 5,
+        latency: float = 0.005,
+        responses: Optional[Dict[str, dict]] = None,
+    ):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.rate = rate
+        self.burst = burst
+        self.latency = latency
+        # Track id -> lyrics response; unknown ids get a 404.
+        self.responses = responses
+        self.counts = Counter()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/lyrics/"
+
+    def admit(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.counts[200] += 1
+                return 200, 0.0
+            self.counts[429] += 1
+            return 429, (1 - self._tokens) / self.rate
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,414 @@
+"""Cache backends shared between processes, behind the ``caching.Cache`` interface.
+
+``LRUCache`` is the in-process backend. ``SQLiteCache`` is shared by every
+process on the host that opens the same file, ``RedisCache`` by every
+process talking to the same Redis. ``TieredCache`` puts an in-process LRU
+in front of either.
+
+Values are stored through a ``Codec`` as JSON or raw bytes, never pickled,
+so any replica can read them whatever its code version. On a miss,
+``get_or_compute`` takes a lease on the key: one process computes the value
+while the others wait for it instead of all hitting the upstream API.
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Generic, Hashable, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from caching import LRUCache
+
+M = TypeVar("M", bound=BaseModel)
+
+DEFAULT_LEASE_TIMEOUT = 30.0
+DEFAULT_POLL_INTERVAL = 0.05
+# Expired entries are deleted every this many writes.
+PRUNE_INTERVAL = 256
+# Rows kept per namespace in a SQLite cache, oldest writes evicted first.
+DEFAULT_MAX_ROWS = int(os.getenv("SHARED_CACHE_MAX_ROWS", 10_000))
+
+
+class Codec:
+    """Converts cached values to bytes and back."""
+
+    def dumps(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class BytesCodec(Codec):
+    """For values that already are bytes, like rendered images."""
+
+    def dumps(self, value: bytes) -> bytes:
+        return value
+
+    def loads(self, data: bytes) -> bytes:
+        return bytes(data)
+
+
+class ModelCodec(Codec, Generic[M]):
+    """Stores a pydantic model as its JSON and validates it back on load."""
+
+    def __init__(self, model: Type[M]):
+        self.model = model
+
+    def dumps(self, value: M) -> bytes:
+        return value.model_dump_json().encode("utf-8")
+
+    def loads(self, data: bytes) -> M:
+        return self.model.model_validate_json(data)
+
+
+def encode_key(key: Hashable) -> str:
+    # Tuples become JSON arrays, so ("search", "q", 0, 10) stays readable.
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class _SharedCache:
+    """``get_or_compute`` with a cross-process lease; subclasses store the data."""
+
+    def __init__(
+        self,
+        namespace: str,
+        codec: Codec,
+        ttl: Optional[float],
+        lease_timeout: float,
+        poll_interval: float,
+    ):
+        self.namespace = namespace
+        self.codec = codec
+        self.ttl = ttl
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        data = self._get(encode_key(key))
+        return default if data is None else self.codec.loads(data)
+
+    def set(self, key: Hashable, value: Any):
+        self._set(encode_key(key), self.codec.dumps(value))
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the cached value, computing and storing it on a miss.
+
+        Only the lease holder computes; other callers, in any process, poll
+        until its value appears. If the holder stores nothing (``None`` or
+        an error) or its lease expires, waiting callers compute themselves.
+        """
+        encoded = encode_key(key)
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        token = uuid.uuid4().hex
+        if not self._acquire(encoded, token):
+            while self._lease_held(encoded):
+                time.sleep(self.poll_interval)
+                value = self.get(key)
+                if value is not None:
+                    return value
+            value = self.get(key)
+            return value if value is not None else compute()
+
+        try:
+            value = compute()
+            if value is not None:
+                self.set(key, value)
+            return value
+        finally:
+            self._release(encoded, token)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _set(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def _acquire(self, key: str, token: str) -> bool:
+        raise NotImplementedError
+
+    def _lease_held(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def _release(self, key: str, token: str):
+        raise NotImplementedError
+
+
+class SQLiteCache(_SharedCache):
+    """Cache in a SQLite file in WAL mode, shared by the processes on a host.
+
+    Several namespaces can live in the same file. Entries expire after
+    ``ttl`` seconds; expired rows are pruned every ``PRUNE_INTERVAL`` writes,
+    along with the least recently written rows beyond ``max_rows``, so the
+    file stays bounded even for namespaces without a ``ttl``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        codec: Codec,
+        ttl: Optional[float] = None,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        clock: Callable[[], float] = time.time,
+        max_rows: Optional[int] = DEFAULT_MAX_ROWS,
+    ):
+        super().__init__(namespace, codec, ttl, lease_timeout, poll_interval)
+        self.path = path
+        self.max_rows = max_rows
+        self._clock = clock
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                expires_at REAL,
+                updated_at REAL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS leases (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                token TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            ) WITHOUT ROWID;
+            """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(cache)")]
+        if "updated_at" not in columns:
+            # Files written before rows were bounded.
+            self._conn.execute("ALTER TABLE cache ADD COLUMN updated_at REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS cache_updated_at"
+            " ON cache (namespace, updated_at)"
+        )
+        self._conn.commit()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ?"
+                " AND (expires_at IS NULL OR expires_at > ?)",
+                (self.namespace, key, self._clock()),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def _set(self, key: str, data: bytes):
+        now = self._clock()
+        expires_at = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache"
+                " (namespace, key, value, expires_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, data, expires_at, now),
+            )
+            self._writes += 1
+            if self._writes % PRUNE_INTERVAL == 0:
+                self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now: float):
+        # Must be called with self._lock held.
+        self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, now),
+        )
+        if self.max_rows is not None:
+            self._conn.execute(
+                """
+                DELETE FROM cache WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache WHERE namespace = ?
+                    ORDER BY updated_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_rows),
+            )
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key = ?",
+                (self.namespace, encode_key(key)),
+            )
+            self._conn.commit()
+
+    def _acquire(self, key: str, token: str) -> bool:
+        now = self._clock()
+        with self._lock:
+            # Takes the lease if nobody holds it or the holder's has expired.
+            cursor = self._conn.execute(
+                """
+                INSERT INTO leases VALUES (?, ?, ?, ?)
+                ON CONFLICT (namespace, key) DO UPDATE
+                SET token = excluded.token, expires_at = excluded.expires_at
+                WHERE leases.expires_at <= ?
+                """,
+                (self.namespace, key, token, now + self.lease_timeout, now),
+            )
+            self._conn.commit()
+            return cursor.rowcount == 1
+
+    def _lease_held(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM leases WHERE namespace = ? AND key = ?"
+                " AND expires_at > ?",
+                (self.namespace, key, self._clock()),
+            ).fetchone()
+        return row is not None
+
+    def _release(self, key: str, token: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM leases WHERE namespace = ? AND key = ? AND token = ?",
+                (self.namespace, key, token),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisCache(_SharedCache):
+    """Cache in Redis, shared by every replica using the same server.
+
+    ``client`` is a ``redis.Redis`` or anything with the same ``get``,
+    ``set``, ``exists`` and ``delete`` methods. Keys are prefixed with the
+    namespace and expire through Redis itself.
+    """
+
+    def __init__(
+        self,
+        client,
+        namespace: str,
+        codec: Codec,
+        ttl: Optional[float] = None,
+        lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        super().__init__(namespace, codec, ttl, lease_timeout, poll_interval)
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str, namespace: str, codec: Codec, **kwargs):
+        import redis
+
+        return cls(redis.Redis.from_url(url), namespace, codec, **kwargs)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self._key(key))
+
+    def _set(self, key: str, data: bytes):
+        px = int(self.ttl * 1000) if self.ttl is not None else None
+        self.client.set(self._key(key), data, px=px)
+
+    def delete(self, key: Hashable):
+        self.client.delete(self._key(encode_key(key)))
+
+    def _acquire(self, key: str, token: str) -> bool:
+        lease = f"lease:{self._key(key)}"
+        return bool(
+            self.client.set(lease, token, nx=True, px=int(self.lease_timeout * 1000))
+        )
+
+    def _lease_held(self, key: str) -> bool:
+        return bool(self.client.exists(f"lease:{self._key(key)}"))
+
+    def _release(self, key: str, token: str):
+        lease = f"lease:{self._key(key)}"
+        # Only drop our own lease; after a timeout it may belong to another.
+        held = self.client.get(lease)
+        if held is not None and held.decode() == token:
+            self.client.delete(lease)
+
+    def close(self):
+        self.client.close()
+
+
+class TieredCache:
+    """An in-process ``LRUCache`` in front of a shared cache.
+
+    Reads are served locally when possible, so a Streamlit rerun does not
+    deserialize the same value again; misses fall through to the shared
+    tier, whose value is then kept locally.
+    """
+
+    def __init__(self, local: LRUCache, shared: _SharedCache):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is None:
+                return default
+            self.local.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self.local.set(key, value)
+        self.shared.set(key, value)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        return self.local.get_or_compute(
+            key, lambda: self.shared.get_or_compute(key, compute)
+        )
+
+    def close(self):
+        self.shared.close()
+
+
+def shared_cache(
+    namespace: str, codec: Codec, ttl: Optional[float] = None
+) -> Optional[_SharedCache]:
+    """Builds the shared cache configured through ``REDIS_URL`` or
+    ``SHARED_CACHE_PATH``, if either is set."""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        cache = RedisCache.from_url(redis_url, namespace, codec, ttl=ttl)
+    else:
+        path = os.getenv("SHARED_CACHE_PATH")
+        if not path:
+            return None
+        cache = SQLiteCache(path, namespace, codec, ttl=ttl)
+    atexit.register(cache.close)
+    return cache
+
+
+def default_cache(
+    namespace: str, codec: Codec, maxsize: int, ttl: Optional[float] = None
+):
+    """An ``LRUCache``, tiered over the configured shared cache if there is one."""
+    local = LRUCache(maxsize=maxsize, ttl=ttl, name=namespace)
+    shared = shared_cache(namespace, codec, ttl=ttl)
+    return local if shared is None else TieredCache(local, shared)
@@ -0,0 +1,124 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Protocol, Tuple
+
+import metrics
+
+
+class Cache(Protocol):
+    """Interface the services accept for pluggable caching."""
+
+    def get(self, key: Hashable, default: Any = None) -> Any: ...
+
+    def set(self, key: Hashable, value: Any): ...
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any: ...
+
+
+class LRUCache:
+    """Thread-safe, size-bounded in-process cache with LRU eviction.
+
+    With a ``ttl``, entries also expire that many seconds after being set.
+    A ``name`` reports hits and misses to ``metrics`` under that cache name.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        name: Optional[str] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                hit = False
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+                hit = True
+        if self.name:
+            metrics.cache_lookup(self.name, hit)
+        return entry[1] if hit else default
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = self._clock() + self.ttl if self.ttl is not None else math.inf
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the cached value, computing and storing it on a miss.
+
+        Concurrent callers for the same key wait for a single computation.
+        ``None`` results are not cached.
+        """
+        while True:
+            value = self.get(key)
+            if value is not None:
+                return value
+
+            with self._lock:
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            pending.wait()
+            if key not in self:
+                # The other computation returned None or failed; compute here.
+                return compute()
+
+        try:
+            value = compute()
+            if value is not None:
+                self.set(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+            pending.set()
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > self._clock()
+
+    def __len__(self) -> int:
+        """Counts the unexpired entries, dropping the expired ones."""
+        with self._lock:
+            now = self._clock()
+            expired = [
+                key
+                for key, (expires_at, _) in self._data.items()
+                if expires_at <= now
+            ]
+            for key in expired:
+                del self._data[key]
+            return len(self._data)
@@ -0,0 +1,283 @@
+"""Headless batch analysis of lyrics, without Streamlit.
+
+Inputs are local lyrics JSON dumps (files or directories of ``*.json``, in
+the lyrics endpoint's response format) and/or text files listing one
+Spotify track id per line. Results are streamed to JSONL or Parquet::
+
+    python cli.py dumps/ track_ids.txt --output results.jsonl --workers 8
+
+Streamlit, matplotlib and wordcloud are only imported when ``--images`` is
+given; fetching track ids imports the lyrics service. Track ids are fetched
+in the main process, so one scheduler rate limits the whole run however
+many workers analyze the lyrics.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lyrics_analysis import LyricsAnalysis, analyze_lyrics
+
+# ("dump", path), ("track", track id) or ("lyrics", (track id, response)).
+Job = Tuple[str, Any]
+
+# Jobs sent to a worker at once, and chunks in flight per worker.
+CHUNK_SIZE = 16
+CHUNKS_PER_WORKER = 2
+
+# PNG fields left out of the records; word clouds are written with --images.
+IMAGE_FIELDS = {"most_common_cloud", "unique_words_cloud"}
+
+
+def iter_jobs(inputs: Iterable[str]) -> Iterator[Job]:
+    for name in inputs:
+        path = Path(name)
+        if path.is_dir():
+            for dump in sorted(path.glob("*.json")):
+                yield "dump", str(dump)
+        elif path.suffix == ".json":
+            yield "dump", str(path)
+        else:
+            with open(path) as track_ids:
+                for line in track_ids:
+                    track_id = line.strip()
+                    if track_id and not track_id.startswith("#"):
+                        yield "track", track_id
+
+
+def fetch_track_jobs(jobs: Iterator[Job]) -> Iterator[Job]:
+    """Replaces ``track`` jobs with ``lyrics`` jobs, fetching a chunk at a
+    time concurrently through one ``LyricsService`` in this process."""
+    service = None
+    while True:
+        chunk = list(islice(jobs, CHUNK_SIZE))
+        if not chunk:
+            return
+        track_ids = [value for kind, value in chunk if kind == "track"]
+        if track_ids:
+            if service is None:
+                # Imported lazily: fetching needs the HTTP stack and credentials.
+                from lyrics_service import LyricsService
+
+                service = LyricsService()
+            fetched = dict(service.get_lyrics_many(track_ids))
+            chunk = [
+                ("lyrics", (job[1], fetched[job[1]])) if job[0] == "track" else job
+                for job in chunk
+            ]
+        yield from chunk
+
+
+def _load(job: Job) -> Tuple[str, Optional[dict]]:
+    kind, value = job
+    if kind == "dump":
+        with open(value, encoding="utf-8") as dump:
+            return Path(value).stem, json.load(dump)
+    if kind == "lyrics":
+        return value
+    raise ValueError(f"track {value} was not fetched")
+
+
+def analyze_job(job: Job, top_n: int = 10, images: Optional[str] = None) -> Dict:
+    """Analyzes one job; failures become an ``error`` record so that one bad
+    dump does not abort the batch."""
+    try:
+        return _analyze(job, top_n, images)
+    except Exception as ex:
+        return {"track_id": _track_id(job), "error": str(ex)}
+
+
+def _track_id(job: Job) -> str:
+    kind, value = job
+    if kind == "dump":
+        return Path(value).stem
+    return value[0] if kind == "lyrics" else value
+
+
+def analyze_jobs(
+    jobs: List[Job], top_n: int = 10, images: Optional[str] = None
+) -> List[Dict]:
+    return [analyze_job(job, top_n, images) for job in jobs]
+
+
+def _analyze(job: Job, top_n: int, images: Optional[str]) -> Dict:
+    track_id, lyrics_response = _load(job)
+    if not lyrics_response:
+        return {"track_id": track_id, "error": "no lyrics"}
+
+    analysis = analyze_lyrics(track_id, lyrics_response, top_n=top_n)
+    if images:
+        from word_cloud import render_png
+
+        image_path = Path(images) / f"{track_id}.png"
+        image_path.write_bytes(render_png(dict(analysis.most_common)))
+
+    return analysis.model_dump(exclude=IMAGE_FIELDS)
+
+
+class JsonlWriter:
+    def __init__(self, path: str):
+        self._file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+class ParquetWriter:
+    """Buffers records and writes them as Parquet row groups.
+
+    Every row group uses the schema of ``LyricsAnalysis`` plus an ``error``
+    column, so analyses and error records can come in any order.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self._path = path
+        self._batch_size = batch_size
+        self._batch = []
+        self._schema = parquet_schema(pyarrow)
+        self._writer = None
+
+    def write(self, record: Dict):
+        # Nested values are stored as JSON strings to keep a flat schema.
+        self._batch.append(
+            {
+                key: (
+                    json.dumps(value, ensure_ascii=False)
+                    if isinstance(value, (dict, list))
+                    else value
+                )
+                for key, value in record.items()
+            }
+        )
+        if len(self._batch) >= self._batch_size:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        if self._writer:
+            self._writer.close()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        table = self._pyarrow.Table.from_pylist(self._batch, schema=self._schema)
+        if self._writer is None:
+            self._writer = self._parquet.ParquetWriter(self._path, self._schema)
+        self._writer.write_table(table)
+        self._batch = []
+
+
+def parquet_schema(pyarrow):
+    """Columns of the Parquet output; nested fields are JSON strings."""
+    types = {str: pyarrow.string(), int: pyarrow.int64(), float: pyarrow.float64()}
+    fields = [
+        pyarrow.field(name, types.get(field.annotation, pyarrow.string()))
+        for name, field in LyricsAnalysis.model_fields.items()
+        if name not in IMAGE_FIELDS
+    ]
+    return pyarrow.schema(fields + [pyarrow.field("error", pyarrow.string())])
+
+
+def open_writer(path: str):
+    if path.endswith(".parquet"):
+        return ParquetWriter(path)
+    return JsonlWriter(path)
+
+
+def run(
+    inputs: Iterable[str],
+    output: str = "-",
+    workers: Optional[int] = None,
+    top_n: int = 10,
+    images: Optional[str] = None,
+) -> Dict:
+    workers = workers or os.cpu_count() or 1
+    if images:
+        os.makedirs(images, exist_ok=True)
+
+    writer = open_writer(output)
+    songs = failures = 0
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for record in _map_bounded(
+                executor,
+                fetch_track_jobs(iter_jobs(inputs)),
+                workers * CHUNKS_PER_WORKER,
+                top_n,
+                images,
+            ):
+                writer.write(record)
+                songs += 1
+                failures += "error" in record
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "songs": songs,
+        "failures": failures,
+        "seconds": round(elapsed, 3),
+        "songs_per_second": round(songs / elapsed, 2) if elapsed else 0.0,
+        "songs_per_second_per_core": (
+            round(songs / elapsed / workers, 2) if elapsed else 0.0
+        ),
+    }
+
+
+def _map_bounded(
+    executor: ProcessPoolExecutor,
+    jobs: Iterator[Job],
+    window: int,
+    top_n: int,
+    images: Optional[str],
+) -> Iterator[Dict]:
+    """Results in job order, with at most ``window`` chunks submitted at a
+    time, so job inputs are read as the workers catch up, not up front."""
+    pending = deque()
+    while True:
+        while len(pending) < window:
+            chunk = list(islice(jobs, CHUNK_SIZE))
+            if not chunk:
+                break
+            pending.append(executor.submit(analyze_jobs, chunk, top_n, images))
+        if not pending:
+            return
+        yield from pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "inputs", nargs="+", help="lyrics JSON dumps, directories or track id files"
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="JSONL or .parquet file (default stdout)"
+    )
+    parser.add_argument("-w", "--workers", type=int, help="worker processes")
+    parser.add_argument("--top", type=int, default=10, help="most common words")
+    parser.add_argument("--images", help="directory for word cloud PNGs")
+    args = parser.parse_args(argv)
+
+    stats = run(args.inputs, args.output, args.workers, args.top, args.images)
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import pytest
+
+
+class FakeClock:
+    """A clock for ``clock=`` parameters that only moves when told to."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
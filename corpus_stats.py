@@ -0,0 +1,204 @@
+import atexit
+import heapq
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List, Mapping, Optional, Set, Tuple
+
+DEFAULT_BATCH_SIZE = 200
+# Pseudo-count added to every word in the log-odds estimate.
+LOG_ODDS_PRIOR = 0.01
+
+
+class CorpusStats:
+    """Document frequencies per token and language across analyzed songs.
+
+    All counts are kept in memory, so lookups are dictionary reads, and are
+    persisted to SQLite. Updates are applied to memory immediately and
+    written to disk ``batch_size`` songs at a time, in one transaction.
+    Each track is counted once, however often it is analyzed.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tokens (
+                token TEXT NOT NULL,
+                language TEXT NOT NULL,
+                documents INTEGER NOT NULL,
+                occurrences INTEGER NOT NULL,
+                PRIMARY KEY (token, language)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS documents (
+                track_id TEXT PRIMARY KEY,
+                language TEXT NOT NULL,
+                tokens INTEGER NOT NULL
+            );
+            """)
+        self._conn.commit()
+
+        self._documents: Counter = Counter()
+        self._occurrences: Counter = Counter()
+        # Distinct tokens per language.
+        self._vocabulary: Counter = Counter()
+        for token, language, documents, occurrences in self._conn.execute(
+            "SELECT token, language, documents, occurrences FROM tokens"
+        ):
+            self._documents[token, language] = documents
+            self._occurrences[token, language] = occurrences
+            self._vocabulary[language] += 1
+        self._tracks: Set[str] = set()
+        self._corpus_documents: Counter = Counter()
+        self._corpus_tokens: Counter = Counter()
+        for track_id, language, tokens in self._conn.execute(
+            "SELECT track_id, language, tokens FROM documents"
+        ):
+            self._tracks.add(track_id)
+            self._corpus_documents[language] += 1
+            self._corpus_tokens[language] += tokens
+
+        self._pending_tokens: Counter = Counter()
+        self._pending_occurrences: Counter = Counter()
+        self._pending_documents: List[Tuple[str, str, int]] = []
+
+    def add(self, track_id: str, counts: Mapping[str, int], language: str = "") -> bool:
+        """Counts a song's words; returns False if the track was already counted."""
+        with self._lock:
+            if track_id in self._tracks:
+                return False
+            self._tracks.add(track_id)
+            tokens = sum(counts.values())
+            self._corpus_documents[language] += 1
+            self._corpus_tokens[language] += tokens
+            self._pending_documents.append((track_id, language, tokens))
+            for token, count in counts.items():
+                key = (token, language)
+                if not self._documents[key]:
+                    self._vocabulary[language] += 1
+                self._documents[key] += 1
+                self._occurrences[key] += count
+                self._pending_tokens[key] += 1
+                self._pending_occurrences[key] += count
+            if len(self._pending_documents) >= self.batch_size:
+                self._flush()
+            return True
+
+    def document_frequency(self, token: str, language: str = "") -> int:
+        return self._documents.get((token, language), 0)
+
+    def documents(self, language: str = "") -> int:
+        return self._corpus_documents[language]
+
+    def tfidf(
+        self, counts: Mapping[str, int], language: str = "", top_n: int = 10
+    ) -> List[Tuple[str, float]]:
+        """Words ranked by term frequency x smoothed inverse document frequency.
+
+        Words used by every song of the corpus score zero and are left out.
+        """
+        total = sum(counts.values())
+        documents = self._corpus_documents[language]
+        scores = {}
+        for token, count in counts.items():
+            idf = math.log(
+                (1 + documents) / (1 + self._documents.get((token, language), 0))
+            )
+            if idf > 0:
+                scores[token] = count / total * idf
+        return _top(scores, top_n)
+
+    def log_odds(
+        self, counts: Mapping[str, int], language: str = "", top_n: int = 10
+    ) -> List[Tuple[str, float]]:
+        """Words ranked by the z-scored log-odds ratio of the song against the
+        rest of the corpus, with a small uniform Dirichlet prior (Monroe et
+        al., 2008).
+
+        The prior is summed over the corpus vocabulary plus one slot for
+        unseen words, so every odds denominator stays positive, even for a
+        song of a single repeated word. ``counts`` are assumed to be part of
+        the corpus already.
+        """
+        song_total = sum(counts.values())
+        rest_total = max(self._corpus_tokens[language] - song_total, 0)
+        vocabulary = max(self._vocabulary[language], len(counts)) + 1
+        prior_total = LOG_ODDS_PRIOR * vocabulary
+
+        scores = {}
+        for token, count in counts.items():
+            rest = max(self._occurrences.get((token, language), 0) - count, 0)
+            song_odds = (count + LOG_ODDS_PRIOR) / (
+                song_total - count + prior_total - LOG_ODDS_PRIOR
+            )
+            rest_odds = (rest + LOG_ODDS_PRIOR) / (
+                max(rest_total - rest, 0) + prior_total - LOG_ODDS_PRIOR
+            )
+            variance = 1 / (count + LOG_ODDS_PRIOR) + 1 / (rest + LOG_ODDS_PRIOR)
+            score = (math.log(song_odds) - math.log(rest_odds)) / math.sqrt(variance)
+            if score > 0:
+                scores[token] = score
+        return _top(scores, top_n)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+        self._conn.close()
+
+    def _flush(self):
+        # Must be called with self._lock held.
+        if not self._pending_documents:
+            return
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO documents VALUES (?, ?, ?)",
+            self._pending_documents,
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO tokens VALUES (?, ?, ?, ?)
+            ON CONFLICT (token, language) DO UPDATE SET
+                documents = documents + excluded.documents,
+                occurrences = occurrences + excluded.occurrences
+            """,
+            (
+                (token, language, documents, self._pending_occurrences[token, language])
+                for (token, language), documents in self._pending_tokens.items()
+            ),
+        )
+        self._conn.commit()
+        self._pending_documents = []
+        self._pending_tokens = Counter()
+        self._pending_occurrences = Counter()
+
+
+def _top(scores: Dict[str, float], top_n: int) -> List[Tuple[str, float]]:
+    ranked = heapq.nlargest(top_n, scores.items(), key=itemgetter(1))
+    return [(token, round(score, 4)) for token, score in ranked]
+
+
+def dominant_language(language_percentages: Mapping[str, float]) -> str:
+    """The language with the most words, or "" when languages are unknown."""
+    return max(language_percentages, key=language_percentages.get, default="")
+
+
+def default_corpus_stats() -> Optional[CorpusStats]:
+    """Builds the store configured through ``CORPUS_STATS_PATH``, if set."""
+    path = os.getenv("CORPUS_STATS_PATH")
+    if not path:
+        return None
+    stats = CorpusStats(
+        path, batch_size=int(os.getenv("CORPUS_STATS_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    )
+    # Songs not yet committed would otherwise be lost.
+    atexit.register(stats.close)
+    return stats
@@ -0,0 +1,178 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from lyrics_service import LyricsService
+from SpotifyService.schemas import SpotifyTrackRef
+from token_arrays import SongTokens, Vocabulary, grown, top_words
+
+
+class TrackSummary(BaseModel):
+    id: str
+    track_name: str
+    album: str = ""
+    word_count: int
+    vocabulary_size: int
+    type_token_ratio: float
+    repetition_score: float
+    exclusive_words: int = 0
+
+
+class DiscographySummary(BaseModel):
+    # Tracks listed so far; grows while an artist's albums are enumerated.
+    tracks_total: int
+    tracks_analyzed: int
+    tracks_without_lyrics: int
+    word_count: int
+    vocabulary_size: int
+    type_token_ratio: float
+    repetition_score: float
+    shared_vocabulary_size: int
+    exclusive_vocabulary_size: int
+    most_common: List[Tuple[str, int]]
+    tracks: List[TrackSummary]
+
+
+def count_repeated_lines(lines: Iterable[str]) -> int:
+    """Counts lyric lines that repeat an earlier line."""
+    seen = set()
+    repeated = 0
+    for line in lines:
+        line = line.lower()
+        if line in seen:
+            repeated += 1
+        else:
+            seen.add(line)
+    return repeated
+
+
+class DiscographyAggregator:
+    """Incrementally aggregates per-track analyses into discography statistics.
+
+    Songs are interned into a shared ``Vocabulary`` and counted as token
+    arrays; only per-word count arrays are kept, never the lyrics payloads,
+    so memory grows with the combined vocabulary rather than with the
+    number of tracks. Shared and track-exclusive words are updated as each
+    track is added, in the ``TrackSummary`` objects themselves, so a summary
+    does not rescan the vocabularies or copy the tracks.
+    """
+
+    def __init__(self, tracks_total: int = 0):
+        self.tracks_total = tracks_total
+        self.tracks_without_lyrics = 0
+        self.vocabulary = Vocabulary()
+        self.word_count = 0
+        # Occurrences and number of tracks per vocabulary id.
+        self.word_counts = np.zeros(1024, dtype=np.int64)
+        self.document_frequency = np.zeros(1024, dtype=np.int32)
+        self.line_count = 0
+        self.repeated_lines = 0
+        self.tracks: List[TrackSummary] = []
+        self.shared_vocabulary_size = 0
+        self.exclusive_vocabulary_size = 0
+        # Track index of every word used by a single track so far.
+        self._exclusive_owner = np.zeros(1024, dtype=np.int32)
+
+    def add(self, track: SpotifyTrackRef, lines: List[str]):
+        song = SongTokens.from_lines(lines, self.vocabulary)
+        ids, counts = np.unique(song.tokens, return_counts=True)
+        word_count = len(song.tokens)
+        repeated_lines = count_repeated_lines(lines)
+
+        size = len(self.vocabulary)
+        self.word_counts = grown(self.word_counts, size)
+        self.document_frequency = grown(self.document_frequency, size)
+        self._exclusive_owner = grown(self._exclusive_owner, size)
+        index = len(self.tracks)
+
+        frequency = self.document_frequency[ids]
+        new = ids[frequency == 0]
+        now_shared = ids[frequency == 1]
+        self._exclusive_owner[new] = index
+        owners, lost = np.unique(self._exclusive_owner[now_shared], return_counts=True)
+        for owner, count in zip(owners.tolist(), lost.tolist()):
+            self.tracks[owner].exclusive_words -= count
+        self.shared_vocabulary_size += len(now_shared)
+        self.exclusive_vocabulary_size += len(new) - len(now_shared)
+        self.document_frequency[ids] += 1
+        self.word_counts[ids] += counts
+
+        self.word_count += word_count
+        self.line_count += len(lines)
+        self.repeated_lines += repeated_lines
+        self.tracks.append(
+            TrackSummary(
+                id=track.id,
+                track_name=track.track_name,
+                album=track.album,
+                word_count=word_count,
+                vocabulary_size=len(ids),
+                type_token_ratio=len(ids) / word_count if word_count else 0.0,
+                repetition_score=repeated_lines / len(lines) if lines else 0.0,
+                exclusive_words=len(new),
+            )
+        )
+
+    def add_missing(self):
+        self.tracks_without_lyrics += 1
+
+    def summary(self, top_n: int = 20) -> DiscographySummary:
+        """The statistics so far. Its ``tracks`` are the aggregator's own, so
+        their ``exclusive_words`` keep changing as tracks are added."""
+        word_count = self.word_count
+        vocabulary_size = len(self.vocabulary)
+
+        return DiscographySummary(
+            tracks_total=self.tracks_total,
+            tracks_analyzed=len(self.tracks),
+            tracks_without_lyrics=self.tracks_without_lyrics,
+            word_count=word_count,
+            vocabulary_size=vocabulary_size,
+            type_token_ratio=vocabulary_size / word_count if word_count else 0.0,
+            repetition_score=(
+                self.repeated_lines / self.line_count if self.line_count else 0.0
+            ),
+            shared_vocabulary_size=self.shared_vocabulary_size,
+            exclusive_vocabulary_size=self.exclusive_vocabulary_size,
+            most_common=top_words(
+                self.word_counts[:vocabulary_size], self.vocabulary, top_n
+            ),
+            tracks=list(self.tracks),
+        )
+
+
+def analyze_discography(
+    lyrics_service: LyricsService,
+    tracks: Iterable[SpotifyTrackRef],
+    max_workers: Optional[int] = None,
+) -> Iterator[DiscographySummary]:
+    """Fetches lyrics for all tracks concurrently and yields a running summary
+    after every finished track.
+
+    ``tracks`` is consumed lazily, so the first results arrive while an
+    artist's later albums are still being listed.
+    """
+    aggregator = DiscographyAggregator()
+    seen = set()
+    # Refs of the tracks listed but not yet finished.
+    pending: Dict[str, SpotifyTrackRef] = {}
+
+    def track_ids():
+        for track in tracks:
+            if track.id not in seen:
+                seen.add(track.id)
+                pending[track.id] = track
+                aggregator.tracks_total += 1
+                yield track.id
+
+    for track_id, result in lyrics_service.get_lyrics_many(
+        track_ids(), max_workers=max_workers
+    ):
+        track = pending.pop(track_id)
+        if result:
+            lines = list(lyrics_service.combined_lyrics(result).values())
+            aggregator.add(track, lines)
+        else:
+            aggregator.add_missing()
+        yield aggregator.summary()
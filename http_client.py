@@ -0,0 +1,99 @@
+import email.utils
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+DEFAULT_TIMEOUT = (3.05, 10)
+
+
+class HttpClient:
+    """Pooled HTTP client with per-host concurrency limits and retries.
+
+    A single ``requests.Session`` keeps connections alive between calls.
+    Responses with a status in ``retry_status_codes`` (``RETRY_STATUS_CODES``
+    by default) and connection errors are retried with exponential backoff,
+    honouring ``Retry-After``. Clients whose requests go through a
+    ``RequestScheduler`` should leave 429 out, so that rate limiting is
+    handled by the scheduler's token bucket instead of sleeping here.
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 8,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30.0,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        sleep: Callable[[float], None] = time.sleep,
+        retry_status_codes: Iterable[int] = RETRY_STATUS_CODES,
+    ):
+        self.max_per_host = max_per_host
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self._sleep = sleep
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = defaultdict(
+            lambda: threading.BoundedSemaphore(max_per_host)
+        )
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            host_limit = self._host_limits[urlsplit(url).netloc]
+
+        attempt = 0
+        while True:
+            try:
+                with host_limit:
+                    response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                self._sleep(self._backoff(attempt))
+            else:
+                if (
+                    response.status_code not in self.retry_status_codes
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                self._sleep(self._backoff(attempt, response))
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+
+    def _backoff(self, attempt: int, response: Optional[requests.Response] = None):
+        retry_after = parse_retry_after(response) if response is not None else None
+        if retry_after is None:
+            retry_after = self.backoff_factor * (2**attempt)
+        return min(retry_after, self.max_backoff)
+
+
+def parse_retry_after(response: requests.Response) -> Optional[float]:
+    """Parses a ``Retry-After`` header given in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
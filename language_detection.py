@@ -0,0 +1,89 @@
+import os
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from lingua import LanguageDetector
+
+# Comma separated ISO 639-1 codes, or "all" for every language lingua knows.
+DEFAULT_LANGUAGES = "en,ko,ja,zh,de,es,fr,pt,it"
+
+_detector: Optional["LanguageDetector"] = None
+_detector_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return os.getenv("LANGUAGE_DETECTION_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+def configured_languages() -> str:
+    return os.getenv("LANGUAGE_DETECTION_LANGUAGES", DEFAULT_LANGUAGES)
+
+
+def build_detector(languages: str, preload: bool = False) -> "LanguageDetector":
+    # lingua is imported here rather than at module level: loading it is slow
+    # and most callers never detect languages.
+    from lingua import IsoCode639_1, LanguageDetectorBuilder
+
+    if languages.strip().lower() == "all":
+        builder = LanguageDetectorBuilder.from_all_languages()
+    else:
+        iso_codes = [
+            getattr(IsoCode639_1, code.strip().upper())
+            for code in languages.split(",")
+            if code.strip()
+        ]
+        builder = LanguageDetectorBuilder.from_iso_codes_639_1(*iso_codes)
+
+    if preload:
+        builder = builder.with_preloaded_language_models()
+
+    return builder.build()
+
+
+def get_detector() -> "LanguageDetector":
+    """Returns the process-wide detector, building it on first use."""
+    global _detector
+
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = build_detector(configured_languages())
+
+    return _detector
+
+
+def preload():
+    """Builds the shared detector with all models loaded, if detection is enabled."""
+    global _detector
+
+    if not is_enabled():
+        return
+
+    with _detector_lock:
+        _detector = build_detector(configured_languages(), preload=True)
+
+
+def language_percentages(
+    lines: Iterable[str], detector: Optional["LanguageDetector"] = None
+) -> Dict[str, float]:
+    """Detects languages per line in one batch and returns word share per language."""
+    lines: List[str] = [line for line in lines if line.strip()]
+    if not lines:
+        return {}
+
+    detector = detector or get_detector()
+    word_counts = Counter()
+    batch = detector.detect_multiple_languages_in_parallel_of(lines)
+    for line, results in zip(lines, batch):
+        for result in results:
+            # lingua counts CJK characters as words, so count whitespace tokens.
+            segment = line[result.start_index : result.end_index]
+            word_counts[result.language.name.title()] += len(segment.split())
+
+    total = sum(word_counts.values())
+    return {
+        language: round(count / total * 100, 2)
+        for language, count in word_counts.most_common()
+    }
@@ -0,0 +1,113 @@
+import base64
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, field_serializer, field_validator
+
+from repetition import RepetitionStats
+from streaming_analysis import IncrementalAnalyzer, TimelinePoint
+from unicode_scripts import script_counts
+
+# Bump whenever the analysis output changes so memoized results are recomputed.
+ANALYSIS_VERSION = 9
+
+
+class LyricsAnalysis(BaseModel):
+    track_id: str
+    version: int = ANALYSIS_VERSION
+    word_count: int
+    most_common: List[Tuple[str, int]]
+    char_counts: Dict[str, int]
+    # Words per script, counting Chinese and Japanese characters as words.
+    script_token_counts: Dict[str, int] = {}
+    unique_words: List[str]
+    unique_words_count: int
+    repeated_phrases: List[Tuple[str, int]]
+    repeated_ngrams: List[Tuple[str, int]] = []
+    repetition: Optional[RepetitionStats] = None
+    language_percentages: Dict[str, float] = {}
+    # Words that set the track apart from the corpus, when corpus stats are kept.
+    tfidf_words: List[Tuple[str, float]] = []
+    log_odds_words: List[Tuple[str, float]] = []
+    # Running totals after each line, for repetition-over-time curves.
+    timeline: List[TimelinePoint] = []
+    most_common_cloud: bytes = b""
+    unique_words_cloud: bytes = b""
+
+    # PNG bytes are not valid UTF-8, so they go through JSON as base64.
+    @field_serializer("most_common_cloud", "unique_words_cloud", when_used="json")
+    def _encode_image(self, image: bytes) -> str:
+        return base64.b64encode(image).decode("ascii")
+
+    @field_validator("most_common_cloud", "unique_words_cloud", mode="before")
+    @classmethod
+    def _decode_image(cls, image):
+        return base64.b64decode(image) if isinstance(image, str) else image
+
+
+def combined_lyrics(lyrics_response: object) -> dict:
+    # TODO: return isRtlLanguage=True (arabic)
+    lyric_dict = defaultdict(str)
+
+    for index, line in enumerate(lyrics_response["lyrics"]["lines"]):
+        words = line["words"]
+        if words and words != "♪":  # Check if words is not empty
+            lyric_dict[str(index)] = words
+
+    return lyric_dict
+
+
+def find_repeated_phrases(lyrics: dict):
+    phrase_count = defaultdict(int)
+
+    # Count occurrences of each phrase
+    for key, phrase in lyrics.items():
+        phrase_count[phrase.lower()] += 1
+
+    # Find phrases that are repeated
+    repeated_phrases = {
+        phrase: count for phrase, count in phrase_count.items() if count > 1
+    }
+
+    sorted_repeated_phrases = sorted(
+        repeated_phrases.items(), key=lambda item: item[1], reverse=True
+    )
+
+    return phrase_count, sorted_repeated_phrases
+
+
+def analyze_lyrics(
+    track_id: str, lyrics_response: object, top_n: int = 10
+) -> LyricsAnalysis:
+    """Runs the text analysis of a lyrics response, without rendering images.
+
+    Every line is tokenized once, by the ``IncrementalAnalyzer``.
+    """
+    return analyze_lines(track_id, lyrics_response, top_n)[0]
+
+
+def analyze_lines(
+    track_id: str, lyrics_response: object, top_n: int = 10
+) -> Tuple[LyricsAnalysis, IncrementalAnalyzer]:
+    """``analyze_lyrics``, also returning the analyzer, whose ``counter`` and
+    ``words`` let callers index the song without tokenizing it again."""
+    analyzer = IncrementalAnalyzer().add_lines(lyrics_response["lyrics"]["lines"])
+    stats = analyzer.stats(top_n=top_n)
+    _, script_token_counts = script_counts(
+        list(analyzer.counter), list(analyzer.counter.values())
+    )
+
+    analysis = LyricsAnalysis(
+        track_id=track_id,
+        word_count=stats.word_count,
+        most_common=stats.most_common,
+        char_counts=stats.char_counts,
+        script_token_counts=script_token_counts,
+        unique_words=stats.unique_words,
+        unique_words_count=len(stats.unique_words),
+        repeated_phrases=analyzer.repeated_phrases(),
+        repeated_ngrams=analyzer.repeated_ngrams(),
+        repetition=analyzer.repetition(),
+        timeline=analyzer.timeline,
+    )
+    return analysis, analyzer
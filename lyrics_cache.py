@@ -0,0 +1,223 @@
+"""Raw lyrics payloads per track id, kept between runs.
+
+``LyricsCache`` is a SQLite file, shared by the processes on one host.
+With ``REDIS_URL`` set, ``default_lyrics_cache`` returns a
+``SharedLyricsCache`` on Redis instead, so replicas on different hosts
+fetch each track's lyrics once between them.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Callable, Optional, Union
+
+import metrics
+from cache_backends import JsonCodec, RedisCache
+from caching import Cache
+
+# Sentinel returned by LyricsCache.get for a cached "no lyrics" result.
+NO_LYRICS = object()
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_NEGATIVE_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class LyricsCache:
+    """Persistent lyrics cache keyed by Spotify track id, backed by SQLite.
+
+    Payloads are stored as zlib-compressed JSON. Entries expire after ``ttl``
+    seconds, or ``negative_ttl`` seconds for tracks without lyrics. When the
+    stored payloads exceed ``max_bytes`` the least recently used entries are
+    evicted.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = DEFAULT_TTL_SECONDS,
+        negative_ttl: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS lyrics (
+                track_id TEXT PRIMARY KEY,
+                payload BLOB,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS lyrics_last_access ON lyrics (last_access)"
+        )
+        self._conn.commit()
+
+    def get(self, track_id: str):
+        """Returns the cached lyrics, ``NO_LYRICS`` or ``None`` on a miss."""
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, expires_at FROM lyrics WHERE track_id = ?",
+                (track_id,),
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute(
+                        "DELETE FROM lyrics WHERE track_id = ?", (track_id,)
+                    )
+                    self._conn.commit()
+                self.misses += 1
+                metrics.cache_lookup("lyrics", hit=False)
+                return None
+
+            self._conn.execute(
+                "UPDATE lyrics SET last_access = ? WHERE track_id = ?",
+                (now, track_id),
+            )
+            self._conn.commit()
+            self.hits += 1
+        metrics.cache_lookup("lyrics", hit=True)
+
+        payload = row[0]
+        if payload is None:
+            return NO_LYRICS
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    def set(self, track_id: str, lyrics):
+        """Stores lyrics for a track, or a negative entry if ``lyrics`` is None."""
+        now = self._clock()
+        if lyrics is None:
+            payload, ttl = None, self.negative_ttl
+        else:
+            payload = zlib.compress(json.dumps(lyrics).encode("utf-8"))
+            ttl = self.ttl
+        size = len(payload) if payload else 0
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lyrics VALUES (?, ?, ?, ?, ?)",
+                (track_id, payload, size, now + ttl, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM lyrics"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        self._conn.close()
+
+    def _evict(self):
+        # Must be called with self._lock held.
+        self._conn.execute("DELETE FROM lyrics WHERE expires_at <= ?", (self._clock(),))
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM lyrics"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        rows = self._conn.execute(
+            "SELECT track_id, size FROM lyrics ORDER BY last_access"
+        ).fetchall()
+        evicted = []
+        for track_id, size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((track_id,))
+            total -= size
+        self._conn.executemany("DELETE FROM lyrics WHERE track_id = ?", evicted)
+
+
+class SharedLyricsCache:
+    """``LyricsCache``'s interface over a shared cache backend.
+
+    Lyrics and "no lyrics" entries live in two caches, so that each can
+    have its own TTL. Size is bounded by the backend (e.g. Redis'
+    ``maxmemory`` policy), not by ``max_bytes``.
+    """
+
+    def __init__(self, lyrics: Cache, negatives: Cache):
+        self.lyrics = lyrics
+        self.negatives = negatives
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, track_id: str):
+        """Returns the cached lyrics, ``NO_LYRICS`` or ``None`` on a miss."""
+        lyrics = self.lyrics.get(track_id)
+        if lyrics is None and self.negatives.get(track_id) is not None:
+            lyrics = NO_LYRICS
+        hit = lyrics is not None
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        metrics.cache_lookup("lyrics", hit=hit)
+        return lyrics
+
+    def set(self, track_id: str, lyrics):
+        """Stores lyrics for a track, or a negative entry if ``lyrics`` is None."""
+        if lyrics is None:
+            self.negatives.set(track_id, True)
+        else:
+            self.lyrics.set(track_id, lyrics)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.lyrics.close()
+        self.negatives.close()
+
+
+def default_lyrics_cache() -> Optional[Union[LyricsCache, SharedLyricsCache]]:
+    """Builds the cache configured through environment variables.
+
+    Set ``LYRICS_CACHE_PATH`` to an empty string to disable caching. With
+    ``REDIS_URL`` set, lyrics are cached in Redis instead.
+    """
+    ttl = float(os.getenv("LYRICS_CACHE_TTL", DEFAULT_TTL_SECONDS))
+    negative_ttl = float(
+        os.getenv("LYRICS_CACHE_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL_SECONDS)
+    )
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return SharedLyricsCache(
+            RedisCache.from_url(redis_url, "lyrics", JsonCodec(), ttl=ttl),
+            RedisCache.from_url(redis_url, "no_lyrics", JsonCodec(), ttl=negative_ttl),
+        )
+
+    path = os.getenv("LYRICS_CACHE_PATH", ".lyrics_cache.sqlite3")
+    if not path:
+        return None
+    return LyricsCache(
+        path,
+        ttl=ttl,
+        negative_ttl=negative_ttl,
+        max_bytes=int(os.getenv("LYRICS_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+    )
@@ -0,0 +1,297 @@
+import atexit
+import os
+import sqlite3
+import threading
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from phrases import tokenize
+
+DEFAULT_BATCH_SIZE = 500
+# Stays below SQLite's default limit of 999 bound parameters.
+_MAX_PARAMETERS = 900
+
+
+def _chunks(items: Sequence, size: int = _MAX_PARAMETERS):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _placeholders(items: Sequence) -> str:
+    return ",".join("?" * len(items))
+
+
+def _decode_postings(rows: List[Tuple[int, bytes]]) -> np.ndarray:
+    """``song << 32 | position`` keys for every occurrence in the posting rows."""
+    if not rows:
+        return np.empty(0, dtype=np.int64)
+    songs, blobs = zip(*rows)
+    positions = np.frombuffer(b"".join(blobs), dtype=np.uint32).astype(np.int64)
+    lengths = np.fromiter(map(len, blobs), dtype=np.int64, count=len(blobs)) // 4
+    return (np.repeat(np.array(songs, dtype=np.int64), lengths) << 32) | positions
+
+
+def _phrase_starts(keys: np.ndarray, offset: int) -> np.ndarray:
+    """Sorted phrase start keys for a word at ``offset`` within the phrase."""
+    return np.sort(keys[(keys & 0xFFFFFFFF) >= offset] - offset)
+
+
+class LyricsIndex:
+    """Persistent inverted index of analyzed songs, backed by SQLite.
+
+    Every word maps to a posting list of ``(song, occurrences, positions)``,
+    which answers "which songs repeat this word most" with a single index
+    range scan and "which songs share this phrase" by intersecting the
+    posting lists of its words, rarest first.
+
+    Songs are buffered and written ``batch_size`` at a time, in a single
+    transaction; queries flush pending songs first. Re-adding a track
+    replaces its postings. ``compact`` drops words no song uses any more and
+    reclaims the freed pages.
+    """
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[str]] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS songs (
+                song INTEGER PRIMARY KEY,
+                track_id TEXT UNIQUE NOT NULL,
+                word_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS words (
+                word_id INTEGER PRIMARY KEY,
+                word TEXT UNIQUE NOT NULL,
+                songs INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                word_id INTEGER NOT NULL,
+                song INTEGER NOT NULL,
+                occurrences INTEGER NOT NULL,
+                positions BLOB NOT NULL,
+                PRIMARY KEY (word_id, song)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_occurrences
+                ON postings (word_id, occurrences DESC);
+            CREATE INDEX IF NOT EXISTS postings_song ON postings (song);
+            """)
+        self._conn.commit()
+
+    def add(self, track_id: str, words: Iterable[str]):
+        """Queues a song's words, in lyric order, for indexing."""
+        with self._lock:
+            self._pending[track_id] = list(words)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def add_text(self, track_id: str, text: str):
+        self.add(track_id, tokenize(text))
+
+    def remove(self, track_id: str):
+        with self._lock:
+            self._pending.pop(track_id, None)
+            self._remove([track_id])
+            self._conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def compact(self):
+        """Drops unused words, then rebuilds the file and its statistics."""
+        with self._lock:
+            self._flush()
+            self._conn.execute("DELETE FROM words WHERE songs = 0")
+            self._conn.commit()
+            self._conn.execute("VACUUM")
+            self._conn.execute("ANALYZE")
+
+    def songs_repeating(self, word: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Songs containing ``word``, as ``(track_id, occurrences)``, most first."""
+        with self._lock:
+            self._flush()
+            return self._conn.execute(
+                """
+                SELECT songs.track_id, postings.occurrences
+                FROM words
+                JOIN postings ON postings.word_id = words.word_id
+                JOIN songs ON songs.song = postings.song
+                WHERE words.word = ?
+                ORDER BY postings.occurrences DESC
+                LIMIT ?
+                """,
+                (word.lower(), limit),
+            ).fetchall()
+
+    def songs_sharing(self, phrase: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Songs containing ``phrase``, as ``(track_id, occurrences)``, most first."""
+        words = tokenize(phrase)
+        if not words:
+            return []
+
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                f"SELECT word, word_id, songs FROM words "
+                f"WHERE word IN ({_placeholders(set(words))})",
+                list(set(words)),
+            ).fetchall()
+            if len(rows) < len(set(words)):
+                return []
+            word_ids = {word: (word_id, songs) for word, word_id, songs in rows}
+
+            # Offsets of each word within the phrase, rarest word first, so
+            # the candidate set shrinks as fast as possible.
+            offsets = defaultdict(list)
+            for offset, word in enumerate(words):
+                offsets[word].append(offset)
+            order = sorted(offsets, key=lambda word: word_ids[word][1])
+
+            # Candidate phrase starts, encoded as song << 32 | position.
+            starts: Optional[np.ndarray] = None
+            for word in order:
+                songs = None if starts is None else np.unique(starts >> 32)
+                occurrences = _decode_postings(self._postings(word_ids[word][0], songs))
+                for offset in offsets[word]:
+                    keys = _phrase_starts(occurrences, offset)
+                    starts = (
+                        keys
+                        if starts is None
+                        else np.intersect1d(starts, keys, assume_unique=True)
+                    )
+                if not len(starts):
+                    return []
+
+            songs, counts = np.unique(starts >> 32, return_counts=True)
+            ranked = np.argsort(-counts, kind="stable")[:limit]
+            track_ids = dict(
+                self._conn.execute(
+                    f"SELECT song, track_id FROM songs "
+                    f"WHERE song IN ({_placeholders(ranked)})",
+                    [int(songs[i]) for i in ranked],
+                ).fetchall()
+            )
+        return [(track_ids[int(songs[i])], int(counts[i])) for i in ranked]
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._flush()
+            songs, words, postings = self._conn.execute("""
+                SELECT (SELECT COUNT(*) FROM songs),
+                       (SELECT COUNT(*) FROM words WHERE songs > 0),
+                       (SELECT COUNT(*) FROM postings)
+                """).fetchone()
+        return {"songs": songs, "words": words, "postings": postings}
+
+    def close(self):
+        with self._lock:
+            self._flush()
+        self._conn.close()
+
+    def _postings(self, word_id: int, songs: Optional[np.ndarray]) -> List[Tuple]:
+        # Must be called with self._lock held. Scanning the whole posting
+        # list beats many IN (...) lookups once there are many candidates.
+        query = "SELECT song, positions FROM postings WHERE word_id = ?"
+        if songs is None or len(songs) > _MAX_PARAMETERS:
+            return self._conn.execute(query, (word_id,)).fetchall()
+        songs = songs.tolist()
+        return self._conn.execute(
+            f"{query} AND song IN ({_placeholders(songs)})", [word_id, *songs]
+        ).fetchall()
+
+    def _remove(self, track_ids: List[str]):
+        # Must be called with self._lock held.
+        songs = []
+        for chunk in _chunks(track_ids):
+            songs += [
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT song FROM songs WHERE track_id IN ({_placeholders(chunk)})",
+                    chunk,
+                )
+            ]
+        for chunk in _chunks(songs):
+            placeholders = _placeholders(chunk)
+            self._conn.execute(
+                f"""
+                UPDATE words SET songs = songs - (
+                    SELECT COUNT(*) FROM postings
+                    WHERE postings.word_id = words.word_id
+                    AND postings.song IN ({placeholders})
+                ) WHERE word_id IN (
+                    SELECT word_id FROM postings WHERE song IN ({placeholders})
+                )
+                """,
+                chunk + chunk,
+            )
+            self._conn.execute(
+                f"DELETE FROM postings WHERE song IN ({placeholders})", chunk
+            )
+            self._conn.execute(
+                f"DELETE FROM songs WHERE song IN ({placeholders})", chunk
+            )
+
+    def _flush(self):
+        # Must be called with self._lock held.
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+
+        self._remove(list(pending))
+        vocabulary = sorted({word for words in pending.values() for word in words})
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO words (word) VALUES (?)",
+            ((word,) for word in vocabulary),
+        )
+        word_ids = {}
+        for chunk in _chunks(vocabulary):
+            word_ids.update(
+                self._conn.execute(
+                    f"SELECT word, word_id FROM words WHERE word IN ({_placeholders(chunk)})",
+                    chunk,
+                )
+            )
+
+        postings = []
+        song_counts = defaultdict(int)
+        for track_id, words in pending.items():
+            song = self._conn.execute(
+                "INSERT INTO songs (track_id, word_count) VALUES (?, ?)",
+                (track_id, len(words)),
+            ).lastrowid
+            positions = defaultdict(lambda: array("I"))
+            for position, word in enumerate(words):
+                positions[word].append(position)
+            for word, word_positions in positions.items():
+                word_id = word_ids[word]
+                song_counts[word_id] += 1
+                postings.append(
+                    (word_id, song, len(word_positions), word_positions.tobytes())
+                )
+
+        self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", postings)
+        self._conn.executemany(
+            "UPDATE words SET songs = songs + ? WHERE word_id = ?",
+            ((count, word_id) for word_id, count in song_counts.items()),
+        )
+        self._conn.commit()
+
+
+def default_lyrics_index() -> Optional[LyricsIndex]:
+    """Builds the index configured through ``LYRICS_INDEX_PATH``, if set."""
+    path = os.getenv("LYRICS_INDEX_PATH")
+    if not path:
+        return None
+    index = LyricsIndex(
+        path, batch_size=int(os.getenv("LYRICS_INDEX_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    )
+    # Songs still buffered at shutdown would otherwise be lost.
+    atexit.register(index.close)
+    return index
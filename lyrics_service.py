@@ -1,20 +1,26 @@
 import json
 import os
-import re
 import logging
-from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Optional, Tuple
 
-import requests
 from dotenv import load_dotenv
-from lingua import Language, LanguageDetectorBuilder
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
+import language_detection
+from cache_backends import BytesCodec, ModelCodec, default_cache
+from caching import Cache
+from corpus_stats import CorpusStats, dominant_language
+from http_client import RETRY_STATUS_CODES, HttpClient, parse_retry_after
+import lyrics_analysis
+import metrics
+from lyrics_analysis import ANALYSIS_VERSION, LyricsAnalysis
+from lyrics_cache import NO_LYRICS, LyricsCache
+from lyrics_index import LyricsIndex
+from scheduler import SCHEDULER, CircuitOpenError, RateLimitedError, RequestScheduler
+from text_analysis import analyze_text
+from word_cloud import WordCloudRenderer
 from SpotifyService.spotify_service import SpotifyService
-from streamlit.logger import get_logger
 
-
-LOGGER = get_logger(__file__)
-LOGGER.setLevel(logging.DEBUG)
+LOGGER = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -24,9 +30,54 @@ SP_DC = os.getenv("SP_DC")
 SP_KEY = os.getenv("SP_KEY")
 LYRICS_URL = os.getenv("LYRICS_URL")
 
+# Analyses are shared by every LyricsService instance, i.e. across reruns.
+# With SHARED_CACHE_PATH or REDIS_URL set they are also shared across replicas.
+ANALYSIS_CACHE = default_cache(
+    "analysis",
+    ModelCodec(LyricsAnalysis),
+    maxsize=int(os.getenv("ANALYSIS_CACHE_SIZE", 128)),
+)
+# Pooled connections to the lyrics endpoint, shared the same way. 429s are
+# not retried here: they go back to the scheduler, which pauses the endpoint.
+HTTP_CLIENT = HttpClient(
+    max_per_host=int(os.getenv("LYRICS_MAX_CONCURRENCY", 8)),
+    retry_status_codes=RETRY_STATUS_CODES - {429},
+)
+WORD_CLOUD_RENDERER = WordCloudRenderer(
+    processes=int(os.getenv("WORD_CLOUD_PROCESSES", 2)),
+    cache=default_cache("word_cloud", BytesCodec(), maxsize=256),
+)
+
 
 class LyricsService:
+    def __init__(
+        self,
+        cache: Optional[LyricsCache] = None,
+        analysis_cache: Cache = ANALYSIS_CACHE,
+        http_client: HttpClient = HTTP_CLIENT,
+        word_cloud_renderer: WordCloudRenderer = WORD_CLOUD_RENDERER,
+        index: Optional[LyricsIndex] = None,
+        corpus_stats: Optional[CorpusStats] = None,
+        scheduler: RequestScheduler = SCHEDULER,
+    ):
+        self.cache = cache
+        self.analysis_cache = analysis_cache
+        self.http_client = http_client
+        self.word_cloud_renderer = word_cloud_renderer
+        self.index = index
+        self.corpus_stats = corpus_stats
+        self.scheduler = scheduler
+
+    @metrics.timed("lyrics.get_lyrics")
     def get_lyrics(self, track_id: str):
+        if self.cache:
+            cached = self.cache.get(track_id)
+            if cached is NO_LYRICS:
+                LOGGER.debug(f"No lyrics found (cached) for track {track_id}.")
+                return
+            if cached is not None:
+                return {"lyrics": cached}
+
         access = SpotifyService.get_access(SP_DC, SP_KEY)
         url = LYRICS_URL + f"{track_id}"
 
@@ -38,123 +89,189 @@ class LyricsService:
         }
 
         try:
-
-            response = requests.get(url, headers=headers, params=querystring)
-            data = response.content.decode("utf-8")
-            result = json.loads(data)
-
-            return result
-
+            result = self.scheduler.run(
+                "lyrics",
+                lambda: self._request_lyrics(url, headers, querystring),
+                key=track_id,
+            )
+        except (CircuitOpenError, RateLimitedError) as ex:
+            # Not a missing track: raised so that no cache, including the
+            # analysis cache, records it as one, and it is retried later.
+            LOGGER.warning(f"Lyrics for track {track_id} unavailable: {ex}")
+            raise
         except Exception as ex:
             LOGGER.debug(f"No lyrics found. Exception: {ex}")
             return
 
-    def combined_lyrics(self, lyrics_response: object) -> dict:
-        # TODO: return isRtlLanguage=True (arabic)
-        lyric_dict = defaultdict(str)
-
-        for index, line in enumerate(lyrics_response["lyrics"]["lines"]):
-            words = line["words"]
-            if words and words != "♪":  # Check if words is not empty
-                lyric_dict[str(index)] = words
+        if result is None:
+            LOGGER.debug(f"No lyrics found for track {track_id}.")
+            if self.cache:
+                self.cache.set(track_id, None)
+            return
 
-        return lyric_dict
+        if self.cache:
+            self.cache.set(track_id, result.get("lyrics"))
+
+        return result
+
+    def _request_lyrics(self, url: str, headers: dict, params: dict) -> Optional[dict]:
+        """Returns the lyrics response, or None when the track has no lyrics."""
+        response = self._get(url, headers, params)
+        if response.status_code == 401:
+            # The token was revoked before it expired: fetch a new one and
+            # retry once.
+            SpotifyService.invalidate_access(SP_DC, SP_KEY)
+            access = SpotifyService.get_access(SP_DC, SP_KEY)
+            response = self._get(
+                url, {**headers, "Authorization": f"Bearer {access}"}, params
+            )
+        if response.status_code == 404:
+            return None
+        if response.status_code == 429:
+            raise RateLimitedError(parse_retry_after(response))
+
+        response.raise_for_status()
+        data = response.content.decode("utf-8")
+        return json.loads(data)
+
+    def _get(self, url: str, headers: dict, params: dict):
+        with metrics.timer("lyrics.http"):
+            try:
+                response = self.http_client.get(url, headers=headers, params=params)
+            except Exception:
+                metrics.upstream_error("lyrics")
+                raise
+        if response.status_code >= 400:
+            metrics.upstream_error("lyrics", response.status_code)
+        return response
+
+    def get_lyrics_many(
+        self, track_ids: Iterable[str], max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[str, Optional[dict]]]:
+        """Fetches lyrics for many tracks concurrently.
+
+        Yields ``(track_id, lyrics)`` pairs in completion order; ``lyrics`` is
+        ``None`` when the track has no lyrics or the request failed, including
+        when the endpoint is rate limited.
+        ``track_ids`` is consumed lazily and at most ``2 * max_workers``
+        requests are in flight, so only that many payloads are held at once.
+        """
+        max_workers = max_workers or self.http_client.max_per_host
+        track_ids = iter(track_ids)
+        seen = set()
+        futures = {}
+
+        def submit(executor):
+            while len(futures) < 2 * max_workers:
+                track_id = next((i for i in track_ids if i not in seen), None)
+                if track_id is None:
+                    return
+                seen.add(track_id)
+                futures[executor.submit(self.get_lyrics, track_id)] = track_id
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                submit(executor)
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        track_id = futures.pop(future)
+                        submit(executor)
+                        try:
+                            result = future.result()
+                        except (CircuitOpenError, RateLimitedError):
+                            result = None
+                        yield track_id, result
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def analyze(self, track_id: str) -> Optional[LyricsAnalysis]:
+        """Fetches and analyzes a track, memoized per track id and analysis version.
+
+        Returns ``None`` when the track has no lyrics. Raises
+        ``CircuitOpenError`` or ``RateLimitedError`` while the lyrics endpoint
+        is paused, so that nothing is memoized.
+        """
+        # A click on a track being prefetched waits for the prefetch in the
+        # cache, not in the scheduler, so move its lyrics request up here.
+        self.scheduler.promote("lyrics", track_id)
+        return self.analysis_cache.get_or_compute(
+            (track_id, ANALYSIS_VERSION), lambda: self._analyze(track_id)
+        )
 
-    def find_repeated_phrases(self, lyrics: dict):
-        phrase_count = defaultdict(int)
+    @metrics.timed("lyrics.analyze")
+    def _analyze(self, track_id: str) -> Optional[LyricsAnalysis]:
+        result = self.get_lyrics(track_id)
+        if not result:
+            return
 
-        # Count occurrences of each phrase
-        for key, phrase in lyrics.items():
-            phrase_count[phrase.lower()] += 1
+        with metrics.timer("lyrics.analysis"):
+            analysis, analyzer = lyrics_analysis.analyze_lines(track_id, result)
+        LOGGER.debug(f"Word counter: {analysis.most_common}")
+
+        # The index and the corpus stats reuse the analyzer's words and counts.
+        if self.index:
+            with metrics.timer("lyrics.index"):
+                self.index.add(track_id, analyzer.words)
+
+        if language_detection.is_enabled():
+            with metrics.timer("lyrics.language_detection"):
+                analysis.language_percentages = language_detection.language_percentages(
+                    self.combined_lyrics(result).values()
+                )
+
+        if self.corpus_stats:
+            with metrics.timer("lyrics.corpus_stats"):
+                counts = analyzer.counter
+                language = dominant_language(analysis.language_percentages)
+                self.corpus_stats.add(track_id, counts, language)
+                analysis.tfidf_words = self.corpus_stats.tfidf(counts, language)
+                analysis.log_odds_words = self.corpus_stats.log_odds(counts, language)
+
+        with metrics.timer("lyrics.word_cloud"):
+            (
+                analysis.most_common_cloud,
+                analysis.unique_words_cloud,
+            ) = self.word_cloud_renderer.render_many(
+                [analysis.most_common, {word: 1 for word in analysis.unique_words}]
+            )
 
-        # Find phrases that are repeated
-        repeated_phrases = {
-            phrase: count for phrase, count in phrase_count.items() if count > 1
-        }
+        return analysis
 
-        sorted_repeated_phrases = sorted(
-            repeated_phrases.items(), key=lambda item: item[1], reverse=True
-        )
+    @metrics.timed("lyrics.combined_lyrics")
+    def combined_lyrics(self, lyrics_response: object) -> dict:
+        return lyrics_analysis.combined_lyrics(lyrics_response)
 
-        return phrase_count, sorted_repeated_phrases
+    @metrics.timed("lyrics.find_repeated_phrases")
+    def find_repeated_phrases(self, lyrics: dict):
+        return lyrics_analysis.find_repeated_phrases(lyrics)
 
+    @metrics.timed("lyrics.count_most_common")
     def count_most_common(
         self, formatted_lyrics
-    ) -> tuple[int, list[tuple[str, int]], dict[str, int]]:
-        # Split the string by commas, parentheses, question marks, double quotes, exclamation marks, spaces
-        words_list = re.split(r'[,"\s()\?!]+', formatted_lyrics)
-
-        count = len(words_list)
-
-        words_list = [word.lower() for word in words_list if word]
-        counter = Counter(words_list).most_common(10)
-        LOGGER.debug(f"Word counter: {counter}")
-        unique_words = [
-            word for word, count in Counter(words_list).items() if count == 1
-        ]
-        unique_words_count = len(unique_words)
-        LOGGER.debug(f"Unique words: {unique_words}")
-
-        # Regular expressions to detect Korean, Chinese, and Japanese characters
-        korean_pattern = re.compile(r"[\uac00-\ud7af]")
-        chinese_pattern = re.compile(r"[\u4e00-\u9fff]")
-        japanese_pattern = re.compile(r"[\u3040-\u309f\u30a0-\u30ff]")
-
-        # Find all Korean, Chinese, and Japanese characters in the formatted_lyrics
-        korean_chars = korean_pattern.findall(" ".join(words_list))
-        chinese_chars = chinese_pattern.findall(formatted_lyrics)
-        japanese_chars = japanese_pattern.findall(formatted_lyrics)
-
-        # Count the number of Korean, Chinese, and Japanese characters
-        korean_char_count = len(korean_chars)
-        chinese_char_count = len(chinese_chars)
-        japanese_char_count = len(japanese_chars)
-
-        # Create a dictionary to store counts and labels
-        char_counts = {
-            "Korean": korean_char_count,
-            "Chinese": chinese_char_count,
-            "Japanese": japanese_char_count,
-        }
-
-        # Filter out languages with zero counts
-        char_counts = {k: v for k, v in char_counts.items() if v > 0}
-
-        return count, counter, char_counts, unique_words, unique_words_count
-
-    def create_word_cloud(self, word_count):
-        word_freq = dict(word_count)
-
-        # Generate word cloud
-        wordcloud = WordCloud(
-            font_path="AppleGothic.ttf",
-            stopwords=None,
-            width=800,
-            height=400,
-            background_color="white",
-            regexp=r"[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff\uac00-\ud7af]+",
-        ).generate_from_frequencies(word_freq)
-
-        # Display the word cloud using matplotlib
-        fig, ax = plt.subplots()
-        ax.imshow(wordcloud)
-        ax.axis("off")
-
-        return fig
-
-    def detect_language(self, formatted_lyrics):
-        languages = [Language.ENGLISH, Language.KOREAN]
-        detector = LanguageDetectorBuilder.from_all_languages().build()
-
-        sentence = formatted_lyrics.replace("\n", " ")
-        print(f"\n\n ==>> sentence: {sentence}")
+    ) -> tuple[int, list[tuple[str, int]], dict[str, int], list[str], int]:
+        stats = analyze_text(formatted_lyrics, top_n=10)
+        LOGGER.debug(f"Word counter: {stats.most_common}")
+        LOGGER.debug(f"Unique words: {stats.unique_words}")
+
+        return (
+            stats.word_count,
+            stats.most_common,
+            stats.char_counts,
+            stats.unique_words,
+            len(stats.unique_words),
+        )
 
-        for result in detector.detect_multiple_languages_of(sentence):
-            print(
-                f"{result.language.name}: '{sentence[result.start_index:result.end_index]}'"
-            )
+    @metrics.timed("lyrics.word_cloud")
+    def render_word_cloud(self, word_count) -> bytes:
+        """Renders a word cloud to PNG bytes."""
+        return self.word_cloud_renderer.render(word_count)
 
-        return
+    @metrics.timed("lyrics.language_detection")
+    def detect_language(self, formatted_lyrics) -> dict[str, float]:
+        """Returns the percentage of words per detected language."""
+        return language_detection.language_percentages(formatted_lyrics.split("\n"))
 
 
 if __name__ == "__main__":
@@ -1,3 +1,5 @@
+import contextlib
+import json
 import logging
 import os
 from typing import List
@@ -8,22 +10,125 @@ from dotenv import load_dotenv
 from datetime import datetime
 from streamlit_card import card
 
+import language_detection
+import metrics
+import prefetch
+import selection
+from cache_backends import ModelCodec, default_cache
+from corpus_stats import default_corpus_stats
+from lyrics_cache import default_lyrics_cache
+from lyrics_index import default_lyrics_index
 from lyrics_service import LyricsService
+from scheduler import CircuitOpenError, RateLimitedError
+from SpotifyService.schemas import ConvertedSpotifySearchPage
 from SpotifyService.spotify_service import SpotifyService
 
 from streamlit.logger import get_logger
 
 LOGGER = get_logger(__file__)
 LOGGER.setLevel(logging.DEBUG)
+# The services log through the standard logging module; route them to Streamlit.
+for service_logger in ("lyrics_service", "SpotifyService"):
+    get_logger(service_logger).setLevel(logging.DEBUG)
 
 load_dotenv()
 
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
+SEARCH_CACHE_TTL = 60 * 60
+DEBUG_PANEL_ENABLED = os.getenv("DEBUG_PANEL_ENABLED", "").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+
+@st.cache_resource
+def get_lyrics_cache():
+    return default_lyrics_cache()
+
+
+@st.cache_resource
+def get_lyrics_index():
+    return default_lyrics_index()
+
+
+@st.cache_resource
+def get_corpus_stats():
+    return default_corpus_stats()
+
+
+@st.cache_resource
+def get_search_cache():
+    return default_cache(
+        "search",
+        ModelCodec(ConvertedSpotifySearchPage),
+        maxsize=256,
+        ttl=float(os.getenv("SEARCH_CACHE_TTL", SEARCH_CACHE_TTL)),
+    )
+
+
+@st.cache_resource
+def preload_language_detector():
+    language_detection.preload()
+
+
+@st.cache_resource
+def get_lyrics_service():
+    # Shared by the page and the prefetcher: both write to the analysis cache,
+    # so both must add the track to the index and the corpus stats.
+    return LyricsService(
+        cache=get_lyrics_cache(),
+        index=get_lyrics_index(),
+        corpus_stats=get_corpus_stats(),
+    )
+
 
+@st.cache_resource
+def get_prefetcher():
+    return prefetch.Prefetcher(get_lyrics_service())
 
-spotify = SpotifyService(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
-lyric_service = LyricsService()
+
+@contextlib.contextmanager
+def traced(event: str):
+    """Keeps the stage timings of the block for the debug panel and logs."""
+    if not DEBUG_PANEL_ENABLED and not metrics.REGISTRY.enabled:
+        yield
+        return
+    with metrics.trace() as stages:
+        yield
+    st.session_state[f"{event}_stages"] = stages
+    if metrics.REGISTRY.enabled:
+        LOGGER.info(json.dumps({"event": event, "stages": stages}))
+
+
+def analyze(track_id: str):
+    with traced("analysis"):
+        return lyric_service.analyze(track_id)
+
+
+def show_debug_panel(event: str):
+    if not DEBUG_PANEL_ENABLED:
+        return
+    with st.expander(f"Debug: {event} stage timings"):
+        stages = st.session_state.get(f"{event}_stages")
+        if stages:
+            df = pd.DataFrame(
+                [(stage, seconds * 1000) for stage, seconds in stages],
+                columns=["Stage", "Milliseconds"],
+            )
+            st.dataframe(df.style.hide(axis="index"))
+        else:
+            st.write("Served from cache, no stages ran.")
+        if metrics.REGISTRY.enabled:
+            st.code(metrics.REGISTRY.prometheus_text(), language="text")
+
+
+preload_language_detector()
+spotify = SpotifyService(
+    SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, cache=get_search_cache()
+)
+lyric_service = get_lyrics_service()
 
 st.title(f"Song Lyrics Analysis")
 st.write(f"Search for any track title, artist(s) name, or album.")
@@ -55,11 +160,39 @@ if submitted:
         )
 
     else:
-        search_results = spotify.search(
-            track=track_input, artist=artists_input, album=album_input
-        )
+        # A new search supersedes whatever the previous one queued.
+        for previous_batch in st.session_state.pop("prefetch_batches", []):
+            previous_batch.cancel()
+        selection.set_results(st.session_state, [])
+
+        # Cards are rendered page by page, while the next page is fetched.
+        shown = 0
+        with traced("search"):
+            for page in spotify.iter_search_pages(
+                track=track_input,
+                artist=artists_input,
+                album=album_input,
+                max_results=selection.MAX_RESULTS,
+            ):
+                # Pages can repeat a track; each card is rendered once.
+                results = selection.add_results(st.session_state, page.results)
+                if prefetch.is_enabled():
+                    st.session_state.setdefault("prefetch_batches", []).append(
+                        get_prefetcher().prefetch([result.id for result in results])
+                    )
 
-        if not search_results:
+                # display results equally
+                for result in results:
+                    with col1 if shown % 2 == 0 else col2:
+                        card(
+                            title=result.track_name,
+                            text=f"Song by {result.artist}",
+                            image=result.album_image,
+                            key=selection.card_key(result.id),
+                        )
+                    shown += 1
+
+        if not shown:
             if track_input:
                 st.warning(
                     f"No search results found for Track title: _**{track_input}**_."
@@ -73,116 +206,165 @@ if submitted:
             if album_input:
                 st.warning(f"No search results found for Album: _**{album_input}**_.")
 
-        # Initialize session state for each track
-        for index, result in enumerate(search_results):
-            track_id = result.id
-            track_name = result.track_name
-            album_image = result.album_image
-            artist = result.artist
-            if track_id not in st.session_state:
-                st.session_state[track_id] = track_name
-                st.session_state[f"{track_id}_track_name"] = track_name
-                st.session_state[f"{track_id}_album_image"] = album_image
-                st.session_state[f"{track_id}_artist"] = artist
-
-            # display results equally
-            if index % 2 == 0:
-                with col1:
-                    card_result = card(
-                        title=track_name,
-                        text=f"Song by {artist}",
-                        image=album_image,
-                        key=track_id,
-                    )
-            else:
-                with col2:
-                    card_result = card(
-                        title=track_name,
-                        text=f"Song by {artist}",
-                        image=album_image,
-                        key=track_id,
+        show_debug_panel("search")
+
+
+# The analysis is only shown when no search was just submitted.
+if not submitted:
+    selected = selection.update_selection(st.session_state)
+    if selected:
+        try:
+            analysis = selection.selected_analysis(st.session_state, analyze)
+            rate_limited = False
+        except (CircuitOpenError, RateLimitedError) as ex:
+            LOGGER.warning(f"Lyrics endpoint paused: {ex}")
+            analysis = None
+            rate_limited = True
+        show_debug_panel("analysis")
+
+        if rate_limited:
+            st.warning(
+                f"Lyrics are rate limited right now, retry _**{selected.track_name}**_ shortly."
+            )
+        elif not analysis:
+            LOGGER.debug(f"No lyrics found for track _**{selected.track_name}**_.")
+            st.error(f"No lyrics found for track _**{selected.track_name}**_.")
+        else:
+            card(
+                title=selected.track_name,
+                text=f"Song by {selected.artist}",
+                image=selected.album_image,
+                styles={"card": {"pointer-events": "none"}},
+            )
+            LOGGER.info(
+                f"Search for title: {selected.track_name} by {selected.artist} at {datetime.now()}"
+            )
+
+            if analysis.char_counts:
+                st.subheader(
+                    f"Word Counts: {analysis.word_count}", divider="rainbow"
+                )
+                for language, char_count in analysis.char_counts.items():
+                    st.subheader(
+                        f"{language} Character Counts: {char_count}",
+                        divider="rainbow",
                     )
 
-
-# omit form, and Check if "FormSubmitter:search_form-Search" is False
-if not st.session_state.get("FormSubmitter:search_form-Search"):
-    # Find the key with a value of True (for card is clicked)
-    for key, value in st.session_state.items():
-
-        if value is True and key != "FormSubmitter:search_form-Search":
-            result = lyric_service.get_lyrics(key)
-
-            if not result:
-                LOGGER.debug(
-                    f"No lyrics found for track _**{st.session_state.get(f'{key}_track_name')}**_."
-                )
-                st.error(
-                    f"No lyrics found for track _**{st.session_state.get(f'{key}_track_name')}**_."
-                )
             else:
-                combined_lyrics = lyric_service.combined_lyrics(result)
+                st.subheader(
+                    f"Word Counts: {analysis.word_count}", divider="rainbow"
+                )
 
-                _, sorted_repeated_phrases = lyric_service.find_repeated_phrases(
-                    combined_lyrics
+            if len(analysis.script_token_counts) > 1:
+                st.write(
+                    "Words per script: "
+                    + ", ".join(
+                        f"{script} {count}"
+                        for script, count in analysis.script_token_counts.items()
+                    )
                 )
 
-                (
-                    word_count,
-                    most_common,
-                    char_counts,
-                    unique_words,
-                    unique_words_count,
-                ) = lyric_service.count_most_common("\n".join(combined_lyrics.values()))
-
-                card(
-                    title=f"{st.session_state.get(f'{key}_track_name')}",
-                    text="Song by " + f"{st.session_state.get(f'{key}_artist')}",
-                    image=f"{st.session_state.get(f'{key}_album_image')}",
-                    styles={"card": {"pointer-events": "none"}},
+            if analysis.repetition:
+                st.subheader(f"Repetitiveness:", divider="rainbow")
+                col_ratio, col_repeated, col_ttr, col_mtld = st.columns(4)
+                col_ratio.metric(
+                    "Compression ratio",
+                    f"{analysis.repetition.compression_ratio:.2f}",
+                    help="Raw size divided by zlib-compressed size; higher means more repetitive.",
                 )
-                LOGGER.info(
-                    f"Search for title: {st.session_state.get(f'{key}_track_name')} by {st.session_state.get(f'{key}_artist')} at {datetime.now()}"
+                col_repeated.metric(
+                    "Repeated words",
+                    f"{analysis.repetition.repeated_token_fraction:.0%}",
+                )
+                col_ttr.metric(
+                    "Type/token ratio",
+                    f"{analysis.repetition.type_token_ratio:.2f}",
+                )
+                col_mtld.metric(
+                    "MTLD",
+                    f"{analysis.repetition.mtld:.1f}",
+                    help="Measure of textual lexical diversity; lower means less varied vocabulary.",
                 )
 
-                if char_counts:
-                    st.subheader(f"Word Counts: {word_count}", divider="rainbow")
-                    for language, char_count in char_counts.items():
-                        st.subheader(
-                            f"{language} Character Counts: {char_count}",
-                            divider="rainbow",
-                        )
-
+            if len(analysis.timeline) > 1:
+                st.write(f"Share of repeated words as the song goes on:")
+                # Unsynced lyrics have no timestamps; fall back to line numbers.
+                if analysis.timeline[-1].start_time_ms:
+                    index = pd.Index(
+                        [point.start_time_ms / 1000 for point in analysis.timeline],
+                        name="Seconds",
+                    )
                 else:
-                    st.subheader(f"Word Counts: {word_count}", divider="rainbow")
-
-                st.subheader(
-                    f"Word Cloud for top 10 most repeated words:", divider="rainbow"
+                    index = pd.RangeIndex(1, len(analysis.timeline) + 1, name="Line")
+                st.line_chart(
+                    pd.DataFrame(
+                        {
+                            "Repeated words": [
+                                point.repeated_token_fraction
+                                for point in analysis.timeline
+                            ]
+                        },
+                        index=index,
+                    )
                 )
-                word_cloud_fig = lyric_service.create_word_cloud(most_common)
-                st.pyplot(word_cloud_fig)
 
-                df = pd.DataFrame(most_common, columns=["Word", "Count"])
+            if analysis.language_percentages:
+                st.subheader(f"Languages:", divider="rainbow")
+                for language, percentage in analysis.language_percentages.items():
+                    st.write(f"{language}: {percentage}% of words")
+
+            st.subheader(
+                f"Word Cloud for top 10 most repeated words:", divider="rainbow"
+            )
+            if analysis.most_common_cloud:
+                st.image(analysis.most_common_cloud)
+
+            df = pd.DataFrame(analysis.most_common, columns=["Word", "Count"])
+            df.index = range(1, len(df) + 1)
+            st.dataframe(df.style.hide(axis="index"))
+
+            if analysis.tfidf_words:
+                st.subheader(f"Most distinctive words:", divider="rainbow")
+                st.write(
+                    f"Words this track uses more than the other analyzed tracks, so common words like \"the\" drop out."
+                )
+                col_tfidf, col_log_odds = st.columns(2)
+                df = pd.DataFrame(analysis.tfidf_words, columns=["Word", "TF-IDF"])
                 df.index = range(1, len(df) + 1)
-                st.dataframe(df.style.hide(axis="index"))
-
-                st.subheader(f"Word Cloud for Unique words", divider="rainbow")
-                st.write(f"These are the words that appear only once in the track.")
-                st.write(f"Unique words count: {unique_words_count} words")
-                unique_word_cloud_fig = lyric_service.create_word_cloud(
-                    {word: 1 for word in unique_words}
+                col_tfidf.dataframe(df.style.hide(axis="index"))
+                df = pd.DataFrame(
+                    analysis.log_odds_words, columns=["Word", "Log-odds z-score"]
+                )
+                df.index = range(1, len(df) + 1)
+                col_log_odds.dataframe(df.style.hide(axis="index"))
+
+            st.subheader(f"Word Cloud for Unique words", divider="rainbow")
+            st.write(f"These are the words that appear only once in the track.")
+            st.write(f"Unique words count: {analysis.unique_words_count} words")
+            if analysis.unique_words_cloud:
+                st.image(analysis.unique_words_cloud)
+
+            st.subheader(f"Most repeated phrases:", divider="rainbow")
+            df = pd.DataFrame(
+                analysis.repeated_phrases, columns=["Phrase", "Repeated times"]
+            )
+            df.index = range(1, len(df) + 1)
+            st.dataframe(df.style.hide(axis="index"))
+
+            if analysis.repeated_ngrams:
+                st.subheader(f"Most repeated hooks:", divider="rainbow")
+                st.write(
+                    f"Word sequences of 3 to 12 words repeated anywhere in the track, also within or across lines."
                 )
-                st.pyplot(unique_word_cloud_fig)
-
-                st.subheader(f"Most repeated phrases:", divider="rainbow")
                 df = pd.DataFrame(
-                    sorted_repeated_phrases, columns=["Phrase", "Repeated times"]
+                    analysis.repeated_ngrams, columns=["Hook", "Repeated times"]
                 )
                 df.index = range(1, len(df) + 1)
                 st.dataframe(df.style.hide(axis="index"))
 
 
 else:
-    LOGGER.debug("FormSubmitter:search_form-Search is not True")
+    LOGGER.debug("Search submitted, the selected track is not shown")
 
 
 st.divider()
@@ -0,0 +1,250 @@
+"""Stage timings, counters and histograms for the services.
+
+Disabled unless ``METRICS_ENABLED`` is set. While disabled, ``timer`` and
+``timed`` cost a context variable lookup and ``inc`` returns immediately. ``trace`` collects the
+stage timings of a single request (for the debug panel) even when the
+process-wide metrics are off.
+
+Metrics are exported with ``prometheus_text`` or ``snapshot`` (JSON).
+"""
+
+import bisect
+import contextlib
+import contextvars
+import functools
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+STAGE_SECONDS = "stage_duration_seconds"
+# Upper bounds in seconds, from a cached lookup to a slow upstream call.
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# The (stage, seconds) list of the trace running in this context, if any.
+_trace = contextvars.ContextVar("metrics_trace", default=None)
+
+
+def is_enabled() -> bool:
+    return os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+class Histogram:
+    """Counts observations per bucket, Prometheus style (cumulative on export)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> Iterator[Tuple[float, int]]:
+        total = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            total += count
+            yield bound, total
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def counter(self, name: str, **labels: str) -> float:
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        """All metrics as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "buckets": {
+                            _format_bound(bound): count
+                            for bound, count in histogram.cumulative()
+                        },
+                    }
+                    for (name, labels), histogram in sorted(self._histograms.items())
+                ],
+            }
+
+    def prometheus_text(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+            for name in sorted({name for (name, _), _ in counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (counter_name, labels), value in counters:
+                    if counter_name == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name in sorted({name for (name, _), _ in histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (histogram_name, labels), histogram in histograms:
+                    if histogram_name != name:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        bucket_labels = labels + (("le", _format_bound(bound)),)
+                        lines.append(
+                            f"{name}_bucket{_format_labels(bucket_labels)} {count}"
+                        )
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(
+                        f"{name}_count{_format_labels(labels)} {histogram.count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else f"{bound:g}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+REGISTRY = MetricsRegistry(enabled=is_enabled())
+
+
+class _Timer:
+    __slots__ = ("stage", "stages", "start")
+
+    def __init__(self, stage: str, stages: Optional[List[Tuple[str, float]]]):
+        self.stage = stage
+        self.stages = stages
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.start
+        REGISTRY.observe(STAGE_SECONDS, seconds, stage=self.stage)
+        if self.stages is not None:
+            self.stages.append((self.stage, seconds))
+
+
+_NO_TIMER = contextlib.nullcontext()
+
+
+def timer(stage: str):
+    """Times the block as ``stage``; a no-op when nothing records it."""
+    stages = _trace.get()
+    if stages is None and not REGISTRY.enabled:
+        return _NO_TIMER
+    return _Timer(stage, stages)
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorator form of ``timer``."""
+
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            stages = _trace.get()
+            if stages is None and not REGISTRY.enabled:
+                return function(*args, **kwargs)
+            with _Timer(stage, stages):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def inc(name: str, value: float = 1, **labels: str):
+    REGISTRY.inc(name, value, **labels)
+
+
+def cache_lookup(cache: str, hit: bool):
+    REGISTRY.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def upstream_error(endpoint: str, status: Optional[int] = None):
+    """Counts a failed upstream call by status code, ``error`` if it had none."""
+    REGISTRY.inc(
+        "upstream_errors_total", endpoint=endpoint, status=str(status or "error")
+    )
+
+
+@contextlib.contextmanager
+def trace() -> Iterator[List[Tuple[str, float]]]:
+    """Collects ``(stage, seconds)`` for every timer run inside the block.
+
+    Stages are listed in completion order, so an outer stage comes after the
+    stages nested in it. Timers in other threads are not included.
+    """
+    stages: List[Tuple[str, float]] = []
+    token = _trace.set(stages)
+    try:
+        yield stages
+    finally:
+        _trace.reset(token)
@@ -0,0 +1,118 @@
+import logging
+import os
+
+import pandas as pd
+import streamlit as st
+from dotenv import load_dotenv
+
+from cache_backends import ModelCodec, default_cache
+from discography import TrackSummary, analyze_discography
+from lyrics_cache import default_lyrics_cache
+from lyrics_service import LyricsService
+from SpotifyService.schemas import ConvertedSpotifySearchPage
+from SpotifyService.spotify_service import SpotifyService
+
+from streamlit.logger import get_logger
+
+LOGGER = get_logger(__file__)
+LOGGER.setLevel(logging.DEBUG)
+# The services log through the standard logging module; route them to Streamlit.
+for service_logger in ("lyrics_service", "SpotifyService"):
+    get_logger(service_logger).setLevel(logging.DEBUG)
+
+load_dotenv()
+
+SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
+SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
+SEARCH_CACHE_TTL = 60 * 60
+
+
+@st.cache_resource
+def get_lyrics_cache():
+    return default_lyrics_cache()
+
+
+@st.cache_resource
+def get_search_cache():
+    return default_cache(
+        "search",
+        ModelCodec(ConvertedSpotifySearchPage),
+        maxsize=256,
+        ttl=float(os.getenv("SEARCH_CACHE_TTL", SEARCH_CACHE_TTL)),
+    )
+
+
+spotify = SpotifyService(
+    SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET, cache=get_search_cache()
+)
+lyric_service = LyricsService(cache=get_lyrics_cache())
+
+st.title(f"Album & Discography Analysis")
+st.write(
+    f"Analyze every track of an album, or an artist's whole discography: vocabulary size, type/token ratio, how repetitive the lyrics are, and which words are shared between tracks."
+)
+
+mode = st.radio("Analyze", ["Album", "Artist"], horizontal=True)
+
+search_form = st.form("discography_search_form")
+name_input = search_form.text_input(
+    label=f"{mode} name", placeholder=f"Enter {mode.lower()} name here..."
+)
+submitted = search_form.form_submit_button("Search")
+
+if submitted and name_input:
+    if mode == "Album":
+        st.session_state["discography_results"] = spotify.search_albums(name_input)
+    else:
+        st.session_state["discography_results"] = spotify.search_artists(name_input)
+
+collections = st.session_state.get("discography_results", [])
+if submitted and not collections:
+    st.warning(f"No search results found for {mode}: _**{name_input}**_.")
+
+if collections:
+    selected = st.selectbox(
+        "Select",
+        collections,
+        format_func=lambda collection: f"{collection.name} ({collection.description})",
+    )
+
+    if st.button("Analyze"):
+        if selected.description == "Artist":
+            tracks = spotify.iter_artist_tracks(selected.id)
+        else:
+            tracks = spotify.iter_album_tracks(selected.id, selected.name)
+
+        LOGGER.info(f"Discography analysis for {selected.name}")
+        progress = st.progress(0.0)
+        overview = st.empty()
+        table = st.empty()
+
+        summary = None
+        for summary in analyze_discography(lyric_service, tracks):
+            done = summary.tracks_analyzed + summary.tracks_without_lyrics
+            progress.progress(
+                done / summary.tracks_total,
+                text=f"{done} of {summary.tracks_total} tracks",
+            )
+
+            with overview.container():
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Vocabulary size", summary.vocabulary_size)
+                col2.metric("Type/token ratio", f"{summary.type_token_ratio:.3f}")
+                col3.metric("Repeated lines", f"{summary.repetition_score:.0%}")
+                col1.metric("Words", summary.word_count)
+                col2.metric("Shared vocabulary", summary.shared_vocabulary_size)
+                col3.metric("Track-exclusive words", summary.exclusive_vocabulary_size)
+
+            # Explicit columns: the first finished tracks may have no lyrics.
+            df = pd.DataFrame(
+                [track.model_dump() for track in summary.tracks],
+                columns=list(TrackSummary.model_fields),
+            )
+            table.dataframe(df.drop(columns=["id"]), hide_index=True)
+
+        if summary is None:
+            st.warning(f"No tracks found for _**{selected.name}**_.")
+        elif summary.tracks_without_lyrics:
+            st.info(f"No lyrics found for {summary.tracks_without_lyrics} tracks.")
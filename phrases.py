@@ -0,0 +1,122 @@
+from typing import Dict, List, Sequence, Tuple
+
+from text_analysis import tokenize_words
+
+MIN_PHRASE_LENGTH = 3
+MAX_PHRASE_LENGTH = 12
+
+
+def tokenize(text: str) -> List[str]:
+    return tokenize_words(text)
+
+
+def suffix_array(tokens: Sequence[int]) -> List[int]:
+    """Builds the suffix array of an integer sequence by prefix doubling."""
+    n = len(tokens)
+    suffixes = list(range(n))
+    rank = list(tokens)
+    k = 1
+    while True:
+
+        def key(i):
+            return (rank[i], rank[i + k] if i + k < n else -1)
+
+        suffixes.sort(key=key)
+        new_rank = [0] * n
+        for previous, current in zip(suffixes, suffixes[1:]):
+            new_rank[current] = new_rank[previous] + (key(previous) != key(current))
+        rank = new_rank
+        if n == 0 or rank[suffixes[-1]] == n - 1:
+            return suffixes
+        k *= 2
+
+
+def lcp_array(tokens: Sequence[int], suffixes: List[int]) -> List[int]:
+    """Kasai's algorithm: ``lcp[i]`` is the common prefix of suffixes i-1 and i."""
+    n = len(tokens)
+    rank = [0] * n
+    for index, suffix in enumerate(suffixes):
+        rank[suffix] = index
+
+    lcp = [0] * n
+    h = 0
+    for i in range(n):
+        if rank[i] > 0:
+            j = suffixes[rank[i] - 1]
+            while i + h < n and j + h < n and tokens[i + h] == tokens[j + h]:
+                h += 1
+            lcp[rank[i]] = h
+            if h:
+                h -= 1
+        else:
+            h = 0
+    return lcp
+
+
+def _lcp_intervals(lcp: List[int]):
+    """Yields ``(length, left, right)`` for every LCP interval of the suffix array."""
+    stack = [(0, 0)]  # (lcp value, left bound)
+    for i in range(1, len(lcp) + 1):
+        current = lcp[i] if i < len(lcp) else 0
+        left = i - 1
+        while stack[-1][0] > current:
+            length, left = stack.pop()
+            yield length, left, i - 1
+        if stack[-1][0] < current:
+            stack.append((current, left))
+
+
+def find_repeated_ngrams(
+    words: Sequence[str],
+    min_length: int = MIN_PHRASE_LENGTH,
+    max_length: int = MAX_PHRASE_LENGTH,
+    top_n: int = 10,
+) -> List[Tuple[str, int]]:
+    """Finds maximal repeated word n-grams, across line breaks.
+
+    Uses a suffix array with LCP intervals, so the cost is near-linear in the
+    number of words. Phrases longer than ``max_length`` are truncated to
+    their first ``max_length`` words. Sub-phrases that never occur more often
+    than a longer phrase containing them are dropped. Results are ranked by
+    occurrences x length.
+    """
+    vocabulary: Dict[str, int] = {}
+    tokens = [vocabulary.setdefault(word, len(vocabulary)) for word in words]
+    if len(tokens) < min_length * 2:
+        return []
+
+    suffixes = suffix_array(tokens)
+    lcp = lcp_array(tokens, suffixes)
+
+    candidates: Dict[Tuple[int, ...], int] = {}
+    for length, left, right in _lcp_intervals(lcp):
+        if length < min_length:
+            continue
+        positions = suffixes[left : right + 1]
+        # Skip phrases always preceded by the same word: the longer phrase
+        # starting one word earlier covers them.
+        previous = {tokens[p - 1] if p > 0 else -1 for p in positions}
+        if len(previous) == 1 and -1 not in previous:
+            continue
+        phrase = tuple(tokens[positions[0] : positions[0] + min(length, max_length)])
+        candidates[phrase] = max(candidates.get(phrase, 0), len(positions))
+
+    # Longest first; every kept phrase registers its sub-phrases with its
+    # count, so containment checks are dictionary lookups.
+    kept: List[Tuple[Tuple[int, ...], int]] = []
+    covered: Dict[Tuple[int, ...], int] = {}
+    for phrase, count in sorted(candidates.items(), key=lambda item: -len(item[0])):
+        if count <= covered.get(phrase, 0):
+            continue
+        kept.append((phrase, count))
+        for size in range(min_length, len(phrase)):
+            for start in range(len(phrase) - size + 1):
+                sub_phrase = phrase[start : start + size]
+                covered[sub_phrase] = max(covered.get(sub_phrase, 0), count)
+
+    words_by_id = list(vocabulary)
+    ranked = sorted(kept, key=lambda item: (-item[1] * len(item[0]), -item[1]))
+    return [
+        (" ".join(words_by_id[token] for token in phrase), count)
+        for phrase, count in ranked[:top_n]
+    ]
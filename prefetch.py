@@ -0,0 +1,59 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, List
+
+from lyrics_service import LyricsService
+from scheduler import BACKGROUND, request_priority
+
+
+def is_enabled() -> bool:
+    return os.getenv("PREFETCH_ENABLED", "").lower() in ("1", "true", "yes")
+
+
+class PrefetchBatch:
+    """Background analyses started for one set of search results."""
+
+    def __init__(self):
+        self.futures: List[Future] = []
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Drops work that has not started yet; running analyses still finish
+        and land in the cache."""
+        self._cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+    def done(self) -> bool:
+        return all(future.done() for future in self.futures)
+
+
+class Prefetcher:
+    """Fetches and analyzes search results in a worker pool ahead of clicks."""
+
+    def __init__(self, lyrics_service: LyricsService, max_workers: int = 4):
+        self.lyrics_service = lyrics_service
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="prefetch"
+        )
+
+    def prefetch(self, track_ids: Iterable[str]) -> PrefetchBatch:
+        batch = PrefetchBatch()
+        for track_id in dict.fromkeys(track_ids):
+            batch.futures.append(self._executor.submit(self._analyze, batch, track_id))
+        return batch
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _analyze(self, batch: PrefetchBatch, track_id: str):
+        if batch.cancelled:
+            return
+        # Clicks are served first when both wait on the lyrics rate limit.
+        with request_priority(BACKGROUND):
+            return self.lyrics_service.analyze(track_id)
@@ -0,0 +1,100 @@
+import zlib
+from typing import Iterable, List
+
+from pydantic import BaseModel
+
+from text_analysis import tokenize_words
+
+MTLD_THRESHOLD = 0.72
+
+
+class RepetitionStats(BaseModel):
+    compression_ratio: float
+    repeated_token_fraction: float
+    type_token_ratio: float
+    mtld: float
+
+
+def _mtld_pass(tokens: List[str], threshold: float) -> float:
+    factors = 0.0
+    types = set()
+    count = 0
+    for token in tokens:
+        types.add(token)
+        count += 1
+        if len(types) / count <= threshold:
+            factors += 1
+            types = set()
+            count = 0
+    if count:
+        ttr = len(types) / count
+        factors += (1 - ttr) / (1 - threshold)
+    return len(tokens) / factors if factors else float(len(tokens))
+
+
+def mtld(tokens: List[str], threshold: float = MTLD_THRESHOLD) -> float:
+    """Measure of textual lexical diversity, averaged over both directions."""
+    if not tokens:
+        return 0.0
+    return (_mtld_pass(tokens, threshold) + _mtld_pass(tokens[::-1], threshold)) / 2
+
+
+class RepetitionMeter:
+    """Computes repetition metrics from lyric lines fed one at a time.
+
+    The compression ratio comes from an incremental zlib compressor, so no
+    joined copy of the lyrics is built. A higher ratio means more repetitive
+    lyrics. ``tokens`` holds the words fed so far, in order.
+    """
+
+    def __init__(self, level: int = 9):
+        self._compressor = zlib.compressobj(level)
+        self._raw_bytes = 0
+        self._compressed_bytes = 0
+        self._seen = set()
+        self._repeated = 0
+        self.tokens: List[str] = []
+
+    def add_line(self, line: str):
+        self.add_tokens(line, tokenize_words(line))
+
+    def add_tokens(self, line: str, tokens: List[str]):
+        """Feeds a line already split with ``tokenize_words``."""
+        data = line.encode("utf-8") + b"\n"
+        self._raw_bytes += len(data)
+        self._compressed_bytes += len(self._compressor.compress(data))
+
+        for token in tokens:
+            if token in self._seen:
+                self._repeated += 1
+            else:
+                self._seen.add(token)
+        self.tokens.extend(tokens)
+
+    def add_lines(self, lines: Iterable[str]) -> "RepetitionMeter":
+        for line in lines:
+            self.add_line(line)
+        return self
+
+    def result(self) -> RepetitionStats:
+        """The metrics of the lines so far. The compressed stream is finished
+        on a copy, so the meter can still be fed afterwards."""
+        compressed_bytes = self._compressed_bytes + len(
+            self._compressor.copy().flush()
+        )
+        token_count = len(self.tokens)
+
+        return RepetitionStats(
+            compression_ratio=(
+                self._raw_bytes / compressed_bytes if self._raw_bytes else 0.0
+            ),
+            repeated_token_fraction=(
+                self._repeated / token_count if token_count else 0.0
+            ),
+            type_token_ratio=len(self._seen) / token_count if token_count else 0.0,
+            mtld=mtld(self.tokens),
+        )
+
+
+def repetition_stats(lines: Iterable[str]) -> RepetitionStats:
+    return RepetitionMeter().add_lines(lines).result()
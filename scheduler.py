@@ -0,0 +1,303 @@
+"""Coordinates outgoing requests to the Spotify endpoints.
+
+Every request goes through a shared ``RequestScheduler``, which gives each
+endpoint a token bucket and a circuit breaker. Identical in-flight requests
+are coalesced, and interactive requests are served before background ones
+(prefetching) when both are waiting for a token.
+"""
+
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# (requests per second, burst) per endpoint.
+DEFAULT_RATES: Dict[str, Tuple[float, int]] = {
+    "lyrics": (10.0, 20),
+    "search": (10.0, 10),
+    # Album and track listings, e.g. an artist's discography.
+    "spotify": (10.0, 10),
+    "access_token": (1.0, 2),
+}
+DEFAULT_RATE = (5.0, 5)
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT_SECONDS = 30.0
+
+_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextlib.contextmanager
+def request_priority(priority: int):
+    """Runs the requests made inside the block at ``priority``."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while an endpoint's circuit is open."""
+
+
+class RateLimitedError(Exception):
+    """Raised by a request function when the endpoint answered 429."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"rate limited, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second on average and ``capacity`` at once.
+
+    Not thread-safe; the scheduler guards it with the endpoint's lock.
+    """
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float]):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+
+    def try_take(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is free."""
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds: float):
+        """Hands out no tokens for ``seconds``, e.g. after a ``Retry-After``."""
+        self.try_take()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+class CircuitBreaker:
+    """Stops requests after ``failure_threshold`` consecutive failures.
+
+    After ``reset_timeout`` seconds one trial request is let through: success
+    closes the circuit again, failure keeps it open for another period.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class _Endpoint:
+    def __init__(self, bucket: TokenBucket, breaker: CircuitBreaker):
+        self.bucket = bucket
+        self.breaker = breaker
+        self.condition = threading.Condition()
+        # Heap of [priority, sequence, key] tickets waiting for a token.
+        self.waiting: List[list] = []
+
+    def acquire(self, priority: int, sequence: int, key: Optional[Hashable]):
+        """Blocks until this request is first in line and a token is free."""
+        ticket = [priority, sequence, key]
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            while True:
+                if self.waiting[0] is ticket:
+                    wait = self.bucket.try_take()
+                    if not wait:
+                        heapq.heappop(self.waiting)
+                        self.condition.notify_all()
+                        return
+                    self.condition.wait(wait)
+                else:
+                    self.condition.wait()
+
+    def promote(self, key: Hashable, priority: int):
+        """Moves a queued request up when a higher priority caller joins it."""
+        with self.condition:
+            for ticket in self.waiting:
+                if ticket[2] == key and ticket[0] > priority:
+                    ticket[0] = priority
+                    heapq.heapify(self.waiting)
+                    self.condition.notify_all()
+
+    def pause(self, seconds: float):
+        with self.condition:
+            self.bucket.pause(seconds)
+
+
+class RequestScheduler:
+    """Rate limits, coalesces, prioritizes and circuit-breaks requests."""
+
+    def __init__(
+        self,
+        rates: Optional[Dict[str, Tuple[float, int]]] = None,
+        default_rate: Tuple[float, int] = DEFAULT_RATE,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        reset_timeout: float = RESET_TIMEOUT_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rates = DEFAULT_RATES if rates is None else rates
+        self.default_rate = default_rate
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.counters: Counter = Counter()
+        self._clock = clock
+        self._sequence = itertools.count()
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._in_flight: Dict[Tuple[str, Hashable], Future] = {}
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        endpoint: str,
+        request: Callable[[], T],
+        key: Optional[Hashable] = None,
+        priority: Optional[int] = None,
+    ) -> T:
+        """Runs ``request`` when the endpoint allows it and returns its result.
+
+        Callers passing the same ``key`` while a request is in flight share
+        its result. ``priority`` defaults to the one set with
+        ``request_priority``. Raises ``CircuitOpenError`` without calling
+        ``request`` while the endpoint's circuit is open.
+        """
+        priority = _priority.get() if priority is None else priority
+        state = self._endpoint(endpoint)
+        if key is None:
+            return self._run(endpoint, state, request, priority, None)
+
+        with self._lock:
+            future = self._in_flight.get((endpoint, key))
+            owner = future is None
+            if owner:
+                future = self._in_flight[endpoint, key] = Future()
+            else:
+                self.counters[endpoint, "coalesced"] += 1
+        if not owner:
+            state.promote(key, priority)
+            return future.result()
+
+        try:
+            result = self._run(endpoint, state, request, priority, key)
+        except BaseException as ex:
+            future.set_exception(ex)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._in_flight.pop((endpoint, key), None)
+
+    def promote(self, endpoint: str, key: Hashable, priority: Optional[int] = None):
+        """Moves a queued request with ``key`` up to ``priority``, for callers
+        that wait on its result some other way than through ``run``."""
+        priority = _priority.get() if priority is None else priority
+        self._endpoint(endpoint).promote(key, priority)
+
+    def circuit_state(self, endpoint: str) -> str:
+        return self._endpoint(endpoint).breaker.state
+
+    def _count(self, endpoint: str, name: str):
+        with self._lock:
+            self.counters[endpoint, name] += 1
+
+    def _endpoint(self, endpoint: str) -> _Endpoint:
+        with self._lock:
+            state = self._endpoints.get(endpoint)
+            if state is None:
+                rate, capacity = self.rates.get(endpoint, self.default_rate)
+                state = self._endpoints[endpoint] = _Endpoint(
+                    TokenBucket(rate, capacity, self._clock),
+                    CircuitBreaker(
+                        self.failure_threshold, self.reset_timeout, self._clock
+                    ),
+                )
+            return state
+
+    def _run(
+        self,
+        endpoint: str,
+        state: _Endpoint,
+        request: Callable[[], T],
+        priority: int,
+        key: Optional[Hashable],
+    ) -> T:
+        if not state.breaker.allow():
+            self._count(endpoint, "rejected")
+            raise CircuitOpenError(f"{endpoint} is failing, not sending requests")
+
+        state.acquire(priority, next(self._sequence), key)
+        self._count(endpoint, "requests")
+        try:
+            result = request()
+        except RateLimitedError as ex:
+            self._count(endpoint, "rate_limited")
+            state.pause(ex.retry_after or 1 / state.bucket.rate)
+            state.breaker.record_failure()
+            raise
+        except Exception:
+            self._count(endpoint, "failures")
+            state.breaker.record_failure()
+            raise
+        state.breaker.record_success()
+        return result
+
+
+# Shared by every service in the process, so users share the rate limits.
+SCHEDULER = RequestScheduler()
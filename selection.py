@@ -0,0 +1,77 @@
+"""Selection model for the search page, kept in Streamlit's session state.
+
+The session holds only the latest search results (at most ``MAX_RESULTS``),
+the selected track and the analysis of that selection, so its size does not
+grow with the number of searches. A click is read from the card widgets of
+the current results only; the analysis runs once per selection and is reused
+by every later rerun.
+"""
+
+from typing import Callable, Iterable, List, MutableMapping, Optional
+
+from SpotifyService.schemas import ConvertedSpotifySearchResult
+
+MAX_RESULTS = 50
+
+RESULTS_KEY = "search_results"
+SELECTED_KEY = "selected_track"
+ANALYSIS_KEY = "selected_analysis"
+
+
+def card_key(track_id: str) -> str:
+    return f"card_{track_id}"
+
+
+def set_results(state: MutableMapping, results: Iterable[ConvertedSpotifySearchResult]):
+    """Replaces the stored search results and forgets the previous cards."""
+    for track_id in state.get(RESULTS_KEY, {}):
+        state.pop(card_key(track_id), None)
+    state[RESULTS_KEY] = {}
+    add_results(state, results)
+
+
+def add_results(
+    state: MutableMapping, results: Iterable[ConvertedSpotifySearchResult]
+) -> List[ConvertedSpotifySearchResult]:
+    """Appends a page of search results, up to ``MAX_RESULTS`` in total.
+
+    Returns the results that were not stored yet, which are the ones to
+    render: a track already shown would repeat its card's widget key.
+    """
+    stored = state.setdefault(RESULTS_KEY, {})
+    added = []
+    for result in results:
+        if len(stored) >= MAX_RESULTS:
+            break
+        if result.id not in stored:
+            stored[result.id] = result
+            added.append(result)
+    return added
+
+
+def update_selection(state: MutableMapping) -> Optional[ConvertedSpotifySearchResult]:
+    """Applies a card click, if any, and returns the selected track."""
+    results = state.get(RESULTS_KEY, {})
+    for track_id, result in results.items():
+        if state.get(card_key(track_id)) is True:
+            state[SELECTED_KEY] = result
+            # Consume the click so it cannot select again on a later rerun.
+            for other in results:
+                state.pop(card_key(other), None)
+            break
+    return state.get(SELECTED_KEY)
+
+
+def selected_analysis(state: MutableMapping, analyze: Callable[[str], object]):
+    """Analysis of the selected track, computed at most once per selection."""
+    selected = state.get(SELECTED_KEY)
+    if selected is None:
+        return None
+
+    cached = state.get(ANALYSIS_KEY)
+    if cached is not None and cached[0] == selected.id:
+        return cached[1]
+
+    analysis = analyze(selected.id)
+    state[ANALYSIS_KEY] = (selected.id, analysis)
+    return analysis
@@ -0,0 +1,164 @@
+import heapq
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, Iterable, List, Tuple
+
+from pydantic import BaseModel
+
+from phrases import find_repeated_ngrams
+from repetition import RepetitionMeter, RepetitionStats
+from text_analysis import COUNTED_SCRIPTS, TextStats, tokenize_words
+from unicode_scripts import SCRIPTS, char_count_matrix
+
+_COUNTED_IDS = [SCRIPTS.index(script) for script in COUNTED_SCRIPTS]
+
+
+class TimelinePoint(BaseModel):
+    """Running totals after the line starting at ``start_time_ms``."""
+
+    start_time_ms: int
+    word_count: int
+    vocabulary_size: int
+    unique_words_count: int
+    # Share of the words so far that repeat an earlier word.
+    repeated_token_fraction: float
+    # Lines so far that repeat an earlier line.
+    repeated_line_count: int
+
+
+class IncrementalAnalyzer:
+    """Analyzes time-synced lyric lines as they arrive, one at a time.
+
+    Each line is tokenized once and updates the word counts, the words seen
+    once, the per-script character counts, the repeated lines and a
+    ``RepetitionMeter`` in time proportional to its length, and appends a
+    ``TimelinePoint``. New non-ASCII words are classified by script in one
+    vectorized pass per line, or per song with ``add_lines``.
+
+    ``stats``, ``repeated_phrases``, ``repetition`` and ``repeated_ngrams``
+    give the same results as ``analyze_text``, ``find_repeated_phrases``,
+    ``repetition_stats`` and ``find_repeated_ngrams`` on the lines seen so
+    far, at any point. Only the n-grams are computed when asked for, from
+    the words kept by the meter.
+    """
+
+    def __init__(self):
+        self.counter: Counter = Counter()
+        self.word_count = 0
+        self.timeline: List[TimelinePoint] = []
+        # Words seen exactly once, in order of first occurrence.
+        self._unique: Dict[str, None] = {}
+        self._char_counts = dict.fromkeys(COUNTED_SCRIPTS, 0)
+        self._token_scripts: Dict[str, List[Tuple[str, int]]] = {}
+        self._line_counts: Counter = Counter()
+        self._repeated_lines = 0
+        self._repetition = RepetitionMeter()
+
+    def add_line(self, words: str, start_time_ms: int = 0) -> TimelinePoint:
+        tokens = tokenize_words(words)
+        if not words.isascii():
+            self._classify(tokens)
+        return self._add_tokens(words, tokens, start_time_ms)
+
+    def add_lines(self, lines: Iterable[dict]) -> "IncrementalAnalyzer":
+        """Feeds the ``lyrics.lines`` of a lyrics response, skipping empty
+        and instrumental (``♪``) lines like ``combined_lyrics``."""
+        lines = [
+            (line["words"], int(line.get("startTimeMs") or 0))
+            for line in lines
+            if line["words"] and line["words"] != "♪"
+        ]
+        tokenized = [tokenize_words(words) for words, _ in lines]
+        self._classify(
+            token
+            for (words, _), tokens in zip(lines, tokenized)
+            if not words.isascii()
+            for token in tokens
+        )
+        for (words, start_time_ms), tokens in zip(lines, tokenized):
+            self._add_tokens(words, tokens, start_time_ms)
+        return self
+
+    def _add_tokens(
+        self, words: str, tokens: List[str], start_time_ms: int
+    ) -> TimelinePoint:
+        token_scripts = self._token_scripts
+        for token in tokens:
+            count = self.counter[token] + 1
+            self.counter[token] = count
+            if count == 1:
+                self._unique[token] = None
+            elif count == 2:
+                del self._unique[token]
+            for script, chars in token_scripts.get(token, ()):
+                self._char_counts[script] += chars
+            self.word_count += 1
+
+        self._repetition.add_tokens(words, tokens)
+
+        phrase = words.lower()
+        self._line_counts[phrase] += 1
+        if self._line_counts[phrase] > 1:
+            self._repeated_lines += 1
+
+        vocabulary_size = len(self.counter)
+        point = TimelinePoint.model_construct(
+            start_time_ms=start_time_ms,
+            word_count=self.word_count,
+            vocabulary_size=vocabulary_size,
+            unique_words_count=len(self._unique),
+            repeated_token_fraction=(
+                1 - vocabulary_size / self.word_count if self.word_count else 0.0
+            ),
+            repeated_line_count=self._repeated_lines,
+        )
+        self.timeline.append(point)
+        return point
+
+    def stats(self, top_n: int = 10) -> TextStats:
+        return TextStats(
+            word_count=self.word_count,
+            most_common=heapq.nlargest(top_n, self.counter.items(), key=itemgetter(1)),
+            unique_words=list(self._unique),
+            char_counts={
+                script: count for script, count in self._char_counts.items() if count
+            },
+        )
+
+    def repeated_phrases(self) -> List[Tuple[str, int]]:
+        """Lines seen more than once, most repeated first."""
+        return sorted(
+            (
+                (phrase, count)
+                for phrase, count in self._line_counts.items()
+                if count > 1
+            ),
+            key=itemgetter(1),
+            reverse=True,
+        )
+
+    @property
+    def words(self) -> List[str]:
+        """Every word so far, in order."""
+        return self._repetition.tokens
+
+    def repetition(self) -> RepetitionStats:
+        return self._repetition.result()
+
+    def repeated_ngrams(self, top_n: int = 10) -> List[Tuple[str, int]]:
+        return find_repeated_ngrams(self._repetition.tokens, top_n=top_n)
+
+    def _classify(self, tokens: Iterable[str]):
+        """Stores the counted characters per script of the new tokens."""
+        tokens = [
+            token
+            for token in dict.fromkeys(tokens)
+            if token not in self._token_scripts and not token.isascii()
+        ]
+        if not tokens:
+            return
+        counts = char_count_matrix(tokens)[:, _COUNTED_IDS].tolist()
+        for token, row in zip(tokens, counts):
+            self._token_scripts[token] = [
+                (script, chars) for script, chars in zip(COUNTED_SCRIPTS, row) if chars
+            ]
@@ -0,0 +1,40 @@
+import copy
+
+from benchmarks.bench_pipeline import STAGES, compare, run
+
+
+def test_pipeline_replays_every_stage_for_every_fixture():
+    report = run(iterations=1)
+
+    assert report["tracks"] == 4
+    assert list(report["stages"]) == STAGES
+    assert all(
+        metrics["count"] == 4
+        for name, metrics in report["stages"].items()
+        if name != "search"
+    )
+    assert report["stages"]["search"]["count"] == 1
+    assert report["peak_memory_mb"] > 0
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {
+        "tracks_per_second": 10.0,
+        "peak_memory_mb": 8.0,
+        "stages": {
+            "count_most_common": {"p50_ms": 1.0, "p95_ms": 2.0},
+            "combined_lyrics": {"p50_ms": 0.02, "p95_ms": 0.05},
+        },
+    }
+    current = copy.deepcopy(baseline)
+    assert compare(baseline, current) == []
+
+    current["stages"]["count_most_common"]["p95_ms"] = 3.0
+    # Doubling a sub-millisecond stage is noise, not a regression.
+    current["stages"]["combined_lyrics"]["p50_ms"] = 0.04
+    current["tracks_per_second"] = 5.0
+
+    assert compare(baseline, current) == [
+        "count_most_common p95_ms: 2.0 -> 3.0",
+        "tracks_per_second: 10.0 -> 5.0",
+    ]
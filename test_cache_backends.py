@@ -0,0 +1,205 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import cache_backends
+from cache_backends import (
+    BytesCodec,
+    JsonCodec,
+    ModelCodec,
+    RedisCache,
+    SQLiteCache,
+    TieredCache,
+)
+from caching import LRUCache
+from lyrics_analysis import analyze_lyrics
+from SpotifyService.schemas import ConvertedSpotifySearchPage
+from SpotifyService.test_data import make_search_response
+
+
+class FakeRedis:
+    """Stands in for ``redis.Redis`` with the commands RedisCache uses."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, name):
+        entry = self._data.get(name)
+        if entry and entry[1] is not None and entry[1] <= self._clock():
+            del self._data[name]
+            return None
+        return entry
+
+    def get(self, name):
+        with self._lock:
+            entry = self._live(name)
+            return None if entry is None else entry[0]
+
+    def set(self, name, value, px=None, nx=False):
+        with self._lock:
+            if nx and self._live(name):
+                return None
+            if isinstance(value, str):
+                value = value.encode()
+            expires_at = self._clock() + px / 1000 if px is not None else None
+            self._data[name] = (value, expires_at)
+            return True
+
+    def exists(self, name):
+        with self._lock:
+            return int(self._live(name) is not None)
+
+    def delete(self, name):
+        with self._lock:
+            return int(self._data.pop(name, None) is not None)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_cache(request, tmp_path):
+    """Builds caches that share storage, like the same cache in two processes."""
+    redis = FakeRedis()
+
+    def make(namespace="test", codec=None, **kwargs):
+        codec = codec or JsonCodec()
+        if request.param == "sqlite":
+            return SQLiteCache(str(tmp_path / "cache.db"), namespace, codec, **kwargs)
+        return RedisCache(redis, namespace, codec, **kwargs)
+
+    return make
+
+
+def test_values_are_shared_between_instances(make_cache):
+    first, second = make_cache(), make_cache()
+
+    first.set(("search", "hello", 0, 10), {"ids": ["a", "b"]})
+
+    assert second.get(("search", "hello", 0, 10)) == {"ids": ["a", "b"]}
+    assert second.get(("search", "hello", 10, 10)) is None
+    assert make_cache(namespace="other").get(("search", "hello", 0, 10)) is None
+
+
+def test_concurrent_misses_compute_once(make_cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"lyrics": "la la la"}
+
+    # One instance per worker, as if each were a separate replica.
+    caches = [make_cache(poll_interval=0.01) for _ in range(6)]
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(
+            executor.map(lambda cache: cache.get_or_compute("track", compute), caches)
+        )
+
+    assert results == [{"lyrics": "la la la"}] * 6
+    assert len(calls) == 1
+
+
+def test_waiters_compute_when_the_holder_stores_nothing(make_cache):
+    holder, waiter = make_cache(poll_interval=0.01), make_cache(poll_interval=0.01)
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ConnectionError("upstream down")
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(holder.get_or_compute, "track", failing)
+        started.wait()
+        assert waiter.get_or_compute("track", lambda: "computed") == "computed"
+        with pytest.raises(ConnectionError):
+            future.result()
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = SQLiteCache(
+        str(tmp_path / "cache.db"), "test", JsonCodec(), ttl=60, clock=clock
+    )
+    cache.set("key", [1, 2])
+
+    clock.now += 59
+    assert cache.get("key") == [1, 2]
+    clock.now += 2
+    assert cache.get("key") is None
+
+
+def test_oldest_rows_are_evicted_beyond_max_rows(tmp_path, monkeypatch, clock):
+    monkeypatch.setattr(cache_backends, "PRUNE_INTERVAL", 1)
+    path = str(tmp_path / "cache.db")
+    cache = SQLiteCache(path, "test", JsonCodec(), clock=clock, max_rows=3)
+    other = SQLiteCache(path, "other", JsonCodec(), clock=clock, max_rows=3)
+    other.set("kept", 0)
+
+    for index in range(5):
+        clock.now += 1
+        cache.set(f"key{index}", index)
+
+    assert [cache.get(f"key{index}") for index in range(5)] == [None, None, 2, 3, 4]
+    assert other.get("kept") == 0
+
+
+def test_files_without_write_times_are_migrated(tmp_path):
+    path = str(tmp_path / "cache.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE cache (namespace TEXT NOT NULL, key TEXT NOT NULL,"
+            " value BLOB NOT NULL, expires_at REAL, PRIMARY KEY (namespace, key))"
+            " WITHOUT ROWID"
+        )
+        conn.execute("INSERT INTO cache VALUES ('test', '\"old\"', '1', NULL)")
+
+    cache = SQLiteCache(path, "test", JsonCodec())
+    cache.set("new", 2)
+
+    assert (cache.get("old"), cache.get("new")) == (1, 2)
+
+
+def test_expired_leases_are_taken_over(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    crashed = SQLiteCache(path, "test", JsonCodec(), lease_timeout=30, clock=clock)
+    assert crashed._acquire('"key"', "crashed-token")
+
+    cache = SQLiteCache(path, "test", JsonCodec(), lease_timeout=30, clock=clock)
+    assert not cache._acquire('"key"', "token")
+    clock.now += 31
+    assert cache.get_or_compute("key", lambda: "value") == "value"
+
+
+def test_models_round_trip_without_pickle(make_cache):
+    lyrics = {"lyrics": {"lines": [{"startTimeMs": "0", "words": "la la la"}]}}
+    analysis = analyze_lyrics("track", lyrics)
+    analysis.most_common_cloud = b"\x89PNG\r\n\x1a\n\xff"
+    page = ConvertedSpotifySearchPage.from_dict(make_search_response(["a", "b"]))
+
+    analyses = make_cache("analysis", ModelCodec(type(analysis)))
+    analyses.set("track", analysis)
+    pages = make_cache("search", ModelCodec(ConvertedSpotifySearchPage))
+    pages.set(("search", "q", 0, 10), page)
+    images = make_cache("word_cloud", BytesCodec())
+    images.set("hash", b"\x89PNG")
+
+    assert analyses.get("track") == analysis
+    assert pages.get(("search", "q", 0, 10)) == page
+    assert images.get("hash") == b"\x89PNG"
+
+
+def test_tiered_cache_fills_the_local_tier(make_cache):
+    shared = make_cache()
+    shared.set("key", "value")
+    tiered = TieredCache(LRUCache(maxsize=4), make_cache())
+
+    assert tiered.get("key") == "value"
+    assert "key" in tiered.local
+    assert tiered.get_or_compute("other", lambda: "computed") == "computed"
+    assert shared.get("other") == "computed"
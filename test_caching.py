@@ -0,0 +1,38 @@
+from caching import LRUCache
+
+
+def test_lru_eviction():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LRUCache(maxsize=2, ttl=60, clock=clock)
+    cache.set("a", 1)
+
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.get_or_compute("a", lambda: 2) == 2
+
+
+def test_length_counts_only_unexpired_entries(clock):
+    cache = LRUCache(maxsize=4, ttl=60, clock=clock)
+    cache.set("a", 1)
+    clock.now += 30
+    cache.set("b", 2)
+
+    assert len(cache) == 2
+    clock.now += 30
+    assert len(cache) == 1
+    clock.now += 30
+    assert len(cache) == 0
@@ -0,0 +1,145 @@
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import cli
+
+LYRICS_RESPONSE = {
+    "lyrics": {
+        "lines": [
+            {"startTimeMs": "0", "words": "Hello from the other side"},
+            {"startTimeMs": "1000", "words": "Hello from the other side"},
+        ]
+    }
+}
+
+
+@pytest.fixture
+def dumps(tmp_path):
+    directory = tmp_path / "dumps"
+    directory.mkdir()
+    for name in ["a", "b"]:
+        (directory / f"{name}.json").write_text(json.dumps(LYRICS_RESPONSE))
+    return directory
+
+
+def test_run_streams_jsonl(dumps, tmp_path):
+    output = tmp_path / "results.jsonl"
+
+    stats = cli.run([str(dumps)], str(output), workers=1)
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["track_id"] for record in records] == ["a", "b"]
+    assert records[0]["repeated_phrases"] == [["hello from the other side", 2]]
+    assert stats["songs"] == 2
+    assert stats["failures"] == 0
+
+
+def test_a_bad_dump_does_not_abort_the_batch(dumps, tmp_path):
+    (dumps / "ab.json").write_text(json.dumps({"error": "x"}))
+    output = tmp_path / "results.jsonl"
+
+    stats = cli.run([str(dumps)], str(output), workers=1)
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["track_id"] for record in records] == ["a", "ab", "b"]
+    assert records[1] == {"track_id": "ab", "error": "'lyrics'"}
+    assert stats["failures"] == 1
+
+
+@pytest.mark.parametrize("error_first", [True, False])
+def test_parquet_keeps_analyses_and_errors_in_one_schema(tmp_path, error_first):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    error = {"track_id": "bad", "error": "no lyrics"}
+    for name in "ab":
+        (tmp_path / f"{name}.json").write_text(json.dumps(LYRICS_RESPONSE))
+    analyses = [
+        cli.analyze_job(("dump", str(tmp_path / f"{name}.json"))) for name in "ab"
+    ]
+    records = [error] + analyses if error_first else analyses + [error]
+    output = tmp_path / "results.parquet"
+
+    writer = cli.ParquetWriter(str(output), batch_size=1)
+    for record in records:
+        writer.write(record)
+    writer.close()
+
+    rows = pyarrow_parquet.read_table(output).to_pylist()
+    assert [row["track_id"] for row in rows] == [r["track_id"] for r in records]
+    assert [row["error"] for row in rows] == [r.get("error") for r in records]
+    assert [row["word_count"] for row in rows] == [r.get("word_count") for r in records]
+
+
+def test_jobs_are_submitted_in_a_bounded_window(monkeypatch):
+    monkeypatch.setattr(cli, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(cli, "analyze_jobs", lambda jobs, *args: list(jobs))
+    consumed = []
+
+    def jobs():
+        for index in range(20):
+            consumed.append(index)
+            yield "track", str(index)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = cli._map_bounded(executor, jobs(), 3, 10, None)
+        assert next(results) == ("track", "0")
+        assert len(consumed) <= 3 * 2 + 1
+        assert [value for _, value in results] == [str(index) for index in range(1, 20)]
+
+
+def test_iter_jobs_reads_track_id_files(tmp_path):
+    track_ids = tmp_path / "tracks.txt"
+    track_ids.write_text("abc\n\n# comment\ndef\n")
+
+    assert list(cli.iter_jobs([str(track_ids)])) == [
+        ("track", "abc"),
+        ("track", "def"),
+    ]
+
+
+def test_track_ids_are_fetched_through_one_service(monkeypatch, dumps):
+    import lyrics_service
+
+    services = []
+
+    class FakeLyricsService:
+        def __init__(self):
+            services.append(self)
+
+        def get_lyrics_many(self, track_ids):
+            return [
+                (track_id, LYRICS_RESPONSE if track_id != "gone" else None)
+                for track_id in track_ids
+            ]
+
+    monkeypatch.setattr(cli, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(lyrics_service, "LyricsService", FakeLyricsService)
+    jobs = [("track", "x"), ("dump", str(dumps / "a.json")), ("track", "gone")]
+
+    fetched = list(cli.fetch_track_jobs(iter(jobs)))
+
+    assert len(services) == 1
+    assert fetched == [
+        ("lyrics", ("x", LYRICS_RESPONSE)),
+        ("dump", str(dumps / "a.json")),
+        ("lyrics", ("gone", None)),
+    ]
+    records = cli.analyze_jobs(fetched)
+    assert [record["track_id"] for record in records] == ["x", "a", "gone"]
+    assert records[2] == {"track_id": "gone", "error": "no lyrics"}
+
+
+def test_cli_does_not_import_ui_dependencies(dumps, tmp_path):
+    code = (
+        "import sys, cli;"
+        f"cli.main([{str(dumps)!r}, '-o', {str(tmp_path / 'out.jsonl')!r}, '-w', '1']);"
+        "print(sorted(m for m in ('streamlit', 'matplotlib', 'wordcloud') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip() == "[]"
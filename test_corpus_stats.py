@@ -0,0 +1,70 @@
+import pytest
+
+from corpus_stats import CorpusStats, dominant_language
+
+SONGS = {
+    "a": {"the": 5, "you": 3, "fire": 4},
+    "b": {"the": 6, "you": 2, "rain": 1},
+    "c": {"the": 4, "you": 4, "night": 2},
+}
+
+
+@pytest.fixture
+def stats(tmp_path):
+    stats = CorpusStats(str(tmp_path / "corpus.sqlite3"), batch_size=2)
+    for track_id, counts in SONGS.items():
+        stats.add(track_id, counts)
+    yield stats
+    stats.close()
+
+
+def test_document_frequency_counts_each_track_once(stats):
+    assert stats.add("a", SONGS["a"]) is False
+    assert stats.documents() == 3
+    assert stats.document_frequency("the") == 3
+    assert stats.document_frequency("fire") == 1
+    assert stats.document_frequency("fire", "Korean") == 0
+
+
+def test_distinctive_words_skip_words_every_song_uses(stats):
+    assert [word for word, _ in stats.tfidf(SONGS["a"])] == ["fire"]
+    assert stats.log_odds(SONGS["a"])[0][0] == "fire"
+    assert "the" not in dict(stats.tfidf(SONGS["b"]))
+
+
+@pytest.mark.parametrize("counts", [{"la": 1}, {"la": 5}])
+def test_log_odds_of_a_single_word_song(tmp_path, counts):
+    stats = CorpusStats(str(tmp_path / "corpus.sqlite3"))
+    stats.add("a", counts)
+
+    assert [word for word, _ in stats.log_odds(counts)] == ["la"]
+
+    stats.add("b", {"oh": 3})
+    assert [word for word, _ in stats.log_odds({"oh": 3})] == ["oh"]
+    stats.close()
+
+
+def test_languages_are_counted_separately(stats):
+    stats.add("k", {"사랑해": 2, "the": 1}, "Korean")
+
+    assert stats.documents("Korean") == 1
+    assert stats.document_frequency("the", "Korean") == 1
+    assert stats.document_frequency("the") == 3
+
+
+def test_counts_persist_in_batches(tmp_path):
+    path = str(tmp_path / "corpus.sqlite3")
+    stats = CorpusStats(path, batch_size=2)
+    stats.add("a", SONGS["a"])
+    assert CorpusStats(path).documents() == 0
+
+    stats.add("b", SONGS["b"])
+    reopened = CorpusStats(path)
+    assert reopened.documents() == 2
+    assert reopened.document_frequency("the") == 2
+    assert reopened.add("a", SONGS["a"]) is False
+
+
+def test_dominant_language():
+    assert dominant_language({"English": 30.0, "Korean": 70.0}) == "Korean"
+    assert dominant_language({}) == ""
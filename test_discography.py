@@ -0,0 +1,111 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from benchmarks.corpus import make_lyrics
+from benchmarks.legacy import CounterAggregator
+from discography import DiscographyAggregator, analyze_discography
+from lyrics_service import LyricsService
+from SpotifyService.schemas import SpotifyTrackRef
+
+TRACKS = [
+    SpotifyTrackRef(id="a", track_name="Song A"),
+    SpotifyTrackRef(id="b", track_name="Song B"),
+    SpotifyTrackRef(id="c", track_name="Song C"),
+]
+
+
+def lyrics_response(*lines):
+    return {"lyrics": {"lines": [{"words": line} for line in lines]}}
+
+
+def test_aggregator_shared_and_exclusive_vocabulary():
+    aggregator = DiscographyAggregator(tracks_total=2)
+    aggregator.add(TRACKS[0], ["love me", "love me", "tonight"])
+    aggregator.add(TRACKS[1], ["love you", "forever"])
+
+    summary = aggregator.summary()
+
+    assert summary.word_count == 8
+    assert summary.vocabulary_size == 5
+    assert summary.shared_vocabulary_size == 1
+    assert summary.exclusive_vocabulary_size == 4
+    assert summary.repetition_score == pytest.approx(1 / 5)
+    assert [track.exclusive_words for track in summary.tracks] == [2, 2]
+    assert summary.tracks[0].repetition_score == pytest.approx(1 / 3)
+
+
+def test_exclusive_words_are_updated_as_tracks_are_added():
+    aggregator = DiscographyAggregator()
+    aggregator.add(TRACKS[0], ["love me", "tonight"])
+    aggregator.add(TRACKS[1], ["love you"])
+    aggregator.add(TRACKS[2], ["you and me"])
+
+    summary = aggregator.summary()
+
+    assert [track.exclusive_words for track in summary.tracks] == [1, 0, 1]
+    assert summary.shared_vocabulary_size == 3
+    assert summary.exclusive_vocabulary_size == 2
+
+
+def test_matches_the_counter_aggregation():
+    aggregator, reference = DiscographyAggregator(), CounterAggregator()
+    for seed in range(30):
+        lines = make_lyrics(lines=40, multilingual=seed % 3 == 0, seed=seed)
+        lines = lines.split("\n")
+        aggregator.add(SpotifyTrackRef(id=str(seed), track_name=""), lines)
+        reference.add(lines)
+
+    summary = aggregator.summary()
+    word_count, vocabulary_size, most_common, exclusive = reference.summary()
+
+    assert summary.word_count == word_count
+    assert summary.vocabulary_size == vocabulary_size
+    assert summary.most_common == most_common
+    assert [track.exclusive_words for track in summary.tracks] == exclusive
+    assert summary.shared_vocabulary_size == reference.shared_vocabulary_size
+
+
+def test_tracks_are_listed_as_the_analysis_goes():
+    listed = []
+
+    def tracks():
+        for index in range(20):
+            listed.append(index)
+            yield SpotifyTrackRef(id=str(index), track_name=f"Song {index}")
+
+    lyrics_service = LyricsService()
+    with patch.object(
+        LyricsService, "get_lyrics", return_value=lyrics_response("la la")
+    ):
+        summaries = analyze_discography(lyrics_service, tracks(), max_workers=1)
+        first = next(summaries)
+        # Two requests per worker in flight, plus the one refilled before
+        # the first result was yielded.
+        assert len(listed) <= 3
+        assert first.tracks_total == len(listed)
+        last = list(summaries)[-1]
+
+    assert last.tracks_total == last.tracks_analyzed == 20
+
+
+def test_analyze_discography_streams_partial_results():
+    responses = {
+        "b": lyrics_response("hello hello", "♪"),
+        "c": None,
+        "a": lyrics_response("goodbye"),
+    }
+
+    def get_lyrics_many(track_ids, max_workers=None):
+        assert sorted(track_ids) == ["a", "b", "c"]
+        yield from responses.items()
+
+    lyrics_service = LyricsService()
+    lyrics_service.get_lyrics_many = Mock(side_effect=get_lyrics_many)
+
+    summaries = list(analyze_discography(lyrics_service, TRACKS))
+
+    assert [summary.tracks_analyzed for summary in summaries] == [1, 1, 2]
+    assert summaries[-1].tracks_without_lyrics == 1
+    assert summaries[-1].tracks_total == 3
+    assert summaries[-1].most_common[0] == ("hello", 2)
@@ -0,0 +1,81 @@
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from http_client import HttpClient
+
+
+def make_response(status_code, headers=None):
+    response = Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def client(sleeps):
+    client = HttpClient(max_retries=3, backoff_factor=0.5, sleep=sleeps.append)
+    client.session = Mock()
+    return client
+
+
+def test_retries_server_errors_with_exponential_backoff(client, sleeps):
+    client.session.get.side_effect = [
+        make_response(503),
+        make_response(502),
+        make_response(200),
+    ]
+
+    response = client.get("https://example.com/lyrics")
+
+    assert response.status_code == 200
+    assert sleeps == [0.5, 1.0]
+
+
+def test_honours_retry_after(client, sleeps):
+    client.session.get.side_effect = [
+        make_response(429, {"Retry-After": "7"}),
+        make_response(200),
+    ]
+
+    client.get("https://example.com/lyrics")
+
+    assert sleeps == [7.0]
+
+
+def test_rate_limits_can_be_left_to_the_caller(sleeps):
+    client = HttpClient(retry_status_codes={500, 502, 503, 504}, sleep=sleeps.append)
+    client.session = Mock()
+    client.session.get.return_value = make_response(429, {"Retry-After": "7"})
+
+    assert client.get("https://example.com/lyrics").status_code == 429
+    assert sleeps == []
+
+
+def test_gives_up_after_max_retries(client, sleeps):
+    client.session.get.return_value = make_response(500)
+
+    response = client.get("https://example.com/lyrics")
+
+    assert response.status_code == 500
+    assert client.session.get.call_count == 4
+
+
+def test_does_not_retry_client_errors(client, sleeps):
+    client.session.get.return_value = make_response(404)
+
+    assert client.get("https://example.com/lyrics").status_code == 404
+    assert sleeps == []
+
+
+def test_retries_connection_errors(client, sleeps):
+    client.session.get.side_effect = [requests.ConnectionError(), make_response(200)]
+
+    assert client.get("https://example.com/lyrics").status_code == 200
+    assert client.session.get.call_args.kwargs["timeout"] == client.timeout
@@ -0,0 +1,16 @@
+import pytest
+
+from benchmarks.bench_import_time import import_time
+
+# Generous enough for a cold CI machine; the full UI stack takes several times this.
+IMPORT_BUDGET_SECONDS = 1.0
+
+
+@pytest.mark.parametrize(
+    "module", ["lyrics_analysis", "SpotifyService.spotify_service", "lyrics_service"]
+)
+def test_core_imports_within_budget(module):
+    seconds, loaded = import_time(module)
+
+    assert loaded == set()
+    assert seconds < IMPORT_BUDGET_SECONDS
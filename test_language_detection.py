@@ -0,0 +1,35 @@
+import pytest
+
+import language_detection
+from language_detection import build_detector, language_percentages
+
+
+@pytest.fixture(scope="module")
+def detector():
+    return build_detector("en,ko")
+
+
+def test_language_percentages_by_word(detector):
+    lines = ["hello my friend how are you", "사랑해 너를 우리 함께", ""]
+
+    assert language_percentages(lines, detector) == {"English": 60.0, "Korean": 40.0}
+
+
+def test_empty_lyrics(detector):
+    assert language_percentages(["", "  "], detector) == {}
+
+
+def test_shared_detector_is_built_once(monkeypatch):
+    monkeypatch.setattr(language_detection, "_detector", None)
+    monkeypatch.setenv("LANGUAGE_DETECTION_LANGUAGES", "en,de")
+
+    assert language_detection.get_detector() is language_detection.get_detector()
+
+
+def test_preload_is_skipped_when_disabled(monkeypatch):
+    monkeypatch.setattr(language_detection, "_detector", None)
+    monkeypatch.delenv("LANGUAGE_DETECTION_ENABLED", raising=False)
+
+    language_detection.preload()
+
+    assert language_detection._detector is None
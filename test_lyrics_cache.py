@@ -0,0 +1,73 @@
+import pytest
+
+from caching import LRUCache
+from lyrics_cache import NO_LYRICS, LyricsCache, SharedLyricsCache
+
+LYRICS = {"lines": [{"startTimeMs": "0", "words": "Hello, it's me"}]}
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "lyrics.sqlite3")
+
+
+def test_hit_and_miss_counters(cache_path, clock):
+    cache = LyricsCache(cache_path, clock=clock)
+
+    assert cache.get("track") is None
+    cache.set("track", LYRICS)
+    assert cache.get("track") == LYRICS
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_cache_survives_restart(cache_path, clock):
+    LyricsCache(cache_path, clock=clock).set("track", LYRICS)
+
+    assert LyricsCache(cache_path, clock=clock).get("track") == LYRICS
+
+
+def test_negative_entries_use_shorter_ttl(cache_path, clock):
+    cache = LyricsCache(cache_path, ttl=100, negative_ttl=10, clock=clock)
+    cache.set("missing", None)
+    cache.set("track", LYRICS)
+
+    assert cache.get("missing") is NO_LYRICS
+    clock.now += 20
+    assert cache.get("missing") is None
+    assert cache.get("track") == LYRICS
+    clock.now += 100
+    assert cache.get("track") is None
+
+
+def test_least_recently_used_entries_are_evicted(cache_path, clock):
+    cache = LyricsCache(cache_path, clock=clock)
+    cache.set("a", LYRICS)
+    size = cache.stats()["bytes"]
+    cache.max_bytes = size * 2
+
+    clock.now += 1
+    cache.set("b", LYRICS)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", LYRICS)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == LYRICS
+    assert cache.get("c") == LYRICS
+
+
+def test_shared_cache_keeps_negative_entries_apart():
+    cache = SharedLyricsCache(LRUCache(maxsize=4), LRUCache(maxsize=4))
+
+    assert cache.get("track") is None
+    cache.set("track", LYRICS)
+    cache.set("instrumental", None)
+
+    assert cache.get("track") == LYRICS
+    assert cache.get("instrumental") is NO_LYRICS
+    assert cache.stats() == {"hits": 2, "misses": 1}
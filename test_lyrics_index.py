@@ -0,0 +1,70 @@
+import pytest
+
+from lyrics_index import LyricsIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LyricsIndex(str(tmp_path / "index.sqlite3"), batch_size=2)
+    yield index
+    index.close()
+
+
+def test_songs_repeating_orders_by_occurrences(index):
+    index.add_text("once", "baby I love you")
+    index.add_text("thrice", "baby baby\nbaby one more time")
+    index.add_text("never", "hello from the other side")
+
+    assert index.songs_repeating("Baby") == [("thrice", 3), ("once", 1)]
+    assert index.songs_repeating("baby", limit=1) == [("thrice", 3)]
+    assert index.songs_repeating("unknown") == []
+
+
+def test_songs_sharing_matches_whole_phrases(index):
+    index.add_text("a", "I will always love you\nlove you always")
+    index.add_text("b", "always love you, always love you")
+    index.add_text("c", "you love always")
+
+    assert index.songs_sharing("always love you") == [("b", 2), ("a", 1)]
+    # Across line breaks, like the repeated n-gram search.
+    assert index.songs_sharing("love you love you") == [("a", 1)]
+    assert index.songs_sharing("love you unknown") == []
+    assert index.songs_sharing("") == []
+
+
+def test_repeated_words_within_a_phrase(index):
+    index.add_text("a", "la la la la")
+    index.add_text("b", "la di la la")
+
+    assert index.songs_sharing("la la la") == [("a", 2)]
+
+
+def test_readding_a_track_replaces_it(index):
+    index.add_text("track", "old words")
+    index.flush()
+    index.add_text("track", "new words")
+
+    assert index.songs_repeating("old") == []
+    assert index.songs_repeating("words") == [("track", 1)]
+    assert index.stats() == {"songs": 1, "words": 2, "postings": 2}
+
+
+def test_remove_and_compact(index):
+    index.add_text("a", "shared only in a")
+    index.add_text("b", "shared")
+    index.remove("a")
+    index.compact()
+
+    assert index.songs_sharing("only in a") == []
+    assert index.stats() == {"songs": 1, "words": 1, "postings": 1}
+
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / "index.sqlite3")
+    index = LyricsIndex(path)
+    index.add_text("track", "still here")
+    index.close()
+
+    reopened = LyricsIndex(path)
+    assert reopened.songs_sharing("still here") == [("track", 1)]
+    reopened.close()
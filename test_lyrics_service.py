@@ -0,0 +1,216 @@
+import json
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from caching import LRUCache
+from corpus_stats import CorpusStats
+from lyrics_index import LyricsIndex
+from lyrics_service import LyricsService
+from scheduler import CircuitOpenError, RateLimitedError
+
+LYRICS_RESPONSE = {
+    "lyrics": {
+        "lines": [
+            {"startTimeMs": "0", "words": "Hello from the other side"},
+            {"startTimeMs": "1000", "words": "♪"},
+            {"startTimeMs": "2000", "words": "Hello from the other side"},
+            {"startTimeMs": "3000", "words": "I must have called a thousand times"},
+        ]
+    }
+}
+
+
+@pytest.fixture
+def word_cloud_renderer():
+    renderer = Mock()
+    renderer.render_many.return_value = [b"png", b"png"]
+    return renderer
+
+
+@pytest.fixture
+def lyrics_service(word_cloud_renderer):
+    return LyricsService(
+        analysis_cache=LRUCache(maxsize=2), word_cloud_renderer=word_cloud_renderer
+    )
+
+
+def test_analyze_is_memoized_per_track(word_cloud_renderer, lyrics_service):
+    with patch.object(
+        LyricsService, "get_lyrics", return_value=LYRICS_RESPONSE
+    ) as mock_get_lyrics:
+        first = lyrics_service.analyze("track")
+        second = lyrics_service.analyze("track")
+
+    assert first is second
+    mock_get_lyrics.assert_called_once_with("track")
+    word_cloud_renderer.render_many.assert_called_once()
+    assert first.repeated_phrases == [("hello from the other side", 2)]
+    assert first.most_common[0] == ("hello", 2)
+    assert first.script_token_counts == {"Latin": 17}
+
+
+def test_analyze_cache_is_bounded(lyrics_service):
+    with patch.object(LyricsService, "get_lyrics", return_value=LYRICS_RESPONSE):
+        for track_id in ["a", "b", "c"]:
+            lyrics_service.analyze(track_id)
+
+    assert len(lyrics_service.analysis_cache) == 2
+
+
+def test_analyze_without_lyrics_is_not_memoized(lyrics_service):
+    with patch.object(LyricsService, "get_lyrics", return_value=None):
+        assert lyrics_service.analyze("track") is None
+
+    assert len(lyrics_service.analysis_cache) == 0
+
+
+@pytest.mark.parametrize("error", [CircuitOpenError("open"), RateLimitedError(1.0)])
+def test_analyze_while_rate_limited_is_not_memoized(lyrics_service, error):
+    with patch.object(LyricsService, "get_lyrics", side_effect=error):
+        with pytest.raises(type(error)):
+            lyrics_service.analyze("track")
+
+    assert len(lyrics_service.analysis_cache) == 0
+
+
+def test_rejected_access_token_is_refreshed_once(lyrics_service):
+    rejected = Mock(status_code=401)
+    accepted = Mock(status_code=200, content=json.dumps(LYRICS_RESPONSE).encode())
+    lyrics_service.http_client = Mock()
+    lyrics_service.http_client.get.side_effect = [rejected, accepted]
+
+    with (
+        patch("lyrics_service.LYRICS_URL", "https://lyrics/"),
+        patch(
+            "lyrics_service.SpotifyService.get_access", side_effect=["revoked", "fresh"]
+        ),
+        patch("lyrics_service.SpotifyService.invalidate_access") as invalidate,
+    ):
+        assert lyrics_service.get_lyrics("track") == LYRICS_RESPONSE
+
+    invalidate.assert_called_once()
+    headers = [
+        call.kwargs["headers"] for call in lyrics_service.http_client.get.mock_calls
+    ]
+    assert [header["Authorization"] for header in headers] == [
+        "Bearer revoked",
+        "Bearer fresh",
+    ]
+
+
+def test_get_lyrics_many_yields_each_track_once(lyrics_service):
+    with patch.object(
+        LyricsService,
+        "get_lyrics",
+        side_effect=lambda track_id: None if track_id == "b" else LYRICS_RESPONSE,
+    ) as mock_get_lyrics:
+        results = dict(lyrics_service.get_lyrics_many(["a", "b", "a", "c"]))
+
+    assert results == {"a": LYRICS_RESPONSE, "b": None, "c": LYRICS_RESPONSE}
+    assert mock_get_lyrics.call_count == 3
+
+
+def test_get_lyrics_many_bounds_requests_in_flight(lyrics_service):
+    listed = []
+
+    def track_ids():
+        for index in range(50):
+            listed.append(index)
+            yield str(index)
+
+    with patch.object(LyricsService, "get_lyrics", return_value=LYRICS_RESPONSE):
+        results = lyrics_service.get_lyrics_many(track_ids(), max_workers=2)
+        next(results)
+        assert len(listed) <= 2 * 2 + 1
+        assert len(list(results)) == 49
+
+
+def test_concurrent_analyze_calls_share_one_computation(lyrics_service):
+    release = threading.Event()
+
+    def get_lyrics(track_id):
+        release.wait(timeout=2)
+        return LYRICS_RESPONSE
+
+    with patch.object(
+        LyricsService, "get_lyrics", side_effect=get_lyrics
+    ) as mock_get_lyrics:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(lyrics_service.analyze("a")))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert len(results) == 4
+    assert all(result is results[0] for result in results)
+    mock_get_lyrics.assert_called_once_with("a")
+
+
+def test_analyze_feeds_the_index(word_cloud_renderer, tmp_path):
+    index = LyricsIndex(str(tmp_path / "index.sqlite3"), batch_size=1)
+    lyrics_service = LyricsService(
+        analysis_cache=LRUCache(maxsize=2),
+        word_cloud_renderer=word_cloud_renderer,
+        index=index,
+    )
+    with patch.object(LyricsService, "get_lyrics", return_value=LYRICS_RESPONSE):
+        lyrics_service.analyze("track")
+
+    assert index.songs_repeating("hello") == [("track", 2)]
+    assert index.songs_sharing("other side hello") == [("track", 1)]
+    index.close()
+
+
+def test_analyze_reports_distinctive_words(word_cloud_renderer, tmp_path):
+    corpus_stats = CorpusStats(str(tmp_path / "corpus.sqlite3"))
+    corpus_stats.add("other", {"hello": 3, "goodbye": 2})
+    lyrics_service = LyricsService(
+        analysis_cache=LRUCache(maxsize=2),
+        word_cloud_renderer=word_cloud_renderer,
+        corpus_stats=corpus_stats,
+    )
+    with patch.object(LyricsService, "get_lyrics", return_value=LYRICS_RESPONSE):
+        analysis = lyrics_service.analyze("track")
+
+    assert corpus_stats.documents() == 2
+    assert "hello" not in dict(analysis.tfidf_words)
+    assert "thousand" in dict(analysis.tfidf_words)
+    assert analysis.log_odds_words
+    corpus_stats.close()
+
+
+def test_analyze_tokenizes_each_line_once(word_cloud_renderer, tmp_path):
+    import streaming_analysis
+
+    index = LyricsIndex(str(tmp_path / "index.sqlite3"), batch_size=1)
+    corpus_stats = CorpusStats(str(tmp_path / "corpus.sqlite3"))
+    lyrics_service = LyricsService(
+        analysis_cache=LRUCache(maxsize=2),
+        word_cloud_renderer=word_cloud_renderer,
+        index=index,
+        corpus_stats=corpus_stats,
+    )
+    with (
+        patch.object(LyricsService, "get_lyrics", return_value=LYRICS_RESPONSE),
+        patch.object(
+            streaming_analysis,
+            "tokenize_words",
+            wraps=streaming_analysis.tokenize_words,
+        ) as tokenize_words,
+        patch("lyrics_index.tokenize", side_effect=AssertionError("tokenized again")),
+    ):
+        lyrics_service.analyze("track")
+
+    # Three lines with words; the instrumental line is skipped.
+    assert tokenize_words.call_count == 3
+    assert index.songs_repeating("hello") == [("track", 2)]
+    assert corpus_stats.documents() == 1
+    index.close()
+    corpus_stats.close()
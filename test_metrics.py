@@ -0,0 +1,108 @@
+import time
+from unittest.mock import patch
+
+import pytest
+
+import metrics
+from benchmarks.stub_server import RateLimitedServer
+from caching import LRUCache
+from http_client import HttpClient
+from lyrics_service import LyricsService
+from metrics import STAGE_SECONDS, Histogram, MetricsRegistry
+from scheduler import RequestScheduler
+
+
+@pytest.fixture
+def registry():
+    registry = MetricsRegistry(enabled=True)
+    with patch("metrics.REGISTRY", registry):
+        yield registry
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        histogram.observe(value)
+
+    assert list(histogram.cumulative()) == [(0.01, 1), (0.1, 3), (float("inf"), 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(3.105)
+
+
+def test_timers_record_stage_histograms(registry):
+    @metrics.timed("decorated")
+    def work():
+        return "done"
+
+    assert work() == "done"
+    with metrics.timer("block"):
+        pass
+
+    assert registry.histogram(STAGE_SECONDS, stage="decorated").count == 1
+    assert registry.histogram(STAGE_SECONDS, stage="block").count == 1
+
+
+def test_disabled_metrics_record_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with patch("metrics.REGISTRY", registry):
+        with metrics.timer("block"):
+            pass
+        metrics.inc("requests_total")
+
+    assert registry.snapshot() == {"counters": [], "histograms": []}
+
+
+def test_trace_collects_stages_while_metrics_are_disabled():
+    with patch("metrics.REGISTRY", MetricsRegistry(enabled=False)):
+        with metrics.trace() as stages:
+            with metrics.timer("outer"):
+                with metrics.timer("inner"):
+                    time.sleep(0.001)
+
+    assert [stage for stage, _ in stages] == ["inner", "outer"]
+    assert stages[1][1] >= stages[0][1] > 0
+
+
+def test_prometheus_text_export(registry):
+    metrics.cache_lookup("search", hit=True)
+    metrics.cache_lookup("search", hit=True)
+    metrics.upstream_error("lyrics", 429)
+    registry.observe(STAGE_SECONDS, 0.003, stage="lyrics.http")
+
+    text = registry.prometheus_text()
+
+    assert "# TYPE cache_requests_total counter" in text
+    assert 'cache_requests_total{cache="search",result="hit"} 2' in text
+    assert 'upstream_errors_total{endpoint="lyrics",status="429"} 1' in text
+    assert "# TYPE stage_duration_seconds histogram" in text
+    assert 'stage_duration_seconds_bucket{stage="lyrics.http",le="0.0025"} 0' in text
+    assert 'stage_duration_seconds_bucket{stage="lyrics.http",le="0.005"} 1' in text
+    assert 'stage_duration_seconds_bucket{stage="lyrics.http",le="+Inf"} 1' in text
+    assert 'stage_duration_seconds_count{stage="lyrics.http"} 1' in text
+
+
+def test_named_caches_count_hits_and_misses(registry):
+    cache = LRUCache(maxsize=2, name="analysis")
+    cache.get_or_compute("a", lambda: 1)
+    cache.get("a")
+
+    assert registry.counter("cache_requests_total", cache="analysis", result="miss")
+    assert registry.counter("cache_requests_total", cache="analysis", result="hit") == 1
+
+
+def test_lyrics_service_counts_upstream_errors_by_status(registry):
+    lyrics_service = LyricsService(
+        http_client=HttpClient(max_retries=0), scheduler=RequestScheduler()
+    )
+
+    with RateLimitedServer(responses={"a": {"lyrics": {"lines": []}}}) as server:
+        with patch("lyrics_service.LYRICS_URL", server.url), patch(
+            "lyrics_service.SpotifyService.get_access", return_value="token"
+        ):
+            with metrics.trace() as stages:
+                assert lyrics_service.get_lyrics("a")
+            assert lyrics_service.get_lyrics("missing") is None
+
+    assert registry.counter("upstream_errors_total", endpoint="lyrics", status="404")
+    # get_access is patched out, so only the lyrics stages are timed.
+    assert [stage for stage, _ in stages] == ["lyrics.http", "lyrics.get_lyrics"]
@@ -0,0 +1,50 @@
+import pytest
+
+from phrases import find_repeated_ngrams, lcp_array, suffix_array, tokenize
+
+LYRICS = """I will always love you
+I will always love you oh baby
+never gonna give you up never gonna let you down
+never gonna give you up never gonna let you down
+I will always love you"""
+
+
+def common_prefix(a, b):
+    length = 0
+    while length < min(len(a), len(b)) and a[length] == b[length]:
+        length += 1
+    return length
+
+
+def test_suffix_array_and_lcp():
+    tokens = [1, 0, 2, 1, 0, 2, 1]
+    suffixes = suffix_array(tokens)
+    lcp = lcp_array(tokens, suffixes)
+
+    assert suffixes == sorted(range(len(tokens)), key=lambda i: tokens[i:])
+    for i in range(1, len(tokens)):
+        assert lcp[i] == common_prefix(tokens[suffixes[i - 1] :], tokens[suffixes[i] :])
+
+
+def test_finds_maximal_phrases_and_drops_sub_phrases():
+    phrases = find_repeated_ngrams(tokenize(LYRICS))
+
+    assert phrases == [
+        ("never gonna give you up never gonna let you down", 2),
+        ("i will always love you", 3),
+    ]
+
+
+def test_finds_hooks_across_line_breaks():
+    words = tokenize("hey ya\nhey ya hey\nya oh\nhey ya hey ya")
+
+    assert find_repeated_ngrams(words, min_length=3)[0][0].startswith("hey ya hey")
+
+
+@pytest.mark.parametrize("max_length", [3, 5])
+def test_long_repeats_are_truncated_once(max_length):
+    words = tokenize("a b c d e f g x a b c d e f g")
+
+    assert find_repeated_ngrams(words, max_length=max_length) == [
+        (" ".join("abcdefg"[:max_length]), 2)
+    ]
@@ -0,0 +1,43 @@
+import threading
+from unittest.mock import Mock
+
+from prefetch import Prefetcher
+
+
+def test_prefetch_analyzes_each_track():
+    lyrics_service = Mock()
+    prefetcher = Prefetcher(lyrics_service, max_workers=2)
+
+    batch = prefetcher.prefetch(["a", "b", "a"])
+    for future in batch.futures:
+        future.result(timeout=2)
+
+    assert sorted(call.args[0] for call in lyrics_service.analyze.call_args_list) == [
+        "a",
+        "b",
+    ]
+    assert batch.done()
+
+
+def test_cancelled_batch_skips_pending_tracks():
+    release = threading.Event()
+    started = threading.Event()
+    lyrics_service = Mock()
+
+    def analyze(track_id):
+        started.set()
+        release.wait(timeout=2)
+
+    lyrics_service.analyze.side_effect = analyze
+    prefetcher = Prefetcher(lyrics_service, max_workers=1)
+
+    batch = prefetcher.prefetch(["a", "b", "c"])
+    assert started.wait(timeout=2)
+    batch.cancel()
+    release.set()
+    prefetcher.shutdown()
+    for future in batch.futures:
+        if not future.cancelled():
+            future.result(timeout=2)
+
+    lyrics_service.analyze.assert_called_once_with("a")
@@ -0,0 +1,47 @@
+import pytest
+
+from repetition import RepetitionMeter, mtld, repetition_stats
+
+
+def test_repetitive_lyrics_score_higher():
+    repetitive = repetition_stats(["love you baby"] * 20)
+    varied = repetition_stats(
+        [
+            "the quick brown fox jumps over the lazy dog",
+            "lorem ipsum dolor sit amet consectetur",
+        ]
+    )
+
+    assert repetitive.compression_ratio > varied.compression_ratio
+    assert repetitive.repeated_token_fraction == pytest.approx(57 / 60)
+    assert repetitive.type_token_ratio == pytest.approx(3 / 60)
+    assert repetitive.mtld < varied.mtld
+
+
+def test_streaming_matches_batch():
+    lines = ["hello from the other side", "hello", "from the other side"]
+    meter = RepetitionMeter()
+    for line in lines:
+        meter.add_line(line)
+
+    assert meter.result() == repetition_stats(lines)
+
+
+def test_result_can_be_taken_while_feeding():
+    lines = ["la la la", "love you baby", "la la la"]
+    meter = RepetitionMeter()
+    for count, line in enumerate(lines, start=1):
+        meter.add_line(line)
+
+        assert meter.result() == repetition_stats(lines[:count])
+
+
+def test_empty_lyrics():
+    stats = repetition_stats([])
+
+    assert stats.compression_ratio == 0.0
+    assert stats.mtld == 0.0
+
+
+def test_mtld_of_fully_diverse_text_is_its_length():
+    assert mtld(["a", "b", "c", "d"]) == 4.0
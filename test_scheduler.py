@@ -0,0 +1,185 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import pytest
+
+from benchmarks.stub_server import RateLimitedServer
+from http_client import HttpClient
+from lyrics_service import LyricsService
+from caching import LRUCache
+from scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    CircuitOpenError,
+    RateLimitedError,
+    RequestScheduler,
+    request_priority,
+)
+
+
+def test_token_bucket_spaces_requests():
+    scheduler = RequestScheduler(rates={"lyrics": (50.0, 1)})
+
+    start = time.perf_counter()
+    for _ in range(6):
+        scheduler.run("lyrics", lambda: None)
+
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_interactive_requests_go_first():
+    scheduler = RequestScheduler(rates={"lyrics": (10.0, 1)})
+    scheduler.run("lyrics", lambda: None)  # drain the burst
+    order = []
+
+    def run(name, priority):
+        scheduler.run("lyrics", lambda: order.append(name), priority=priority)
+
+    background = threading.Thread(target=run, args=("background", BACKGROUND))
+    background.start()
+    time.sleep(0.02)
+    run("interactive", INTERACTIVE)
+    background.join()
+
+    assert order == ["interactive", "background"]
+
+
+def test_identical_in_flight_requests_are_coalesced():
+    scheduler = RequestScheduler()
+    release = threading.Event()
+    request = Mock(side_effect=lambda: release.wait(timeout=2) and "lyrics")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(scheduler.run, "lyrics", request, key="track")
+            for _ in range(4)
+        ]
+        time.sleep(0.05)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["lyrics"] * 4
+    request.assert_called_once()
+    assert scheduler.counters["lyrics", "coalesced"] == 3
+
+
+def test_circuit_opens_after_failures_and_recovers(clock):
+    scheduler = RequestScheduler(failure_threshold=2, reset_timeout=30, clock=clock)
+    failing = Mock(side_effect=ConnectionError("down"))
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            scheduler.run("lyrics", failing)
+    with pytest.raises(CircuitOpenError):
+        scheduler.run("lyrics", failing)
+    assert failing.call_count == 2
+
+    clock.now += 31
+    assert scheduler.run("lyrics", lambda: "ok") == "ok"
+    assert scheduler.circuit_state("lyrics") == "closed"
+
+
+def test_rate_limited_response_pauses_the_endpoint():
+    scheduler = RequestScheduler(rates={"lyrics": (100.0, 10)}, failure_threshold=10)
+
+    def rate_limited():
+        raise RateLimitedError(retry_after=0.2)
+
+    with pytest.raises(RateLimitedError):
+        scheduler.run("lyrics", rate_limited)
+    start = time.perf_counter()
+    scheduler.run("lyrics", lambda: None)
+
+    assert time.perf_counter() - start >= 0.15
+
+
+def fetch_all(server, scheduler, requests=30, workers=6):
+    client = HttpClient(max_retries=0)
+    latencies = []
+
+    def fetch(index):
+        start = time.perf_counter()
+        get = lambda: client.get(f"{server.url}{index}").status_code
+        status = scheduler.run("lyrics", get) if scheduler else get()
+        latencies.append(time.perf_counter() - start)
+        return status
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        statuses = list(executor.map(fetch, range(requests)))
+    client.close()
+    return statuses, sorted(latencies)
+
+
+def test_scheduler_stays_under_the_server_rate_limit():
+    with RateLimitedServer(rate=40, burst=5) as server:
+        statuses, _ = fetch_all(server, scheduler=None)
+    # Without coordination the burst is rejected.
+    assert 429 in statuses
+
+    with RateLimitedServer(rate=40, burst=5) as server:
+        scheduler = RequestScheduler(rates={"lyrics": (30.0, 5)})
+        statuses, latencies = fetch_all(server, scheduler)
+
+    assert statuses == [200] * 30
+    assert server.counts[429] == 0
+    # 30 requests at 30/s with a burst of 5: nobody waits much over a second.
+    assert latencies[int(len(latencies) * 0.95)] < 1.5
+
+
+def test_rate_limited_lyrics_are_not_cached_as_missing():
+    cache = Mock()
+    cache.get.return_value = None
+    lyrics_service = LyricsService(
+        cache=cache,
+        http_client=HttpClient(max_retries=0),
+        scheduler=RequestScheduler(),
+    )
+
+    with RateLimitedServer(rate=0.1, burst=1) as server:
+        with patch("lyrics_service.LYRICS_URL", server.url), patch(
+            "lyrics_service.SpotifyService.get_access", return_value="token"
+        ):
+            assert lyrics_service.get_lyrics("a")["lyrics"]
+            with pytest.raises(RateLimitedError):
+                lyrics_service.get_lyrics("b")
+
+    assert server.counts == {200: 1, 429: 1}
+    cache.set.assert_called_once()
+    assert cache.set.call_args.args[0] == "a"
+
+
+def test_click_on_a_prefetching_track_moves_it_up_the_queue():
+    scheduler = RequestScheduler(rates={"lyrics": (10.0, 1)})
+    scheduler.run("lyrics", lambda: None)  # drain the burst
+    word_cloud_renderer = Mock()
+    word_cloud_renderer.render_many.return_value = [b"png", b"png"]
+    lyrics_service = LyricsService(
+        analysis_cache=LRUCache(maxsize=4),
+        word_cloud_renderer=word_cloud_renderer,
+        scheduler=scheduler,
+    )
+    order = []
+
+    def request_lyrics(url, headers, params):
+        order.append(url[-1])
+        return {"lyrics": {"lines": [{"startTimeMs": "0", "words": "la la"}]}}
+
+    def prefetch(track_id):
+        with request_priority(BACKGROUND):
+            lyrics_service.analyze(track_id)
+
+    with patch("lyrics_service.LYRICS_URL", "https://lyrics/"), patch(
+        "lyrics_service.SpotifyService.get_access", return_value="token"
+    ), patch.object(lyrics_service, "_request_lyrics", side_effect=request_lyrics):
+        threads = [threading.Thread(target=prefetch, args=(i,)) for i in "ba"]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        # The click waits on the prefetch of "a" in the analysis cache.
+        assert lyrics_service.analyze("a") is not None
+        for thread in threads:
+            thread.join()
+
+    assert order == ["a", "b"]
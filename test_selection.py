@@ -0,0 +1,110 @@
+import time
+from unittest.mock import Mock
+
+import pytest
+
+import selection
+from SpotifyService.schemas import ConvertedSpotifySearchResult
+
+
+def make_results(search: int, count: int = 20):
+    return [
+        ConvertedSpotifySearchResult(
+            track_name=f"Track {search}-{index}",
+            artist="Artist",
+            album_image="",
+            id=f"{search}-{index}",
+        )
+        for index in range(count)
+    ]
+
+
+def click(state, track_id):
+    # What the card component leaves in session state after a click.
+    state[selection.card_key(track_id)] = True
+
+
+def test_click_selects_and_analyzes_once():
+    state = {}
+    analyze = Mock(return_value="analysis")
+    selection.set_results(state, make_results(0))
+
+    click(state, "0-3")
+    assert selection.update_selection(state).id == "0-3"
+    assert selection.selected_analysis(state, analyze) == "analysis"
+
+    # Later reruns without a click keep the selection and reuse the analysis.
+    for _ in range(3):
+        assert selection.update_selection(state).id == "0-3"
+        assert selection.selected_analysis(state, analyze) == "analysis"
+    analyze.assert_called_once_with("0-3")
+
+
+def test_no_selection_runs_no_analysis():
+    state = {}
+    analyze = Mock()
+    selection.set_results(state, make_results(0))
+
+    assert selection.update_selection(state) is None
+    assert selection.selected_analysis(state, analyze) is None
+    analyze.assert_not_called()
+
+
+def test_results_are_bounded():
+    state = {}
+    selection.set_results(state, make_results(0, count=selection.MAX_RESULTS + 10))
+
+    assert len(state[selection.RESULTS_KEY]) == selection.MAX_RESULTS
+
+
+def test_repeated_results_are_only_added_once():
+    state = {}
+    first_page = make_results(0, count=3)
+    selection.set_results(state, first_page)
+
+    added = selection.add_results(state, make_results(0, count=5))
+
+    assert [result.id for result in added] == ["0-3", "0-4"]
+    assert list(state[selection.RESULTS_KEY]) == [f"0-{index}" for index in range(5)]
+
+
+def test_failed_analysis_is_retried_on_the_next_rerun():
+    state = {}
+    selection.set_results(state, make_results(0, count=2))
+    click(state, "0-1")
+    selection.update_selection(state)
+    analyze = Mock(side_effect=[RuntimeError("rate limited"), "analysis"])
+
+    with pytest.raises(RuntimeError):
+        selection.selected_analysis(state, analyze)
+
+    assert selection.selected_analysis(state, analyze) == "analysis"
+
+
+def test_rerun_cost_stays_flat_over_many_searches():
+    state = {}
+    analyze = Mock(side_effect=lambda track_id: f"analysis of {track_id}")
+
+    def rerun_time():
+        start = time.perf_counter()
+        for _ in range(200):
+            selection.update_selection(state)
+            selection.selected_analysis(state, analyze)
+        return time.perf_counter() - start
+
+    sizes = []
+    timings = []
+    for search in range(500):
+        # A click left over from the previous results must not select anything.
+        click(state, f"{search - 1}-0")
+        selection.set_results(state, make_results(search))
+        click(state, f"{search}-{search % 20}")
+        assert selection.update_selection(state).id == f"{search}-{search % 20}"
+        selection.selected_analysis(state, analyze)
+        sizes.append(len(state))
+        if search in (10, 499):
+            timings.append(min(rerun_time() for _ in range(3)))
+
+    assert analyze.call_count == 500
+    assert max(sizes) == sizes[0]
+    assert timings[1] < timings[0] * 3
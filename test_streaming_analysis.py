@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from lyrics_analysis import combined_lyrics, find_repeated_phrases
+from phrases import find_repeated_ngrams, tokenize
+from repetition import repetition_stats
+from streaming_analysis import IncrementalAnalyzer
+from text_analysis import analyze_text
+
+FIXTURES = sorted((Path(__file__).parent / "benchmarks/fixtures/lyrics").glob("*.json"))
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: path.stem)
+def test_matches_the_full_analysis(path):
+    response = json.loads(path.read_text(encoding="utf-8"))
+    lyrics = combined_lyrics(response)
+
+    analyzer = IncrementalAnalyzer().add_lines(response["lyrics"]["lines"])
+
+    assert analyzer.stats() == analyze_text("\n".join(lyrics.values()))
+    assert analyzer.repeated_phrases() == find_repeated_phrases(lyrics)[1]
+    assert analyzer.repetition() == repetition_stats(lyrics.values())
+    assert analyzer.repeated_ngrams() == find_repeated_ngrams(
+        tokenize("\n".join(lyrics.values()))
+    )
+
+
+def test_snapshot_at_any_point():
+    analyzer = IncrementalAnalyzer()
+    analyzer.add_line("Hello from the other side", 0)
+    analyzer.add_line("사랑 사랑 hello", 1500)
+
+    stats = analyzer.stats(top_n=2)
+    assert stats.word_count == 8
+    assert stats.most_common == [("hello", 2), ("사랑", 2)]
+    assert stats.unique_words == ["from", "the", "other", "side"]
+    assert stats.char_counts == {"Korean": 4}
+
+    analyzer.add_line("hello from the other side", 3000)
+
+    assert analyzer.stats().unique_words == []
+    assert analyzer.repeated_phrases() == [("hello from the other side", 2)]
+
+
+def test_timeline_follows_the_line_timestamps():
+    analyzer = IncrementalAnalyzer().add_lines(
+        [
+            {"startTimeMs": "0", "words": "la la la"},
+            {"startTimeMs": "1000", "words": "♪"},
+            {"startTimeMs": "2000", "words": "la la la"},
+            {"startTimeMs": "3000", "words": "something new"},
+        ]
+    )
+
+    assert [point.start_time_ms for point in analyzer.timeline] == [0, 2000, 3000]
+    assert [point.word_count for point in analyzer.timeline] == [3, 6, 8]
+    assert [point.repeated_line_count for point in analyzer.timeline] == [0, 1, 1]
+    assert [round(point.repeated_token_fraction, 3) for point in analyzer.timeline] == [
+        0.667,
+        0.833,
+        0.625,
+    ]
@@ -0,0 +1,68 @@
+from collections import Counter
+
+from benchmarks.corpus import make_lyrics
+from benchmarks.legacy import count_most_common
+from text_analysis import TOKEN_PATTERN, analyze_text, count_words, tokenize_words
+from unicode_scripts import script_of
+
+
+def count_words_legacy(text):
+    return Counter(TOKEN_PATTERN.findall(text.lower()))
+
+
+def test_matches_legacy_counter():
+    lyrics = make_lyrics(lines=100)
+
+    stats = analyze_text(lyrics)
+    _, most_common, char_counts, unique_words, _ = count_most_common(lyrics)
+
+    assert stats.most_common == most_common
+    assert stats.unique_words == unique_words
+    assert stats.char_counts == char_counts
+
+
+def test_multilingual_counts_split_only_chinese_and_japanese():
+    lyrics = make_lyrics(lines=100, multilingual=True)
+
+    counter = count_words(lyrics)
+    legacy = count_words_legacy(lyrics)
+
+    assert analyze_text(lyrics).char_counts == count_most_common(lyrics)[2]
+    for word, count in legacy.items():
+        if not any(script_of(char) in ("Chinese", "Japanese") for char in word):
+            assert counter[word] == count
+    assert sum(counter.values()) > sum(legacy.values())
+
+
+def test_chinese_and_japanese_are_counted_per_character():
+    stats = analyze_text("我爱你 我 love あなた 사랑해")
+
+    assert stats.word_count == 9
+    assert stats.most_common[0] == ("我", 2)
+    assert "사랑해" in stats.unique_words
+    assert tokenize_words("Love我 ¿Qué? 사랑해") == ["love", "我", "¿qué", "사랑해"]
+
+
+def test_word_count_ignores_empty_tokens():
+    stats = analyze_text('Hello, "world" (hello)!')
+
+    assert stats.word_count == 3
+    assert stats.most_common == [("hello", 2), ("world", 1)]
+    assert stats.unique_words == ["world"]
+
+
+def test_cjk_characters_are_counted_per_script():
+    stats = analyze_text("사랑해 我爱你 あなた love")
+
+    assert stats.char_counts == {"Korean": 3, "Chinese": 3, "Japanese": 3}
+
+
+def test_other_scripts_are_counted_latin_is_not():
+    stats = analyze_text("привет мир γεια שלום สวัสดี café")
+
+    assert stats.char_counts == {
+        "Thai": 6,
+        "Hebrew": 4,
+        "Cyrillic": 9,
+        "Greek": 4,
+    }
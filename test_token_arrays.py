@@ -0,0 +1,93 @@
+from collections import Counter
+
+import numpy as np
+
+from text_analysis import analyze_text
+from token_arrays import (
+    CHINESE,
+    JAPANESE,
+    KOREAN,
+    LATIN,
+    OTHER,
+    SongTokens,
+    TokenCorpus,
+    Vocabulary,
+    most_common,
+    ngram_counts,
+    script_flags,
+    script_token_counts,
+    top_words,
+    unique_word_ids,
+    word_counts,
+)
+
+LINES = ["Love you baby", "", "love 사랑해 baby baby"]
+
+
+def test_from_lines_keeps_line_boundaries():
+    vocabulary = Vocabulary()
+    song = SongTokens.from_lines(LINES, vocabulary)
+
+    assert song.tokens.dtype == np.int32
+    assert vocabulary.decode(song.line(0)) == ["love", "you", "baby"]
+    assert vocabulary.decode(song.line(1)) == []
+    assert vocabulary.decode(song.line(2)) == ["love", "사랑해", "baby", "baby"]
+    assert len(SongTokens.from_lines([], vocabulary).line_offsets) == 0
+
+
+def test_counts_match_string_analysis():
+    vocabulary = Vocabulary()
+    song = SongTokens.from_lines(LINES, vocabulary)
+    stats = analyze_text("\n".join(LINES), top_n=3)
+
+    assert most_common(song, vocabulary, top_n=3) == stats.most_common
+    assert sorted(vocabulary.decode(unique_word_ids(song))) == sorted(
+        stats.unique_words
+    )
+    assert word_counts(song, len(vocabulary))[vocabulary.ids["baby"]] == 3
+
+
+def test_script_flags():
+    vocabulary = Vocabulary()
+    song = SongTokens.from_lines(LINES, vocabulary)
+
+    assert script_flags("café") == LATIN
+    assert script_flags("사랑해") == KOREAN
+    assert script_flags("Việt") == LATIN
+    assert script_flags("愛してる") == CHINESE | JAPANESE
+    assert script_flags("привет") == OTHER
+    assert script_token_counts(song, vocabulary) == {"Latin": 6, "Korean": 1}
+
+
+def test_ngram_counts():
+    vocabulary = Vocabulary()
+    song = SongTokens.from_lines(["a b a b a"], vocabulary)
+
+    grams, counts = ngram_counts(song, 2)
+    found = {tuple(vocabulary.decode(gram)): int(c) for gram, c in zip(grams, counts)}
+    assert found == {("a", "b"): 2, ("b", "a"): 2}
+    assert ngram_counts(song, 6)[0].shape == (0, 6)
+
+
+def test_corpus_shares_vocabulary():
+    corpus = TokenCorpus()
+    corpus.add(["la la la"])
+    corpus.add(["la di da"])
+
+    ids = corpus.vocabulary.ids
+    assert len(corpus.vocabulary) == 3
+    assert list(corpus.song_offsets) == [0, 3, 6]
+    assert corpus.word_counts()[ids["la"]] == 4
+    assert corpus.document_frequency()[ids["la"]] == 2
+    assert corpus.document_frequency()[ids["da"]] == 1
+
+
+def test_top_words_breaks_ties_like_counter():
+    corpus = TokenCorpus()
+    words = "c a b a c d e e f".split()
+    corpus.add([" ".join(words)])
+
+    for top_n in (1, 3, 10):
+        assert top_words(corpus.word_counts(), corpus.vocabulary, top_n) == Counter(
+            words
+        ).most_common(top_n)
@@ -0,0 +1,106 @@
+from collections import Counter
+
+import pytest
+
+from benchmarks import legacy
+from benchmarks.corpus import make_lyrics
+from text_analysis import count_scripts, count_words
+import unicode_scripts
+from unicode_scripts import (
+    SCRIPTS,
+    char_count_matrix,
+    char_counts,
+    classify,
+    script_counts,
+    script_of,
+    segments,
+    split_token,
+    tokenize,
+)
+
+
+def test_classify_maps_every_character():
+    ids = classify("a 사🙂я")
+
+    assert [SCRIPTS[script_id] for script_id in ids] == [
+        "Latin",
+        "",
+        "Korean",
+        "",
+        "Cyrillic",
+    ]
+    assert script_of("ก") == "Thai"
+    assert script_of("1") == ""
+
+
+def test_segments_split_on_script_changes():
+    assert segments("don't stop 我爱你love, мир") == [
+        ("Latin", "don't"),
+        ("Latin", "stop"),
+        ("Chinese", "我爱你"),
+        ("Latin", "love"),
+        ("Cyrillic", "мир"),
+    ]
+    # A joiner between two scripts, or at the edge of a word, is not a letter.
+    assert segments("'a-мир'") == [("Latin", "a"), ("Cyrillic", "мир")]
+
+
+def test_cjk_is_split_into_characters():
+    assert tokenize("我爱你 あなた 사랑해") == [
+        ("Chinese", "我"),
+        ("Chinese", "爱"),
+        ("Chinese", "你"),
+        ("Japanese", "あ"),
+        ("Japanese", "な"),
+        ("Japanese", "た"),
+        ("Korean", "사랑해"),
+    ]
+
+
+def test_script_counts_are_weighted():
+    chars, tokens = script_counts(["我爱你", "love", "don't", "мир"], [2, 1, 3, 1])
+
+    assert chars == {"Chinese": 6, "Cyrillic": 3, "Latin": 16}
+    assert tokens == {"Chinese": 6, "Cyrillic": 1, "Latin": 4}
+    assert char_counts(["我爱你", "мир"]) == {"Chinese": 3, "Cyrillic": 3}
+    assert script_counts([]) == ({}, {})
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_the_per_character_scan(seed):
+    counter = count_words(make_lyrics(lines=200, multilingual=True, seed=seed))
+
+    assert count_scripts(counter) == legacy.count_scripts(counter)
+
+
+def test_characters_outside_the_table_are_ignored():
+    assert count_scripts(Counter({"𠀀🙂": 2, "ω": 1})) == {"Greek": 1}
+
+
+def test_split_token_only_splits_chinese_japanese_and_thai():
+    assert split_token("我爱你") == ("我", "爱", "你")
+    assert split_token("love我") == ("love", "我")
+    assert split_token("2次") == ("2", "次")
+    assert split_token("사랑해") == ("사랑해",)
+    assert split_token("¿qué") == ("¿qué",)
+
+
+def test_thai_is_split_with_the_dictionary_segmenter(monkeypatch):
+    monkeypatch.setattr(
+        unicode_scripts, "_word_segmenter", lambda: lambda text: ["สวัส", "ดี"]
+    )
+    split_token.cache_clear()
+    try:
+        assert split_token("สวัสดี") == ("สวัส", "ดี")
+    finally:
+        split_token.cache_clear()
+
+
+def test_char_count_matrix_has_a_row_per_token():
+    matrix = char_count_matrix(["我爱你", "мир", "a-b"])
+
+    assert matrix.shape == (3, len(SCRIPTS))
+    assert matrix[0, SCRIPTS.index("Chinese")] == 3
+    assert matrix[1, SCRIPTS.index("Cyrillic")] == 3
+    assert matrix[2, SCRIPTS.index("Latin")] == 2
+    assert char_count_matrix([]).shape == (0, len(SCRIPTS))
@@ -0,0 +1,71 @@
+from unittest.mock import patch
+
+import pytest
+
+from caching import LRUCache
+from word_cloud import WordCloudRenderer, find_font, frequencies_key
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+@pytest.fixture
+def renderer():
+    renderer = WordCloudRenderer(processes=0, cache_size=4)
+    yield renderer
+    renderer.shutdown()
+
+
+def test_renders_png_bytes(renderer):
+    image = renderer.render([("love", 3), ("baby", 2)])
+
+    assert image.startswith(PNG_SIGNATURE)
+
+
+def test_empty_frequencies_render_nothing(renderer):
+    assert renderer.render({}) == b""
+
+
+def test_images_are_cached_by_frequencies(renderer):
+    with patch("word_cloud.render_png", return_value=b"png") as mock_render:
+        renderer.render({"love": 3, "baby": 2})
+        renderer.render([("baby", 2), ("love", 3)])
+
+    mock_render.assert_called_once()
+    assert len(renderer.cache) == 1
+
+
+def test_an_empty_injected_cache_is_used():
+    cache = LRUCache(maxsize=4)
+
+    assert WordCloudRenderer(processes=0, cache=cache).cache is cache
+
+
+def test_render_many_returns_images_the_cache_evicted():
+    cache = LRUCache(maxsize=1)
+    renderer = WordCloudRenderer(processes=0, cache=cache)
+    with patch("word_cloud.render_png", side_effect=[b"love", b"baby"]):
+        images = renderer.render_many([{"love": 3}, {"baby": 1}])
+
+    assert images == [b"love", b"baby"]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_find_font_skips_fonts_that_are_not_installed():
+    from wordcloud.wordcloud import FONT_PATH
+
+    assert find_font(["not-installed.ttf", FONT_PATH]) == FONT_PATH
+    assert find_font(["not-installed.ttf"]) is None
+
+
+def test_frequencies_key_ignores_order():
+    assert frequencies_key({"a": 1, "b": 2}) == frequencies_key({"b": 2, "a": 1})
+
+
+def test_render_many_in_process_pool():
+    renderer = WordCloudRenderer(processes=2)
+    try:
+        images = renderer.render_many([{"love": 3}, {"baby": 1, "oh": 1}])
+    finally:
+        renderer.shutdown()
+
+    assert all(image.startswith(PNG_SIGNATURE) for image in images)
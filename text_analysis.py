@@ -0,0 +1,77 @@
+import heapq
+import re
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List, Tuple
+
+from pydantic import BaseModel
+
+from unicode_scripts import SCRIPT_RANGES, char_counts, script_of, split_token
+
+# Same separators LyricsService has always split on: commas, parentheses,
+# question marks, double quotes, exclamation marks and whitespace.
+TOKEN_PATTERN = re.compile(r'[^,"\s()\?!]+')
+
+# Scripts whose characters are counted; Latin words are already counted.
+COUNTED_SCRIPTS = tuple(script for script in SCRIPT_RANGES if script != "Latin")
+
+
+class TextStats(BaseModel):
+    word_count: int
+    most_common: List[Tuple[str, int]]
+    unique_words: List[str]
+    char_counts: Dict[str, int]
+
+
+def classify_char(char: str) -> str:
+    """The script counted for ``char``, ``""`` for Latin and non-letters."""
+    script = script_of(char)
+    return "" if script == "Latin" else script
+
+
+def count_scripts(counter: Counter) -> Dict[str, int]:
+    """Counts non-Latin characters per script from a token counter.
+
+    The distinct non-ASCII tokens are classified in one vectorized pass and
+    weighted by their frequency, so the cost depends on the vocabulary
+    rather than on the lyrics length.
+    """
+    tokens = [token for token in counter if not token.isascii()]
+    counts = char_counts(tokens, [counter[token] for token in tokens])
+    counts.pop("Latin", None)
+    return counts
+
+
+def segment_tokens(tokens: List[str]) -> List[str]:
+    """Splits ``TOKEN_PATTERN`` matches that hold Chinese, Japanese or Thai
+    into words, as ``unicode_scripts.split_token`` does."""
+    return [
+        word
+        for token in tokens
+        for word in ((token,) if token.isascii() else split_token(token))
+    ]
+
+
+def tokenize_words(text: str) -> List[str]:
+    """Lowercased words of ``text``, in order."""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    return tokens if text.isascii() else segment_tokens(tokens)
+
+
+def count_words(text: str) -> Counter:
+    return Counter(tokenize_words(text))
+
+
+def analyze_text(text: str, top_n: int = 10) -> TextStats:
+    """Tokenizes, lowercases and counts lyrics in a single pass."""
+    counter = count_words(text)
+
+    most_common = heapq.nlargest(top_n, counter.items(), key=itemgetter(1))
+    unique_words = [word for word, count in counter.items() if count == 1]
+
+    return TextStats(
+        word_count=sum(counter.values()),
+        most_common=most_common,
+        unique_words=unique_words,
+        char_counts=count_scripts(counter),
+    )
@@ -0,0 +1,233 @@
+"""Compact, array-backed token storage for corpus-scale analysis.
+
+Words are interned once in a shared ``Vocabulary`` and each song becomes an
+int32 token array with line offsets, so counting and n-gram operations run
+vectorized over NumPy arrays instead of over millions of small strings.
+"""
+
+import re
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from text_analysis import TOKEN_PATTERN, segment_tokens
+from unicode_scripts import SCRIPTS, char_count_matrix
+
+# Script flags stored per vocabulary entry.
+LATIN = 1
+KOREAN = 2
+CHINESE = 4
+JAPANESE = 8
+OTHER = 16
+
+# TOKEN_PATTERN never matches whitespace, so newlines can be matched separately.
+_TOKENS_AND_BREAKS = re.compile(TOKEN_PATTERN.pattern + r"|\n")
+
+SCRIPT_FLAGS = {"Korean": KOREAN, "Chinese": CHINESE, "Japanese": JAPANESE}
+
+# Flag per ``unicode_scripts.SCRIPTS`` id; the remaining scripts are OTHER.
+_SCRIPT_ID_FLAGS = np.array(
+    [0]
+    + [
+        LATIN if script == "Latin" else SCRIPT_FLAGS.get(script, OTHER)
+        for script in SCRIPTS[1:]
+    ],
+    dtype=np.uint8,
+)
+
+
+def script_flags_of(words: Sequence[str]) -> np.ndarray:
+    """Script flags of every word, from one ``unicode_scripts`` pass over the
+    non-ASCII words. Words without a classified letter are OTHER."""
+    flags = np.full(len(words), LATIN, dtype=np.uint8)
+    rows = [index for index, word in enumerate(words) if not word.isascii()]
+    if rows:
+        present = char_count_matrix([words[index] for index in rows]) > 0
+        found = np.bitwise_or.reduce(
+            np.where(present, _SCRIPT_ID_FLAGS, 0).astype(np.uint8), axis=1
+        )
+        flags[rows] = np.where(found, found, OTHER)
+    return flags
+
+
+def script_flags(word: str) -> int:
+    return int(script_flags_of([word])[0])
+
+
+class Vocabulary:
+    """Interning table mapping words to dense int ids, with script flags."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.words: List[str] = []
+        self._flags = np.zeros(1024, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self._flags[: len(self.words)]
+
+    def intern(self, word: str) -> int:
+        token = self.ids.get(word)
+        if token is None:
+            self.intern_new([word])
+            token = self.ids[word]
+        return token
+
+    def intern_new(self, words: List[str]):
+        """Interns distinct words not in the vocabulary yet, classifying
+        their scripts together."""
+        start = len(self.words)
+        for word in words:
+            self.ids[word] = len(self.words)
+            self.words.append(word)
+        self._flags = grown(self._flags, len(self.words))
+        self._flags[start : len(self.words)] = script_flags_of(words)
+
+    def decode(self, tokens: Iterable[int]) -> List[str]:
+        return [self.words[token] for token in tokens]
+
+
+class SongTokens:
+    """One song as an int32 token array; ``line_offsets[i]`` is where line i starts."""
+
+    __slots__ = ("tokens", "line_offsets")
+
+    def __init__(self, tokens: np.ndarray, line_offsets: np.ndarray):
+        self.tokens = tokens
+        self.line_offsets = line_offsets
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], vocabulary: Vocabulary) -> "SongTokens":
+        lines = list(lines)
+        text = "\n".join(lines)
+        # One regex pass over the whole song; line breaks come back as tokens.
+        pieces = _TOKENS_AND_BREAKS.findall(text.lower())
+        if not text.isascii():
+            pieces = segment_tokens(pieces)
+        # Intern unseen words in first-seen order; the id lookup runs in C.
+        vocabulary.intern_new(
+            [
+                word
+                for word in dict.fromkeys(pieces)
+                if word not in vocabulary.ids and word != "\n"
+            ]
+        )
+        ids = np.fromiter(
+            map(vocabulary.ids.get, pieces, repeat(-1)),
+            dtype=np.int32,
+            count=len(pieces),
+        )
+        breaks = np.flatnonzero(ids < 0)
+        tokens = ids[ids >= 0]
+        # Line i + 1 starts after the i-th break, minus the breaks before it.
+        offsets = breaks - np.arange(len(breaks))
+        line_offsets = np.concatenate(([0], offsets)) if lines else offsets
+        return cls(tokens, line_offsets.astype(np.int32))
+
+    def line(self, index: int) -> np.ndarray:
+        end = (
+            self.line_offsets[index + 1]
+            if index + 1 < len(self.line_offsets)
+            else len(self.tokens)
+        )
+        return self.tokens[self.line_offsets[index] : end]
+
+
+def word_counts(song: SongTokens, vocabulary_size: int) -> np.ndarray:
+    """Occurrences of every vocabulary id in the song."""
+    return np.bincount(song.tokens, minlength=vocabulary_size)
+
+
+def most_common(
+    song: SongTokens, vocabulary: Vocabulary, top_n: int = 10
+) -> List[Tuple[str, int]]:
+    ids, counts = np.unique(song.tokens, return_counts=True)
+    # Stable sort so ties keep vocabulary (first-seen) order.
+    order = np.argsort(-counts, kind="stable")[:top_n]
+    return [(vocabulary.words[ids[i]], int(counts[i])) for i in order]
+
+
+def top_words(
+    counts: np.ndarray, vocabulary: Vocabulary, top_n: int = 10
+) -> List[Tuple[str, int]]:
+    """The ``top_n`` words with the highest ``counts[id]``, ties in vocabulary
+    (first-seen) order, like ``Counter.most_common``."""
+    candidates = np.flatnonzero(counts)
+    if len(candidates) > top_n:
+        # Only the words counted at least as often as the top_n-th are sorted.
+        threshold = np.partition(counts[candidates], -top_n)[-top_n]
+        candidates = candidates[counts[candidates] >= threshold]
+    order = candidates[np.argsort(-counts[candidates], kind="stable")][:top_n]
+    return [(vocabulary.words[i], int(counts[i])) for i in order.tolist()]
+
+
+def grown(array: np.ndarray, size: int) -> np.ndarray:
+    """``array`` with room for at least ``size`` entries; new entries are 0."""
+    if size <= len(array):
+        return array
+    result = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    result[: len(array)] = array
+    return result
+
+
+def unique_word_ids(song: SongTokens) -> np.ndarray:
+    """Ids of the words that occur exactly once in the song."""
+    ids, counts = np.unique(song.tokens, return_counts=True)
+    return ids[counts == 1]
+
+
+def script_token_counts(song: SongTokens, vocabulary: Vocabulary) -> Dict[str, int]:
+    """Token counts per script flag, from the precomputed vocabulary flags."""
+    flags = vocabulary.flags[song.tokens]
+    names = {"Latin": LATIN, **SCRIPT_FLAGS, "Other": OTHER}
+    counts = {name: int(np.count_nonzero(flags & flag)) for name, flag in names.items()}
+    return {name: count for name, count in counts.items() if count}
+
+
+def ngram_counts(song: SongTokens, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct n-grams of token ids (one per row) and their counts."""
+    if len(song.tokens) < n:
+        return np.empty((0, n), dtype=np.int32), np.empty(0, dtype=np.int64)
+    windows = np.lib.stride_tricks.sliding_window_view(song.tokens, n)
+    return np.unique(windows, axis=0, return_counts=True)
+
+
+class TokenCorpus:
+    """Many songs sharing one vocabulary, stored as a single token array."""
+
+    def __init__(self, vocabulary: Optional[Vocabulary] = None):
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self._chunks: List[np.ndarray] = []
+        self._song_lengths: List[int] = []
+
+    def add(self, lines: Iterable[str]) -> SongTokens:
+        song = SongTokens.from_lines(lines, self.vocabulary)
+        self._chunks.append(song.tokens)
+        self._song_lengths.append(len(song.tokens))
+        return song
+
+    def __len__(self) -> int:
+        return len(self._song_lengths)
+
+    @property
+    def tokens(self) -> np.ndarray:
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.empty(0, dtype=np.int32)
+
+    @property
+    def song_offsets(self) -> np.ndarray:
+        return np.concatenate(([0], np.cumsum(self._song_lengths)))
+
+    def word_counts(self) -> np.ndarray:
+        return np.bincount(self.tokens, minlength=len(self.vocabulary))
+
+    def document_frequency(self) -> np.ndarray:
+        """Number of songs each vocabulary id appears in."""
+        song_ids = np.repeat(np.arange(len(self), dtype=np.int64), self._song_lengths)
+        pairs = np.unique(song_ids * len(self.vocabulary) + self.tokens)
+        return np.bincount(pairs % len(self.vocabulary), minlength=len(self.vocabulary))
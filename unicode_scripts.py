@@ -0,0 +1,278 @@
+"""Unicode script classification over NumPy arrays of code points.
+
+Text is encoded as UTF-32, viewed as a uint32 array and mapped through a
+lookup table of script ids, so every character is classified in a single
+vectorized pass. The table covers the Basic Multilingual Plane; other code
+points (emoji, rare CJK extensions) are not counted.
+
+Chinese and Japanese are written without spaces, so their runs are split
+into one word per character. Thai is segmented with ``pythainlp`` when it is
+installed and otherwise kept as one word per run. ``split_token`` applies
+this to the space-delimited tokens the text analysis counts.
+"""
+
+import functools
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Code point ranges per script, in the order they are reported. The CJK
+# ranges are the ones the analysis has always counted.
+SCRIPT_RANGES = {
+    "Korean": ((0xAC00, 0xD7AF),),
+    "Chinese": ((0x4E00, 0x9FFF),),
+    "Japanese": ((0x3040, 0x309F), (0x30A0, 0x30FF)),
+    "Thai": ((0x0E00, 0x0E7F),),
+    "Arabic": ((0x0600, 0x06FF), (0x0750, 0x077F), (0xFB50, 0xFDFF), (0xFE70, 0xFEFF)),
+    "Hebrew": ((0x0590, 0x05FF),),
+    "Cyrillic": ((0x0400, 0x052F),),
+    "Greek": ((0x0370, 0x03FF), (0x1F00, 0x1FFF)),
+    "Devanagari": ((0x0900, 0x097F),),
+    "Bengali": ((0x0980, 0x09FF),),
+    "Tamil": ((0x0B80, 0x0BFF),),
+    "Georgian": ((0x10A0, 0x10FF),),
+    "Armenian": ((0x0530, 0x058F),),
+    "Latin": (
+        (0x0041, 0x005A),
+        (0x0061, 0x007A),
+        (0x00C0, 0x00D6),
+        (0x00D8, 0x00F6),
+        (0x00F8, 0x024F),
+        (0x1E00, 0x1EFF),
+    ),
+}
+# Script names by id; 0 is everything else (spaces, digits, punctuation).
+SCRIPTS: Tuple[str, ...] = ("",) + tuple(SCRIPT_RANGES)
+CHARACTER_SEGMENTED = frozenset({"Chinese", "Japanese"})
+DICTIONARY_SEGMENTED = frozenset({"Thai"})
+
+
+def _character_class(scripts) -> str:
+    ranges = (r for script in sorted(scripts) for r in SCRIPT_RANGES[script])
+    return "[" + "".join(f"\\u{start:04x}-\\u{end:04x}" for start, end in ranges) + "]+"
+
+
+# Single tokens are too short to amortize a NumPy call, so split_token
+# finds the runs to segment with a regex built from the same ranges.
+_SEGMENTED_RUNS = re.compile(
+    f"({_character_class(CHARACTER_SEGMENTED)})"
+    f"|({_character_class(DICTIONARY_SEGMENTED)})"
+)
+
+# Apostrophes, hyphens and combining accents between two letters of the
+# same script belong to the word ("don't", "jean-luc").
+_JOINERS = (0x27, 0x2D, 0x2019)
+_COMBINING = (0x0300, 0x036F)
+_LAST_CODE = 0xFFFF
+
+
+@functools.lru_cache(maxsize=None)
+def lookup_table() -> np.ndarray:
+    """Script id per BMP code point, with the noncharacter U+FFFF unclassified."""
+    table = np.zeros(_LAST_CODE + 1, dtype=np.uint8)
+    for script_id, ranges in enumerate(SCRIPT_RANGES.values(), start=1):
+        for start, end in ranges:
+            table[start : end + 1] = script_id
+    table[_LAST_CODE] = 0
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def _joiner_table() -> np.ndarray:
+    table = np.zeros(_LAST_CODE + 1, dtype=bool)
+    table[list(_JOINERS)] = True
+    table[_COMBINING[0] : _COMBINING[1] + 1] = True
+    return table
+
+
+def code_points(text: str) -> np.ndarray:
+    return np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+
+
+def classify(text: str) -> np.ndarray:
+    """Script id of every character of ``text``, as a uint8 array."""
+    return lookup_table()[np.minimum(code_points(text), _LAST_CODE)]
+
+
+def script_of(char: str) -> str:
+    """Script name of a single character, ``""`` if it has none."""
+    return SCRIPTS[lookup_table()[min(ord(char), _LAST_CODE)]]
+
+
+def _classify_words(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Script ids per character, and the same with joiners given the script
+    of the word around them."""
+    codes = np.minimum(code_points(text), _LAST_CODE)
+    ids = lookup_table()[codes]
+    word_ids = ids
+    if len(ids) > 2:
+        joined = _joiner_table()[codes[1:-1]] & (ids[:-2] == ids[2:]) & (ids[:-2] != 0)
+        if joined.any():
+            word_ids = ids.copy()
+            word_ids[1:-1][joined] = ids[:-2][joined]
+    return ids, word_ids
+
+
+def _runs(ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Start, end and script id of every run of letters of one script."""
+    if not len(ids):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.uint8)
+    change = np.empty(len(ids), dtype=bool)
+    change[0] = True
+    np.not_equal(ids[1:], ids[:-1], out=change[1:])
+    starts = np.flatnonzero(change)
+    ends = np.append(starts[1:], len(ids))
+    run_ids = ids[starts]
+    letters = run_ids != 0
+    return starts[letters], ends[letters], run_ids[letters]
+
+
+def segments(text: str) -> List[Tuple[str, str]]:
+    """``(script, run)`` for every run of letters of one script, in order."""
+    starts, ends, run_ids = _runs(_classify_words(text)[1])
+    return [
+        (SCRIPTS[script_id], text[start:end])
+        for start, end, script_id in zip(
+            starts.tolist(), ends.tolist(), run_ids.tolist()
+        )
+    ]
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """``(script, token)`` pairs, with CJK split into characters and Thai
+    split into dictionary words when a segmenter is available."""
+    tokens = []
+    for script, segment in segments(text):
+        if script in CHARACTER_SEGMENTED:
+            tokens.extend((script, char) for char in segment)
+        elif script in DICTIONARY_SEGMENTED:
+            tokens.extend((script, word) for word in _segment_words(segment))
+        else:
+            tokens.append((script, segment))
+    return tokens
+
+
+@functools.lru_cache(maxsize=65536)
+def split_token(token: str) -> Tuple[str, ...]:
+    """Splits a space-delimited token into words where it holds Chinese,
+    Japanese or Thai; everything else in it is kept as it is.
+
+    ``"我爱你"`` becomes three words and ``"love我"`` two, while ``"사랑해"``
+    or ``"don't"`` stay one.
+    """
+    if token.isascii():
+        return (token,)
+    words: List[str] = []
+    end = 0
+    for match in _SEGMENTED_RUNS.finditer(token):
+        if match.start() > end:
+            words.append(token[end : match.start()])
+        characters, dictionary = match.groups()
+        if characters:
+            words.extend(characters)
+        else:
+            words.extend(_segment_words(dictionary))
+        end = match.end()
+    if not end:
+        return (token,)
+    if end < len(token):
+        words.append(token[end:])
+    return tuple(words)
+
+
+def char_count_matrix(tokens: Sequence[str]) -> np.ndarray:
+    """Characters per script of every token, one row per token and one
+    column per entry of ``SCRIPTS``, from a single classification pass."""
+    if not tokens:
+        return np.zeros((0, len(SCRIPTS)), dtype=np.int64)
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    ids = classify(" ".join(tokens))
+    # The separator after each token is unclassified, so it lands in column 0.
+    rows = np.repeat(np.arange(len(tokens)), lengths + 1)[:-1]
+    return np.bincount(
+        rows * len(SCRIPTS) + ids, minlength=len(tokens) * len(SCRIPTS)
+    ).reshape(len(tokens), len(SCRIPTS))
+
+
+def script_counts(
+    tokens: Sequence[str], weights: Optional[Sequence[int]] = None
+) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Character and token counts per script over ``tokens``.
+
+    Each token counts ``weights[i]`` times, so a word counter can be passed
+    as its keys and values and the text is classified once per distinct
+    word. Scripts with no characters are left out.
+    """
+    if not tokens:
+        return {}, {}
+    text = " ".join(tokens)
+    ids, word_ids = _classify_words(text)
+    char_weights = _char_weights(tokens, weights)
+    chars = np.bincount(ids, weights=char_weights, minlength=len(SCRIPTS))
+
+    starts, ends, run_ids = _runs(word_ids)
+    tokens_per_run = np.ones(len(starts), dtype=np.int64)
+    for script in CHARACTER_SEGMENTED:
+        is_script = run_ids == SCRIPTS.index(script)
+        tokens_per_run[is_script] = (ends - starts)[is_script]
+    for script in DICTIONARY_SEGMENTED:
+        for run in np.flatnonzero(run_ids == SCRIPTS.index(script)).tolist():
+            tokens_per_run[run] = len(_segment_words(text[starts[run] : ends[run]]))
+    if char_weights is not None:
+        tokens_per_run = tokens_per_run * char_weights[starts]
+    words = np.bincount(run_ids, weights=tokens_per_run, minlength=len(SCRIPTS))
+
+    return _named(chars), _named(words)
+
+
+def char_counts(
+    tokens: Sequence[str], weights: Optional[Sequence[int]] = None
+) -> Dict[str, int]:
+    """Characters per script over ``tokens``, like the first half of
+    ``script_counts`` without splitting the text into words."""
+    if not tokens:
+        return {}
+    text = " ".join(tokens)
+    chars = np.bincount(
+        classify(text),
+        weights=_char_weights(tokens, weights),
+        minlength=len(SCRIPTS),
+    )
+    return _named(chars)
+
+
+def _char_weights(
+    tokens: Sequence[str], weights: Optional[Sequence[int]]
+) -> Optional[np.ndarray]:
+    """The weight of every character of ``" ".join(tokens)``."""
+    if weights is None:
+        return None
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    # Every token's characters plus the space after it carry its weight.
+    return np.repeat(np.asarray(weights, dtype=np.int64), lengths + 1)[:-1]
+
+
+def _named(counts: np.ndarray) -> Dict[str, int]:
+    return {
+        SCRIPTS[script_id]: int(count)
+        for script_id, count in enumerate(counts.tolist())
+        if script_id and count
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _word_segmenter():
+    try:
+        from pythainlp.tokenize import word_tokenize
+    except ImportError:
+        return None
+    return word_tokenize
+
+
+def _segment_words(segment: str) -> List[str]:
+    segmenter = _word_segmenter()
+    if segmenter is None:
+        return [segment]
+    return [word for word in segmenter(segment) if word.strip()]
@@ -0,0 +1,149 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from caching import Cache, LRUCache
+
+if TYPE_CHECKING:
+    from wordcloud import WordCloud
+
+# Fonts with Hangul, kana and CJK glyphs, tried in order: a path, or a file
+# name that PIL looks up in the system font directories.
+FONT_CANDIDATES = (
+    (os.getenv("WORD_CLOUD_FONT"),)
+    if os.getenv("WORD_CLOUD_FONT")
+    else (
+        "AppleGothic.ttf",
+        "NotoSansCJK-Regular.ttc",
+        "NanumGothic.ttf",
+        "malgun.ttf",
+    )
+)
+WORD_CLOUD_OPTIONS = dict(
+    stopwords=None,
+    width=800,
+    height=400,
+    background_color="white",
+    regexp=r"[\u3040-\u309f\u30a0-\u30ff\u4e00-\u9fff\uac00-\ud7af]+",
+)
+
+# One configured WordCloud per process, reused for every render.
+_word_cloud: Optional["WordCloud"] = None
+_word_cloud_lock = threading.Lock()
+
+
+def _get_word_cloud() -> "WordCloud":
+    global _word_cloud
+
+    if _word_cloud is None:
+        # wordcloud pulls in matplotlib, so it is only imported to render.
+        from wordcloud import WordCloud
+
+        _word_cloud = WordCloud(
+            font_path=find_font(FONT_CANDIDATES), **WORD_CLOUD_OPTIONS
+        )
+    return _word_cloud
+
+
+def find_font(candidates: Iterable[str]) -> Optional[str]:
+    """The first font PIL can load, by path or by name from the system font
+    directories; ``None`` (wordcloud's bundled font) when none is installed."""
+    from PIL import ImageFont
+
+    for font in candidates:
+        try:
+            ImageFont.truetype(font)
+        except OSError:
+            continue
+        return font
+    return None
+
+
+def render_png(word_freq: Dict[str, float]) -> bytes:
+    """Renders frequencies straight to PNG bytes, without matplotlib."""
+    if not word_freq:
+        return b""
+
+    with _word_cloud_lock:
+        image = _get_word_cloud().generate_from_frequencies(word_freq).to_image()
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def frequencies_key(word_freq: Dict[str, float]) -> str:
+    data = json.dumps(sorted(word_freq.items()), ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+class WordCloudRenderer:
+    """Renders word clouds in a process pool and caches the PNG bytes.
+
+    Images are cached by a hash of the frequency dict, so identical clouds
+    (the same song, or songs sharing a top-10) are rendered once. With
+    ``processes=0`` rendering happens in the calling thread. A ``cache``
+    replaces the in-process one, e.g. to share images between replicas.
+    """
+
+    def __init__(
+        self, processes: int = 2, cache_size: int = 256, cache: Optional[Cache] = None
+    ):
+        self.processes = processes
+        self.cache = (
+            cache
+            if cache is not None
+            else LRUCache(maxsize=cache_size, name="word_cloud")
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def render(self, word_count) -> bytes:
+        return self.render_many([word_count])[0]
+
+    def render_many(self, word_counts: List) -> List[bytes]:
+        """Renders several clouds in parallel, returning PNGs in input order."""
+        word_freqs = [dict(word_count) for word_count in word_counts]
+        keys = [frequencies_key(word_freq) for word_freq in word_freqs]
+        images = [self.cache.get(key) for key in keys]
+
+        missing = {
+            key: word_freq
+            for key, word_freq, image in zip(keys, word_freqs, images)
+            if image is None
+        }
+        if missing:
+            if self.processes > 0 and len(missing) > 1:
+                rendered = list(self._get_executor().map(render_png, missing.values()))
+            else:
+                rendered = [render_png(word_freq) for word_freq in missing.values()]
+            rendered = dict(zip(missing, rendered))
+            for key, image in rendered.items():
+                self.cache.set(key, image)
+            # Not read back from the cache, which may already have evicted them.
+            images = [
+                rendered[key] if image is None else image
+                for key, image in zip(keys, images)
+            ]
+
+        return images
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # Spawned workers only import this module, not the app.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor